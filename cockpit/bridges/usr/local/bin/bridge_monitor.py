@@ -4,6 +4,22 @@
 bridge_monitor.py - Monitor Linux Bridge Statistics
 Compatible with Cockpit integration
 Requires Python 3.8+
+
+Run once (--json, --table), or as a daemon (--daemon) that rescans every
+--interval seconds, keeps the latest result in memory and answers queries on a
+Unix socket, so any number of Cockpit tabs and scripts share one scan.
+
+The daemon, its socket protocol and the metrics history live in
+monitor_daemon.py, shared with nexus9000v_monitor.py and installed next to
+this script. Deltas list changed items under "bridges", identified by bridge
+name; the history keeps RX and TX bytes per second of each bridge.
+
+Usage:
+    python3 bridge_monitor.py --table
+    sudo python3 bridge_monitor.py --daemon --interval 10
+    python3 bridge_monitor.py --query [--table]
+    python3 bridge_monitor.py --query --since 41 --epoch 1760790000.0
+    python3 bridge_monitor.py --query --history 60 --table     # sparklines of the last hour
 """
 
 import argparse
@@ -13,12 +29,16 @@ import os
 import re
 import subprocess
 import sys
+import time
 from datetime import datetime, timezone
 from typing import Dict, List, Tuple
 
+from monitor_daemon import DEFAULT_INTERVAL, MetricsHistory, SnapshotStore, print_history, query_daemon, run_daemon
+
 # Configuration
 LOG_FILE = "/var/log/bridge-monitor.log"
 STATUS_FILE = "/tmp/bridge-status.json"
+SOCKET_FILE = "/run/bridge-monitor/monitor.sock"  # --daemon query socket
 
 
 # Set up logging with fallback for permissions
@@ -49,6 +69,7 @@ class BridgeMonitor:
 
     def __init__(self):
         self.logger = logger
+        self.previous: Dict[str, Tuple[float, int, int]] = {}  # bridge -> (monotonic time, rx_bytes, tx_bytes) of the last scan
 
     def run_command(self, cmd: List[str], timeout: int = 10) -> Tuple[bool, str, str]:
         """Run a shell command and return success, stdout, stderr"""
@@ -207,6 +228,16 @@ class BridgeMonitor:
                 msg = f"Failed to collect stats for bridge {bridge_name}: {e}"
                 self.logger.error(msg)
 
+        # Byte rates since this process's previous scan (None on the first one, or after a counter reset)
+        now = time.monotonic()
+        for stats in bridge_stats:
+            before = self.previous.get(stats["name"])
+            stats["rx_rate"] = stats["tx_rate"] = None
+            if before and now > before[0] and stats["rx_bytes"] >= before[1] and stats["tx_bytes"] >= before[2]:
+                stats["rx_rate"] = round((stats["rx_bytes"] - before[1]) / (now - before[0]), 1)
+                stats["tx_rate"] = round((stats["tx_bytes"] - before[2]) / (now - before[0]), 1)
+        self.previous = {stats["name"]: (now, stats["rx_bytes"], stats["tx_bytes"]) for stats in bridge_stats}
+
         result = {"timestamp": datetime.now(timezone.utc).isoformat(), "bridge_count": len(bridge_stats), "bridges": bridge_stats}
 
         # Write status file
@@ -246,15 +277,54 @@ def print_table(data: Dict):
         )
 
 
+def bridge_samples(data: Dict) -> Dict[str, Dict[str, float]]:
+    """History samples of one scan: RX/TX bytes per second of each bridge"""
+    return {bridge["name"]: {"rx_rate": bridge["rx_rate"], "tx_rate": bridge["tx_rate"]} for bridge in data["bridges"] if bridge.get("rx_rate") is not None}
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(description="Monitor Linux Bridge Statistics")
     parser.add_argument("--json", action="store_true", help="Output JSON")
     parser.add_argument("--table", action="store_true", help="Output table")
     parser.add_argument("--bridge", type=str, help="Monitor specific bridge only")
+    parser.add_argument("--daemon", action="store_true", help="Keep scanning and answer queries on the socket")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help=f"--daemon seconds between scans (default: {DEFAULT_INTERVAL})")
+    parser.add_argument("--socket", default=SOCKET_FILE, help=f"Daemon query socket (default: {SOCKET_FILE})")
+    parser.add_argument("--query", action="store_true", help="Print the running daemon's snapshot instead of scanning")
+    parser.add_argument("--since", type=int, help="With --query: only what changed after this seq")
+    parser.add_argument("--epoch", type=float, help="With --since: the epoch of the reply that seq came from")
+    parser.add_argument("--history", type=float, metavar="MINUTES", help="With --query: also the metrics of the last MINUTES")
 
     args = parser.parse_args()
 
+    if args.query:
+        try:
+            reply = query_daemon(args.socket, args.since, args.epoch, args.history)
+        except (OSError, ValueError) as e:
+            print(f"No monitor daemon answering on {args.socket}: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.table and (reply.get("data") or reply.get("history")):
+            if reply.get("data"):
+                print_table(reply["data"])
+            if reply.get("history"):
+                print()
+                print_history(reply["history"])
+        else:
+            print(json.dumps(reply, indent=2))
+        return
+
+    if args.daemon:
+        monitor = BridgeMonitor()
+        try:
+            history = MetricsHistory(args.interval, bridge_samples)
+            run_daemon(monitor.scan_bridges, SnapshotStore("bridges", lambda bridge: bridge["name"]), history, args.socket, args.interval)
+        except (OSError, RuntimeError) as e:
+            msg = f"Error: {e}"
+            logger.error(msg)
+            sys.exit(1)
+        return
+
     # If outputting JSON, disable logging to stdout to avoid contaminating JSON
     if args.json:
         # Remove the stdout handler to prevent log messages in JSON output
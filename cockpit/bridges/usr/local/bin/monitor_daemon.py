@@ -0,0 +1 @@
+../../../../common/usr/local/bin/monitor_daemon.py
\ No newline at end of file
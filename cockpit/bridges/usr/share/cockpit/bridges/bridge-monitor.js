@@ -32,6 +32,44 @@ function formatTimestamp(timestamp) {
     return date.toLocaleString();
 }
 
+function sparklinePoints(values, top) {
+    // SVG polylines of values scaled to 0..top in a 120x24 box; a null ends a segment
+    const step = values.length > 1 ? 120 / (values.length - 1) : 0;
+    const segments = [];
+    let points = [];
+    values.forEach(function(value, i) {
+        if (value === null) {
+            if (points.length) segments.push(points);
+            points = [];
+            return;
+        }
+        points.push((i * step).toFixed(1) + ',' + (24 - Math.min(value / top, 1) * 24).toFixed(1));
+    });
+    if (points.length) segments.push(points);
+    return segments.map(function(segment) { return '<polyline points="' + segment.join(' ') + '"/>'; }).join('');
+}
+
+function formatSparkline(name, metric, minTop, label) {
+    // Mean (solid) and peak (faint) of the last HISTORY_MINUTES from the daemon's history
+    const series = lastHistory && lastHistory.series[name];
+    if (!series || !series[metric]) return '';
+    const values = series[metric];
+    const peaks = values.max.filter(function(value) { return value !== null; });
+    if (peaks.length === 0) return '';
+    const peak = Math.max.apply(null, peaks);
+    const top = Math.max(minTop, peak) || 1;
+    return '<div class="sparkline" title="' + label + ', last ' + HISTORY_MINUTES + ' min (peak ' + peak + ')">' +
+        '<svg viewBox="0 0 120 24" preserveAspectRatio="none">' +
+            '<g class="sparkline-max">' + sparklinePoints(values.max, top) + '</g>' +
+            '<g class="sparkline-mean">' + sparklinePoints(values.mean, top) + '</g>' +
+        '</svg>' +
+    '</div>';
+}
+
+function formatRate(rate) {
+    return rate === null || rate === undefined ? '' : ', ' + formatBytes(rate) + '/s';
+}
+
 function createBridgeCard(bridge) {
     const statusClass = bridge.status === 'up' ? 'up status-up' : 'down status-down';
     const stpClass = bridge.stp_state === 'enabled' ? 'stp-enabled' : 'stp-disabled';
@@ -50,12 +88,14 @@ function createBridgeCard(bridge) {
                 '<div class="metric rx-metric">' +
                     '<div class="metric-label">RX</div>' +
                     '<div class="metric-value">' + formatBytes(bridge.rx_bytes) + '</div>' +
-                    '<div class="metric-subtitle">' + bridge.rx_packets.toLocaleString() + ' packets</div>' +
+                    '<div class="metric-subtitle">' + bridge.rx_packets.toLocaleString() + ' packets' + formatRate(bridge.rx_rate) + '</div>' +
+                    formatSparkline(bridge.name, 'rx_rate', 0, 'RX bytes/s') +
                 '</div>' +
                 '<div class="metric tx-metric">' +
                     '<div class="metric-label">TX</div>' +
                     '<div class="metric-value">' + formatBytes(bridge.tx_bytes) + '</div>' +
-                    '<div class="metric-subtitle">' + bridge.tx_packets.toLocaleString() + ' packets</div>' +
+                    '<div class="metric-subtitle">' + bridge.tx_packets.toLocaleString() + ' packets' + formatRate(bridge.tx_rate) + '</div>' +
+                    formatSparkline(bridge.name, 'tx_rate', 0, 'TX bytes/s') +
                 '</div>' +
             '</div>' +
         '</div>' +
@@ -99,35 +139,73 @@ function updateBridgeDisplay(data) {
     lastUpdatedDiv.textContent = 'Last updated: ' + formatTimestamp(data.timestamp) + ' (' + data.bridge_count + ' bridges found)';
 }
 
+// Last snapshot from the monitor daemon; later refreshes only ask what changed since lastSeq
+let lastData = null;
+let lastSeq = null;
+let lastEpoch = null;
+
+// Minutes of metrics history drawn as sparklines (see MetricsHistory in monitor_daemon.py)
+const HISTORY_MINUTES = 10;
+let lastHistory = null;
+
+function applyReply(reply) {
+    if (reply.full) {
+        lastData = reply.data;
+    } else {
+        const bridges = {};
+        lastData.bridges.concat(reply.bridges).forEach(function(bridge) { bridges[bridge.name] = bridge; });
+        Object.keys(reply.fields).forEach(function(field) { lastData[field] = reply.fields[field]; });
+        lastData.bridges = reply.order.map(function(name) { return bridges[name]; });
+    }
+    lastSeq = lastData ? reply.seq : null;
+    lastEpoch = reply.epoch;
+    lastHistory = reply.history || null;
+    return lastData;
+}
+
+function queryDaemon() {
+    // One request line to the daemon socket (see bridge_monitor.py --daemon), one reply line back
+    return new Promise(function(resolve, reject) {
+        const request = lastSeq === null ? { history: HISTORY_MINUTES } : { since: lastSeq, epoch: lastEpoch, history: HISTORY_MINUTES };
+        const channel = cockpit.channel({ payload: 'stream', unix: '/run/bridge-monitor/monitor.sock' });
+        let buffer = '';
+        channel.addEventListener('message', function(event, data) { buffer += data; });
+        channel.addEventListener('close', function(event, options) {
+            if (options.problem) {
+                reject(new Error(options.problem));
+                return;
+            }
+            try {
+                resolve(applyReply(JSON.parse(buffer)));
+            } catch (e) {
+                reject(e);
+            }
+        });
+        channel.send(JSON.stringify(request) + '\n');
+    });
+}
+
 function refreshData() {
     clearError();
     showLoading();
 
-    // First try to read from the cached status file
-    cockpit.file('/tmp/bridge-status.json').read()
-        .done(function(data) {
-            hideLoading();
-            try {
-                if (data) {
-                    const jsonData = JSON.parse(data);
-                    updateBridgeDisplay(jsonData);
-                } else {
-                    // If status file is empty, fall back to direct execution
-                    executeDirectly();
-                }
-            } catch (e) {
-                // If status file is corrupt or missing, fall back to direct execution
-                executeDirectly();
+    queryDaemon()
+        .then(function(data) {
+            if (!data) {
+                throw new Error('daemon has not finished its first scan');
             }
+            hideLoading();
+            updateBridgeDisplay(data);
         })
-        .fail(function() {
-            // If status file doesn't exist, fall back to direct execution
+        .catch(function() {
+            // No daemon (or no scan yet): run the monitor once
+            lastSeq = null;
+            lastHistory = null;
             executeDirectly();
         });
 }
 
 function executeDirectly() {
-    // Fallback: execute the script directly if status file is unavailable
     cockpit.spawn(['/usr/bin/python3', '/usr/local/bin/bridge_monitor.py', '--json'])
         .done(function(data) {
             hideLoading();
@@ -155,7 +233,7 @@ function toggleAutoRefresh() {
         icon.className = 'fa fa-play';
         text.textContent = 'Start Auto-refresh';
     } else {
-        autoRefreshInterval = setInterval(refreshData, 30000);
+        autoRefreshInterval = setInterval(refreshData, 10000);
         isAutoRefresh = true;
         icon.className = 'fa fa-pause';
         text.textContent = 'Stop Auto-refresh';
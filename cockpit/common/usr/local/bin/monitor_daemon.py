@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+
+"""
+monitor_daemon.py - Daemon mode shared by the Cockpit monitors
+Requires Python 3.8+
+
+nexus9000v_monitor.py and bridge_monitor.py import this module from their own
+directory (both install it into /usr/local/bin). With --daemon they rescan
+every --interval seconds, keep the latest result in memory and answer queries
+on a Unix socket, so any number of Cockpit tabs and scripts share one scan.
+
+Socket protocol: one JSON request line per connection, one JSON reply, then
+the daemon closes the connection. KEY is the monitor's list of items ("vms",
+"bridges"), each identified by the monitor's item key.
+    {}                              -> {"epoch", "seq", "full": true, "data": <--json output>}
+    {"since": SEQ, "epoch": EPOCH}  -> {"epoch", "seq", "full": false, "fields": {changed top-level
+                                        fields}, KEY: [changed items], "removed": [keys], "order": [keys]}
+"order" lists every current item. A delta is only returned for a seq of the
+same daemon run (epoch); otherwise, or before the first scan completes
+("data": null), the reply is a full snapshot.
+
+The daemon also keeps recent metrics in fixed-size ring buffers (see
+MetricsHistory). Adding "history": MINUTES to a request adds
+    "history": {"step", "start", "points", "series": {name: {metric: {"mean": [...], "max": [...]}}}}
+from the finest tier that covers the window (per scan, 1 minute or 10
+minutes); empty buckets are null. "series": [names] limits it to those series.
+"""
+
+import json
+import logging
+import math
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 10  # --daemon seconds between scans
+HISTORY_SLOTS = (600, 1440, 1008)  # buckets kept per series: per scan, per minute, per 10 minutes
+HISTORY_MAX_SERIES = 128
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """Latest scan result and, per field and per item, the seq it last changed in
+
+    Enough to answer "what changed since seq N" for any N of this daemon run
+    without keeping old snapshots around.
+    """
+
+    def __init__(self, key: str, item_key: Callable[[Dict], str]):
+        self.key = key  # the list of items ("vms", "bridges")
+        self.item_key = item_key  # identity of an item within that list
+        self.epoch = time.time()  # identifies this daemon run; seqs restart with it
+        self.seq = 0
+        self.data: Optional[Dict] = None
+        self.field_seq: Dict[str, int] = {}
+        self.item_seq: Dict[str, int] = {}
+        self.removed_seq: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def update(self, data: Dict) -> None:
+        """Store a new scan result as the next seq"""
+        with self.lock:
+            seq = self.seq + 1
+            old = self.data or {}
+            for field, value in data.items():
+                if field != self.key and (field not in old or old[field] != value):
+                    self.field_seq[field] = seq
+            old_items = {self.item_key(item): item for item in old.get(self.key, [])}
+            new_items = {self.item_key(item): item for item in data[self.key]}
+            for name, item in new_items.items():
+                if old_items.get(name) != item:
+                    self.item_seq[name] = seq
+                    self.removed_seq.pop(name, None)
+            for name in old_items.keys() - new_items.keys():
+                self.item_seq.pop(name, None)
+                self.removed_seq[name] = seq
+            self.seq = seq
+            self.data = data
+
+    def query(self, since: Optional[int] = None, epoch: Optional[float] = None) -> Dict:
+        """Full snapshot, or the changes after seq since when it belongs to this run"""
+        with self.lock:
+            reply: Dict = {"epoch": self.epoch, "seq": self.seq}
+            if self.data is None or since is None or epoch != self.epoch or not 0 <= since <= self.seq:
+                reply.update(full=True, data=self.data)
+                return reply
+            items = self.data[self.key]
+            reply.update(
+                full=False,
+                fields={field: self.data[field] for field, seq in self.field_seq.items() if seq > since},
+                removed=sorted(name for name, seq in self.removed_seq.items() if seq > since),
+                order=[self.item_key(item) for item in items],
+            )
+            reply[self.key] = [item for item in items if self.item_seq[self.item_key(item)] > since]
+            return reply
+
+
+class Ring:
+    """Fixed-size ring of time buckets step seconds wide, each holding width metrics
+
+    Slot i holds bucket stamps[i] (time // step): the number of samples in it
+    and, per metric, their sum and maximum. A slot whose stamp is not the
+    bucket asked for is empty (never written, or since overwritten).
+    """
+
+    def __init__(self, step: float, slots: int, width: int):
+        self.step = step
+        self.slots = slots
+        self.width = width
+        self.stamps = array("q", [-1]) * slots
+        self.counts = array("I", [0]) * slots
+        self.sums = array("f", [0.0]) * (slots * width)
+        self.peaks = array("f", [0.0]) * (slots * width)
+
+    def add(self, t: float, values: List[float]) -> None:
+        bucket = int(t // self.step)
+        slot = bucket % self.slots
+        base = slot * self.width
+        if self.stamps[slot] != bucket:
+            self.stamps[slot] = bucket
+            self.counts[slot] = 0
+            for i, value in enumerate(values):
+                self.sums[base + i] = 0.0
+                self.peaks[base + i] = value
+        self.counts[slot] += 1
+        for i, value in enumerate(values):
+            self.sums[base + i] += value
+            self.peaks[base + i] = max(self.peaks[base + i], value)
+
+    def window(self, last: int, points: int, index: int) -> Dict[str, List[Optional[float]]]:
+        """Mean and max of metric index for the points buckets ending at bucket last (None if empty)"""
+        means: List[Optional[float]] = []
+        peaks: List[Optional[float]] = []
+        for bucket in range(last - points + 1, last + 1):
+            slot = bucket % self.slots
+            if self.stamps[slot] == bucket:
+                means.append(round(self.sums[slot * self.width + index] / self.counts[slot], 2))
+                peaks.append(round(self.peaks[slot * self.width + index], 2))
+            else:
+                means.append(None)
+                peaks.append(None)
+        return {"mean": means, "max": peaks}
+
+
+class MetricsHistory:
+    """Recent metrics of every series (VM, bridge, host) at three resolutions
+
+    Each series keeps one Ring per tier: one bucket per scan interval, 1
+    minute and 10 minutes, with HISTORY_SLOTS buckets each (at the default
+    10 s interval: 100 minutes, 24 hours and 7 days). Memory is fixed: about
+    37 KB per series plus 24 KB per metric (85 KB for two metrics), and at
+    most HISTORY_MAX_SERIES series (the least recently updated is dropped
+    first).
+    """
+
+    def __init__(self, interval: float, samples: Callable[[Dict], Dict[str, Dict[str, float]]], max_series: int = HISTORY_MAX_SERIES):
+        self.steps = [interval] + [step for step in (60, 600) if step > interval]
+        self.samples = samples  # scan result -> {series: {metric: value}}
+        self.max_series = max_series
+        self.series: "OrderedDict[str, Tuple[List[str], List[Ring]]]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, data: Dict, t: Optional[float] = None) -> None:
+        """Record the metrics of one scan result"""
+        t = time.time() if t is None else t
+        with self.lock:
+            for name, values in self.samples(data).items():
+                metrics = sorted(values)
+                entry = self.series.get(name)
+                if entry is None or entry[0] != metrics:
+                    entry = (metrics, [Ring(step, slots, len(metrics)) for step, slots in zip(self.steps, HISTORY_SLOTS)])
+                    self.series[name] = entry
+                self.series.move_to_end(name)
+                for ring in entry[1]:
+                    ring.add(t, [float(values[metric]) for metric in metrics])
+            while len(self.series) > self.max_series:
+                self.series.popitem(last=False)
+
+    def query(self, minutes: float, names: Optional[List[str]] = None) -> Dict:
+        """The last minutes of every series (or of names), from the finest tier that covers them
+
+        Point i of each list is the bucket starting at start + i * step.
+        """
+        seconds = minutes * 60
+        tier = next((i for i, step in enumerate(self.steps) if step * HISTORY_SLOTS[i] >= seconds), len(self.steps) - 1)
+        step = self.steps[tier]
+        points = max(1, min(HISTORY_SLOTS[tier], math.ceil(seconds / step)))
+        last = int(time.time() // step)
+        with self.lock:
+            series = {
+                name: {metric: rings[tier].window(last, points, i) for i, metric in enumerate(metrics)}
+                for name, (metrics, rings) in self.series.items()
+                if names is None or name in names
+            }
+        return {"step": step, "start": (last - points + 1) * step, "points": points, "series": series}
+
+
+def print_history(history: Dict) -> None:
+    """One text sparkline per series and metric (mean per bucket, and the peak)"""
+    blocks = "▁▂▃▄▅▆▇█"
+    print(f"Last {history['points']} x {history['step']:g}s")
+    for name, metrics in sorted(history["series"].items()):
+        for metric, values in sorted(metrics.items()):
+            present = [v for v in values["mean"] if v is not None]
+            if not present:
+                continue
+            top = max(present) or 1
+            line = "".join(" " if v is None else blocks[min(len(blocks) - 1, int(v / top * len(blocks)))] for v in values["mean"])
+            peak = max(v for v in values["max"] if v is not None)
+            print(f"{name:<20} {metric:<16} {line}  max {peak:g}")
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON reply out"""
+
+    timeout = 5
+
+    def handle(self):
+        try:
+            line = self.rfile.readline()
+            if not line:
+                return  # connect-only probe
+            try:
+                request = json.loads(line)
+                reply = self.server.store.query(request.get("since"), request.get("epoch"))
+                if request.get("history"):
+                    reply["history"] = self.server.history.query(float(request["history"]), request.get("series"))
+            except (ValueError, AttributeError, TypeError) as e:
+                reply = {"error": f"bad request: {e}"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+        except OSError:
+            pass  # client went away
+
+
+class QueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, store: SnapshotStore, history: MetricsHistory):
+        self.store = store
+        self.history = history
+        super().__init__(socket_path, QueryHandler)
+
+
+def open_query_server(socket_path: str, store: SnapshotStore, history: MetricsHistory) -> QueryServer:
+    """Bind the query socket, replacing a stale one; fail if another daemon answers on it"""
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+            raise RuntimeError(f"another monitor daemon is listening on {socket_path}")
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+    server = QueryServer(socket_path, store, history)
+    os.chmod(socket_path, 0o666)  # Cockpit connects as the logged-in user; replies are read-only status
+    return server
+
+
+def query_daemon(socket_path: str, since: Optional[int] = None, epoch: Optional[float] = None, history: Optional[float] = None, timeout: float = 5.0) -> Dict:
+    """Ask a running daemon for its snapshot (or the delta since seq), optionally with the last history minutes"""
+    request: Dict = {} if since is None else {"since": since, "epoch": epoch}
+    if history:
+        request["history"] = history
+    chunks = []
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode() + b"\n")
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b"".join(chunks))
+
+
+def run_daemon(scan, store: SnapshotStore, history: MetricsHistory, socket_path: str, interval: float) -> None:
+    """Scan every interval seconds and serve the results until SIGTERM/SIGINT"""
+    server = open_query_server(socket_path, store, history)
+    threading.Thread(target=server.serve_forever, name="query-server", daemon=True).start()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: stop.set())
+    msg = f"Daemon started: scanning every {interval}s, queries on {socket_path}"
+    logger.info(msg)
+    logging.getLogger().setLevel(logging.WARNING)  # per-scan INFO lines would flood the log
+
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                data = scan()
+                store.update(data)
+                history.add(data)
+            except Exception as e:
+                msg = f"Scan failed: {e}"
+                logger.error(msg)
+            stop.wait(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        server.shutdown()
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
@@ -4,6 +4,23 @@
 nexus9000v_monitor.py - Monitor Nexus 9000v QEMU VMs
 Compatible with Cockpit integration
 Requires Python 3.8+
+
+Run once (--json, --table), or as a daemon (--daemon) that rescans every
+--interval seconds, keeps the latest result in memory and answers queries on a
+Unix socket, so any number of Cockpit tabs and scripts share one scan.
+
+The daemon, its socket protocol and the metrics history live in
+monitor_daemon.py, shared with bridge_monitor.py and installed next to this
+script. Deltas list changed items under "vms", identified by the key
+"<name>/<pid>" ("<name>/" for a supervised VM that is down); the history keeps
+CPU% and memory per VM, busy/iowait/steal % of the host.
+
+Usage:
+    sudo python3 nexus9000v_monitor.py --table
+    sudo python3 nexus9000v_monitor.py --daemon --interval 10
+    python3 nexus9000v_monitor.py --query [--table]
+    python3 nexus9000v_monitor.py --query --since 41 --epoch 1760790000.0
+    python3 nexus9000v_monitor.py --query --history 60 --table     # sparklines of the last hour
 """
 
 import argparse
@@ -16,12 +33,24 @@ import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from monitor_daemon import DEFAULT_INTERVAL, MetricsHistory, SnapshotStore, print_history, query_daemon, run_daemon
 
 # Configuration
-QEMU_BINARY = "qemu-system-x86_64"
+QEMU_BINARY = b"qemu-system-x86_64"
+NEXUS_SMBIOS_MARKER = b"product=Nexus9000"  # nexus9000v.py: -smbios type=1,manufacturer=Cisco,product=Nexus9000,...
 LOG_FILE = "/var/log/nexus9000v-monitor.log"
 STATUS_FILE = "/tmp/nexus9000v-status.json"
+SOCKET_FILE = "/run/nexus9000v-monitor/monitor.sock"  # --daemon query socket
+CPU_SAMPLE_FILE = "/tmp/nexus9000v-cpu-sample.json"  # previous CPU counters, for interval CPU%
+REGISTRY_FILE = Path("/run/n9kv/registry.json")  # written by nexus9000v.py (registry.py)
+SUPERVISOR_FILE = REGISTRY_FILE.parent / "supervisor.json"  # written by supervisor.py
+KSM_DIR = Path("/sys/kernel/mm/ksm")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+TAP_NAME = re.compile(r"tap(\d+)-(\d+)")  # nexus9000v.py _tap_name(sid, index): index 0 = mgmt0, N = Ethernet1/N
+VCPU_THREAD = re.compile(r"CPU (\d+)/KVM")  # QEMU names its vCPU threads "CPU <n>/KVM"
 
 # Set up logging with fallback for permissions
 def setup_logging():
@@ -54,6 +83,8 @@ class NexusVMMonitor:
     
     def __init__(self):
         self.logger = logger
+        self.boot_time = self.get_boot_time()
+        self.previous_sample = self.load_cpu_sample()
         
     def run_command(self, cmd: List[str], timeout: int = 10) -> Tuple[bool, str, str]:
         """Run a shell command and return success, stdout, stderr"""
@@ -67,147 +98,388 @@ class NexusVMMonitor:
         except Exception as e:
             return False, "", str(e)
     
-    def get_qemu_processes(self) -> List[Dict]:
-        """Get all QEMU processes with their info"""
-        processes = []
-        
-        success, stdout, stderr = self.run_command(["ps", "-eo", "pid,cmd"])
-        if not success:
-            self.logger.error(f"Failed to get process list: {stderr}")
-            return processes
-        
-        for line in stdout.split('\n')[1:]:  # Skip header
-            line = line.strip()
-            if not line or QEMU_BINARY not in line:
-                continue
-                
-            parts = line.split(None, 1)
-            if len(parts) < 2:
+    @staticmethod
+    def get_boot_time() -> float:
+        """Host boot time (epoch seconds), the origin of /proc/<pid>/stat starttime"""
+        with open("/proc/stat") as f:
+            for line in f:
+                if line.startswith("btime "):
+                    return float(line.split()[1])
+        return 0.0
+    
+    def read_proc_stats(self, pid: int) -> Optional[Dict]:
+        """Start time, CPU ticks and resident memory from /proc/<pid>/stat and statm"""
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()  # comm (field 2) may contain spaces
+            with open(f"/proc/{pid}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            return None
+        # fields[0] is field 3 (state): utime=14, stime=15, starttime=22
+        return {
+            "pid": pid,
+            "start_time": int(fields[19]),
+            "cpu_ticks": int(fields[11]) + int(fields[12]),
+            "rss_bytes": resident_pages * PAGE_SIZE,
+        }
+    
+    def get_qemu_processes(self) -> Dict[int, Dict]:
+        """Nexus 9000v QEMU processes by pid, from one walk of /proc"""
+        processes = {}
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
                 continue
-                
             try:
-                pid = int(parts[0])
-                cmdline = parts[1]
-                processes.append({"pid": pid, "cmdline": cmdline})
-            except ValueError:
+                with open(f"/proc/{entry.name}/cmdline", "rb") as f:
+                    argv = f.read().split(b"\0")
+            except OSError:
+                continue  # exited, or a kernel thread we may not read
+            if not argv[0].endswith(QEMU_BINARY) or not self.is_nexus9000v(argv):
                 continue
-                
+            stats = self.read_proc_stats(int(entry.name))
+            if stats is None:
+                continue
+            stats["name"] = self.extract_vm_name(argv)
+            stats["sid"] = self.extract_sid(argv)
+            processes[stats["pid"]] = stats
         return processes
     
-    def is_nexus9000v(self, cmdline: str) -> bool:
-        """Detect if a QEMU process is running a Nexus 9000v VM"""
-        # Look for Nexus indicators
-        if re.search(r'nexus|n9k|n9000|nxos', cmdline, re.IGNORECASE):
-            return True
-        
-        # Check for typical Nexus parameters
-        typical_params = [r'-cpu.*Nehalem', r'-smp.*1', r'-m.*[34]096']
-        matches = sum(1 for param in typical_params if re.search(param, cmdline))
-        
-        if matches >= 2 and re.search(r'-serial.*pty|-monitor.*stdio', cmdline):
-            return True
-                
-        return False
-    
-    def extract_vm_name(self, cmdline: str) -> str:
-        """Extract VM name from QEMU command line"""
-        # Try -name parameter
-        name_match = re.search(r'-name\s+([^\s]+)', cmdline)
-        if name_match:
-            return name_match.group(1)
-        
-        # Try disk image filename
-        disk_match = re.search(r'([^\s/]+\.(?:qcow2|img))', cmdline)
-        if disk_match:
-            return Path(disk_match.group(1)).stem
+    def get_registered_vms(self) -> Optional[List[Dict]]:
+        """Nexus VM entries of the launcher registry, or None if there is no registry"""
+        try:
+            entries = json.loads(REGISTRY_FILE.read_text())
+        except (OSError, ValueError):
+            return None
         
-        return "nexus-unknown"
+        return [entry for entry in entries.values() if entry.get("kind") == "nexus9000v"]
     
-    def get_process_stats(self, pid: int) -> Dict:
-        """Get CPU, memory, and uptime for a process"""
-        stats = {"cpu_percent": 0.0, "memory_mb": 0, "uptime": "0m"}
+    def get_supervisor_state(self) -> Optional[Dict]:
+        """Supervised Nexus VMs by name from supervisor.py, or None if it never ran"""
+        try:
+            state = json.loads(SUPERVISOR_FILE.read_text())
+        except (OSError, ValueError):
+            return None
         
-        # Get CPU and memory
-        success, stdout, _ = self.run_command(["ps", "-p", str(pid), "-o", "%cpu,rss", "--no-headers"])
-        if success and stdout:
+        running = False
+        if state.get("pid"):
             try:
-                cpu_str, rss_str = stdout.split()
-                stats["cpu_percent"] = float(cpu_str)
-                stats["memory_mb"] = int(rss_str) // 1024  # KB to MB
-            except (ValueError, IndexError):
+                os.kill(state["pid"], 0)
+                running = True
+            except PermissionError:
+                running = True
+            except OSError:
                 pass
+        units = {u["name"]: u for u in state.get("units", []) if u.get("kind") == "nexus9000v"}
+        return {"running": running, "units": units}
+    
+    def is_nexus9000v(self, argv: List[bytes]) -> bool:
+        """True for the QEMU processes nexus9000v.py starts (its -smbios product marker)"""
+        return any(
+            arg == b"-smbios" and NEXUS_SMBIOS_MARKER in value
+            for arg, value in zip(argv, argv[1:])
+        )
+    
+    def extract_vm_name(self, argv: List[bytes]) -> str:
+        """VM name from QEMU's -name argument (plain, or guest=NAME,...)"""
+        for arg, value in zip(argv, argv[1:]):
+            if arg == b"-name":
+                name = value.decode(errors="replace").split(",")[0]
+                return name[len("guest="):] if name.startswith("guest=") else name
+        return "nexus-unknown"
+    
+    def extract_sid(self, argv: List[bytes]) -> Optional[int]:
+        """Switch sid from the -smbios serial nexus9000v.py sets (00000000<sid>)"""
+        for arg, value in zip(argv, argv[1:]):
+            if arg == b"-smbios":
+                for item in value.split(b","):
+                    key, _, serial = item.partition(b"=")
+                    if key == b"serial" and serial.isdigit():
+                        return int(serial) % 10000
+        return None
+    
+    def get_thread_ticks(self, pid: int) -> Dict[str, Dict[str, Any]]:
+        """Name and utime+stime of every thread of pid, by tid"""
+        threads: Dict[str, Dict[str, Any]] = {}
+        try:
+            tids = os.listdir(f"/proc/{pid}/task")
+        except OSError:
+            return threads
+        for tid in tids:
+            try:
+                with open(f"/proc/{pid}/task/{tid}/stat") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            comm, fields = data[data.index("(") + 1:data.rindex(")")], data.rsplit(")", 1)[1].split()
+            threads[tid] = {"comm": comm, "ticks": int(fields[11]) + int(fields[12])}
+        return threads
+    
+    def get_host_cpu(self) -> List[int]:
+        """The aggregate cpu line of /proc/stat: user nice system idle iowait irq softirq steal"""
+        with open("/proc/stat") as f:
+            return [int(v) for v in f.readline().split()[1:9]]
+    
+    def load_cpu_sample(self) -> Optional[Dict]:
+        """CPU counters saved by the previous scan, if any"""
+        try:
+            with open(CPU_SAMPLE_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def save_cpu_sample(self, sample: Dict) -> None:
+        """Keep this scan's CPU counters for the next one (in memory and on disk)"""
+        self.previous_sample = sample
+        try:
+            tmp = f"{CPU_SAMPLE_FILE}.{os.getpid()}"
+            with open(tmp, 'w') as f:
+                json.dump(sample, f)
+            os.replace(tmp, CPU_SAMPLE_FILE)
+        except OSError as e:
+            self.logger.error(f"Failed to write CPU sample file: {e}")
+    
+    def get_host_cpu_stats(self, host: List[int], elapsed: Optional[float]) -> Dict:
+        """Host busy/iowait/steal % since the previous scan (or since boot on the first one)"""
+        previous = self.previous_sample["host"] if elapsed else [0] * len(host)
+        delta = [now - before for now, before in zip(host, previous)]
+        total = sum(delta) or 1
+        idle, iowait, steal = delta[3], delta[4], delta[7]
+        return {
+            "cpus": os.cpu_count(),
+            "busy_percent": round((total - idle - iowait) / total * 100, 1),
+            "iowait_percent": round(iowait / total * 100, 1),
+            "steal_percent": round(steal / total * 100, 1),
+            "window_s": round(elapsed, 1) if elapsed else None,
+        }
+    
+    def get_process_stats(self, proc: Dict, previous: Optional[Dict], elapsed: Optional[float]) -> Dict:
+        """CPU, per-vCPU CPU, memory and uptime from a /proc sample
+        
+        cpu_percent covers the interval since the previous scan (100 = one
+        host core), or the process lifetime, like ps %cpu, when this VM was
+        not in the previous scan. vCPU threads without a previous sample
+        report None.
+        """
+        started = self.boot_time + proc["start_time"] / CLK_TCK
+        total_seconds = max(int(time.time() - started), 0)
+        if previous and elapsed and previous["start_time"] == proc["start_time"]:
+            window = elapsed
+            cpu_percent = (proc["cpu_ticks"] - previous["cpu_ticks"]) / CLK_TCK / elapsed * 100
+        else:
+            previous, window = None, None
+            cpu_percent = proc["cpu_ticks"] / CLK_TCK / total_seconds * 100 if total_seconds else 0.0
+        
+        vcpus: List[Dict[str, Any]] = []
+        for tid, thread in proc["threads"].items():
+            match = VCPU_THREAD.fullmatch(thread["comm"])
+            if not match:
+                continue
+            before = previous["threads"].get(tid) if previous else None
+            percent = (thread["ticks"] - before["ticks"]) / CLK_TCK / elapsed * 100 if before and elapsed else None
+            vcpus.append({"vcpu": int(match.group(1)), "tid": int(tid), "cpu_percent": None if percent is None else round(percent, 1)})
+        vcpus.sort(key=lambda v: v["vcpu"])
         
-        # Get uptime
-        success, stdout, _ = self.run_command(["ps", "-p", str(pid), "-o", "lstart", "--no-headers"])
-        if success and stdout:
+        days = total_seconds // 86400
+        hours = (total_seconds % 86400) // 3600
+        minutes = (total_seconds % 3600) // 60
+        if days > 0:
+            uptime = f"{days}d {hours}h {minutes}m"
+        elif hours > 0:
+            uptime = f"{hours}h {minutes}m"
+        else:
+            uptime = f"{minutes}m"
+        
+        return {
+            "cpu_percent": round(cpu_percent, 1),
+            "cpu_window_s": round(window, 1) if window else None,
+            "vcpus": vcpus,
+            "memory_mb": proc["rss_bytes"] // (1024 * 1024),
+            "uptime": uptime,
+        }
+    
+    def get_ksm_merged_mb(self, pid: int) -> int:
+        """Guest memory of a process currently merged by KSM (kernel 6.1+)"""
+        try:
+            return int(Path(f"/proc/{pid}/ksm_merging_pages").read_text()) * PAGE_SIZE // (1024 * 1024)
+        except (OSError, ValueError):
+            return 0
+    
+    def get_ksm_info(self) -> Dict:
+        """Host-wide KSM state; pages_sharing is what merging actually saves"""
+        info = {"run": 0, "pages_shared": 0, "pages_sharing": 0}
+        for key in info:
             try:
-                start_time = datetime.strptime(stdout.strip(), "%a %b %d %H:%M:%S %Y")
-                uptime_delta = datetime.now() - start_time
-                total_seconds = int(uptime_delta.total_seconds())
-                
-                days = total_seconds // 86400
-                hours = (total_seconds % 86400) // 3600
-                minutes = (total_seconds % 3600) // 60
-                
-                if days > 0:
-                    stats["uptime"] = f"{days}d {hours}h {minutes}m"
-                elif hours > 0:
-                    stats["uptime"] = f"{hours}h {minutes}m"
-                else:
-                    stats["uptime"] = f"{minutes}m"
-            except Exception:
+                info[key] = int((KSM_DIR / key).read_text())
+            except (OSError, ValueError):
                 pass
-        
-        return stats
+        info["saved_mb"] = info["pages_sharing"] * PAGE_SIZE // (1024 * 1024)
+        return info
     
-    def get_network_info(self, pid: int) -> str:
-        """Get network interface info for a process"""
-        success, stdout, _ = self.run_command(["lsof", "-p", str(pid)])
-        if success:
-            tap_devices = re.findall(r'tap\d+', stdout)
-            if tap_devices:
-                return ','.join(sorted(set(tap_devices)))
-        return "default"
+    def get_open_taps(self, pid: int) -> Optional[List[str]]:
+        """TAPs the process has open: the iff: line in fdinfo of its /dev/net/tun fds (None without access)"""
+        try:
+            fds = os.listdir(f"/proc/{pid}/fd")
+        except OSError:
+            return None
+        taps = []
+        for fd in fds:
+            try:
+                if os.readlink(f"/proc/{pid}/fd/{fd}") != "/dev/net/tun":
+                    continue
+                with open(f"/proc/{pid}/fdinfo/{fd}") as f:
+                    for line in f:
+                        if line.startswith("iff:"):
+                            taps.append(line.split()[1])
+            except (OSError, IndexError):
+                continue
+        return list(dict.fromkeys(taps))  # a multi-queue TAP has one fd per queue
+    
+    def get_scheme_taps(self, sid: Optional[int]) -> List[str]:
+        """Host TAPs named by the launcher's tap<sid>-<index> scheme"""
+        if sid is None:
+            return []
+        try:
+            return [name for name in os.listdir("/sys/class/net") if name.startswith(f"tap{sid}-")]
+        except OSError:
+            return []
+    
+    def get_port_bridges(self) -> Dict[str, str]:
+        """Port name -> bridge for every OVS port (two ovs-vsctl calls for all VMs)"""
+        table = ["ovs-vsctl", "--format=csv", "--data=bare", "--no-headings"]
+        success, stdout, _ = self.run_command(table + ["--columns=_uuid,name", "list", "Port"])
+        if not success:
+            return {}
+        names = dict(line.split(",", 1) for line in stdout.splitlines() if "," in line)
+        success, stdout, _ = self.run_command(table + ["--columns=name,ports", "list", "Bridge"])
+        bridges = {}
+        for line in stdout.splitlines() if success else []:
+            bridge, _, uuids = line.partition(",")
+            for uuid in uuids.split():
+                if uuid in names:
+                    bridges[names[uuid]] = bridge
+        return bridges
+    
+    def get_tap_bridge(self, tap: str, ovs_bridges: Dict[str, str]) -> Optional[str]:
+        """The OVS bridge of tap, else its Linux bridge (sysfs master), else None"""
+        if tap in ovs_bridges:
+            return ovs_bridges[tap]
+        try:
+            master = os.path.basename(os.readlink(f"/sys/class/net/{tap}/master"))
+        except OSError:
+            return None
+        return None if master == "ovs-system" else master
+    
+    def map_interfaces(self, taps: List[str], ovs_bridges: Dict[str, str]) -> List[Dict]:
+        """Each TAP with its switch interface (mgmt0, Ethernet1/N) and bridge, in port order"""
+        interfaces = []
+        for tap in taps:
+            match = TAP_NAME.fullmatch(tap)
+            index = int(match.group(2)) if match else None
+            interface = None if index is None else ("mgmt0" if index == 0 else f"Ethernet1/{index}")
+            interfaces.append({"tap": tap, "interface": interface, "bridge": self.get_tap_bridge(tap, ovs_bridges), "index": index})
+        interfaces.sort(key=lambda i: (i["index"] is None, i["index"] or 0, i["tap"]))
+        for item in interfaces:
+            del item["index"]
+        return interfaces
     
     def scan_nexus_vms(self) -> Dict:
         """Main function to scan for Nexus 9000v VMs"""
         self.logger.info("Scanning for Nexus 9000v VMs...")
         
-        qemu_processes = self.get_qemu_processes()
+        # One /proc walk finds every VM; registry entries (same pid and start time) add names and TAPs
+        processes = self.get_qemu_processes()
+        for entry in self.get_registered_vms() or []:
+            proc = processes.get(entry["pid"])
+            if proc and proc["start_time"] == entry["start_time"]:
+                proc["name"] = entry["name"]
+                proc["taps"] = entry.get("taps")
+        candidates = sorted(processes.values(), key=lambda p: p["name"])
+        
+        # TAPs: fdinfo of the tun fds, else the registry, else the tap<sid>-<n> names; bridges in one OVS query
+        for proc in candidates:
+            open_taps = self.get_open_taps(proc["pid"])
+            proc["taps"] = open_taps if open_taps is not None else proc.get("taps") or self.get_scheme_taps(proc["sid"])
+        ovs_bridges = self.get_port_bridges() if any(proc["taps"] for proc in candidates) else {}
+        
+        # CPU counters for this scan; percentages are deltas against the previous one
+        sample: Dict[str, Any] = {"time": time.monotonic(), "host": self.get_host_cpu(), "vms": {}}
+        for proc in candidates:
+            proc["threads"] = self.get_thread_ticks(proc["pid"])
+            sample["vms"][str(proc["pid"])] = {key: proc[key] for key in ("start_time", "cpu_ticks", "threads")}
+        previous = self.previous_sample
+        elapsed = sample["time"] - previous["time"] if previous and sample["time"] > previous["time"] else None
+        host_cpu = self.get_host_cpu_stats(sample["host"], elapsed)
+        supervised = self.get_supervisor_state()
         nexus_vms = []
         
-        for process in qemu_processes:
-            if self.is_nexus9000v(process["cmdline"]):
-                try:
-                    pid = process["pid"]
-                    vm_name = self.extract_vm_name(process["cmdline"])
-                    stats = self.get_process_stats(pid)
-                    network = self.get_network_info(pid)
-                    
-                    vm_info = {
-                        "name": vm_name,
-                        "pid": pid,
-                        "status": "running",
-                        "cpu_percent": stats["cpu_percent"],
-                        "memory_mb": stats["memory_mb"],
-                        "uptime": stats["uptime"],
-                        "network_interfaces": network,
-                        "type": "nexus9000v",
-                        "last_updated": datetime.now(timezone.utc).isoformat()
-                    }
-                    
-                    nexus_vms.append(vm_info)
-                    self.logger.info(f"Found VM: {vm_name} (PID: {pid})")
-                    
-                except Exception as e:
-                    self.logger.error(f"Error processing PID {process['pid']}: {e}")
+        for process in candidates:
+            try:
+                pid = process["pid"]
+                vm_name = process["name"]
+                stats = self.get_process_stats(process, previous["vms"].get(str(pid)) if elapsed else None, elapsed)
+                interfaces = self.map_interfaces(process["taps"], ovs_bridges)
+                
+                vm_info = {
+                    "name": vm_name,
+                    "pid": pid,
+                    "status": "running",
+                    "cpu_percent": stats["cpu_percent"],
+                    "cpu_window_s": stats["cpu_window_s"],
+                    "vcpus": stats["vcpus"],
+                    "memory_mb": stats["memory_mb"],
+                    "ksm_merged_mb": self.get_ksm_merged_mb(pid),
+                    "uptime": stats["uptime"],
+                    "network_interfaces": ','.join(i["tap"] for i in interfaces) or "default",
+                    "interfaces": interfaces,
+                    "type": "nexus9000v"
+                }
+                unit = supervised["units"].get(vm_name) if supervised else None
+                if unit:
+                    vm_info["restarts"] = unit["restarts"]
+                    vm_info["last_exit"] = unit["last_exit"]
+                
+                nexus_vms.append(vm_info)
+                self.logger.info(f"Found VM: {vm_name} (PID: {pid})")
+                
+            except Exception as e:
+                self.logger.error(f"Error processing PID {process['pid']}: {e}")
+        
+        # Supervised switches that are down (crashed, backing off, crash-looping, stopped)
+        vm_count = len(nexus_vms)
+        if supervised:
+            seen = {vm["name"] for vm in nexus_vms}
+            for name, unit in sorted(supervised["units"].items()):
+                if name in seen or unit["state"] == "running":
+                    continue
+                nexus_vms.append({
+                    "name": name,
+                    "pid": None,
+                    "status": unit["state"],
+                    "cpu_percent": 0.0,
+                    "cpu_window_s": None,
+                    "vcpus": [],
+                    "memory_mb": 0,
+                    "ksm_merged_mb": 0,
+                    "uptime": "-",
+                    "network_interfaces": "",
+                    "interfaces": [],
+                    "type": "nexus9000v",
+                    "restarts": unit["restarts"],
+                    "last_exit": unit["last_exit"]
+                })
         
         result = {
             "timestamp": datetime.now(timezone.utc).isoformat(),
-            "vm_count": len(nexus_vms),
+            "vm_count": vm_count,
+            "host_cpu": host_cpu,
+            "ksm": self.get_ksm_info(),
+            "supervisor": {"running": supervised["running"]} if supervised else None,
             "vms": nexus_vms
         }
         
+        self.save_cpu_sample(sample)
+        
         # Write status file
         try:
             with open(STATUS_FILE, 'w') as f:
@@ -227,12 +499,46 @@ def print_table(data: Dict):
         print("No Nexus 9000v VMs found")
         return
     
-    print(f"{'VM NAME':<20} {'PID':<8} {'CPU%':<8} {'MEM(MB)':<10} {'UPTIME':<15} {'STATUS':<10}")
-    print(f"{'--------':<20} {'---':<8} {'----':<8} {'-------':<10} {'-------':<15} {'------':<10}")
+    print(f"{'VM NAME':<20} {'PID':<8} {'CPU%':<8} {'MEM(MB)':<10} {'KSM(MB)':<10} {'UPTIME':<15} {'STATUS':<10} {'RESTARTS':<8}")
+    print(f"{'--------':<20} {'---':<8} {'----':<8} {'-------':<10} {'-------':<10} {'-------':<15} {'------':<10} {'--------':<8}")
     
     for vm in vms:
-        print(f"{vm['name']:<20} {vm['pid']:<8} {vm['cpu_percent']:<8.1f} "
-              f"{vm['memory_mb']:<10} {vm['uptime']:<15} {vm['status']:<10}")
+        print(f"{vm['name']:<20} {vm['pid'] or '-'!s:<8} {vm['cpu_percent']:<8.1f} "
+              f"{vm['memory_mb']:<10} {vm.get('ksm_merged_mb', 0):<10} {vm['uptime']:<15} {vm['status']:<10} {vm.get('restarts', '-')!s:<8}")
+        if vm.get('vcpus'):
+            busy = ' '.join('-' if v['cpu_percent'] is None else f"{v['cpu_percent']:.0f}" for v in vm['vcpus'])
+            print(f"{'':<20} vCPU%: {busy}")
+        if vm.get('last_exit'):
+            print(f"{'':<20} last exit: {vm['last_exit']['how']}")
+    
+    host = data.get('host_cpu')
+    if host:
+        window = f"last {host['window_s']:.0f}s" if host['window_s'] else "since boot"
+        print(f"\nHost CPU ({host['cpus']} cores, {window}): {host['busy_percent']}% busy, "
+              f"{host['iowait_percent']}% iowait, {host['steal_percent']}% steal")
+    
+    ksm = data.get('ksm')
+    if ksm:
+        print(f"KSM: {'running' if ksm['run'] == 1 else 'stopped'}, {ksm['saved_mb']} MB saved "
+              f"({ksm['pages_sharing']} pages sharing {ksm['pages_shared']} shared pages)")
+    
+    supervisor = data.get('supervisor')
+    if supervisor:
+        print(f"Supervisor: {'running' if supervisor['running'] else 'NOT RUNNING (VMs are not restarted)'}")
+
+
+def vm_key(vm: Dict) -> str:
+    """A VM's identity in daemon deltas: name/pid (name/ for supervised VMs that are down)"""
+    return f"{vm['name']}/{vm['pid'] or ''}"
+
+
+def vm_samples(data: Dict) -> Dict[str, Dict[str, float]]:
+    """History samples of one scan: each running VM, and the host"""
+    samples = {vm["name"]: {"cpu_percent": vm["cpu_percent"], "memory_mb": vm["memory_mb"]} for vm in data["vms"] if vm["pid"]}
+    host = data.get("host_cpu")
+    if host and host["window_s"]:
+        samples["host"] = {key: host[key] for key in ("busy_percent", "iowait_percent", "steal_percent")}
+    return samples
 
 
 def main():
@@ -240,9 +546,42 @@ def main():
     parser = argparse.ArgumentParser(description="Monitor Nexus 9000v VMs")
     parser.add_argument('--json', action='store_true', help='Output JSON')
     parser.add_argument('--table', action='store_true', help='Output table')
+    parser.add_argument('--daemon', action='store_true', help='Keep scanning and answer queries on the socket')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help=f'--daemon seconds between scans (default: {DEFAULT_INTERVAL})')
+    parser.add_argument('--socket', default=SOCKET_FILE, help=f'Daemon query socket (default: {SOCKET_FILE})')
+    parser.add_argument('--query', action='store_true', help="Print the running daemon's snapshot instead of scanning")
+    parser.add_argument('--since', type=int, help='With --query: only what changed after this seq')
+    parser.add_argument('--epoch', type=float, help='With --since: the epoch of the reply that seq came from')
+    parser.add_argument('--history', type=float, metavar='MINUTES', help='With --query: also the metrics of the last MINUTES')
     
     args = parser.parse_args()
     
+    if args.query:
+        try:
+            reply = query_daemon(args.socket, args.since, args.epoch, args.history)
+        except (OSError, ValueError) as e:
+            print(f"No monitor daemon answering on {args.socket}: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.table and (reply.get("data") or reply.get("history")):
+            if reply.get("data"):
+                print_table(reply["data"])
+            if reply.get("history"):
+                print()
+                print_history(reply["history"])
+        else:
+            print(json.dumps(reply, indent=2))
+        return
+    
+    if args.daemon:
+        monitor = NexusVMMonitor()
+        try:
+            history = MetricsHistory(args.interval, vm_samples)
+            run_daemon(monitor.scan_nexus_vms, SnapshotStore("vms", vm_key), history, args.socket, args.interval)
+        except (OSError, RuntimeError) as e:
+            logger.error(f"Error: {e}")
+            sys.exit(1)
+        return
+    
     # If outputting JSON, disable logging to stdout to avoid contaminating JSON
     if args.json:
         # Remove the stdout handler to prevent log messages in JSON output
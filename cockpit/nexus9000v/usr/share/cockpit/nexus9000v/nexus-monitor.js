@@ -29,8 +29,68 @@ function formatTimestamp(timestamp) {
     return date.toLocaleString();
 }
 
+function formatLastExit(vm) {
+    if (!vm.last_exit) return '';
+    return '<div><strong>Last exit:</strong> ' + vm.last_exit.how + ' at ' +
+        new Date(vm.last_exit.time * 1000).toLocaleString() + '</div>';
+}
+
+function formatVcpus(vm) {
+    if (!vm.vcpus || vm.vcpus.length === 0) return '';
+    const busy = vm.vcpus.map(function(v) {
+        return v.cpu_percent === null ? '-' : Math.round(v.cpu_percent) + '%';
+    }).join(' ');
+    return '<div><strong>vCPUs:</strong> ' + busy + '</div>';
+}
+
+function formatNetwork(vm) {
+    if (!vm.interfaces || vm.interfaces.length === 0) return vm.network_interfaces || 'default';
+    return vm.interfaces.map(function(i) {
+        return (i.interface || i.tap) + ' &rarr; ' + (i.bridge || '?') + ' (' + i.tap + ')';
+    }).join('<br>');
+}
+
+function formatCpuLabel(vm) {
+    return vm.cpu_window_s ? 'CPU (last ' + Math.round(vm.cpu_window_s) + 's)' : 'CPU (avg)';
+}
+
+function sparklinePoints(values, top) {
+    // SVG polylines of values scaled to 0..top in a 120x24 box; a null ends a segment
+    const step = values.length > 1 ? 120 / (values.length - 1) : 0;
+    const segments = [];
+    let points = [];
+    values.forEach(function(value, i) {
+        if (value === null) {
+            if (points.length) segments.push(points);
+            points = [];
+            return;
+        }
+        points.push((i * step).toFixed(1) + ',' + (24 - Math.min(value / top, 1) * 24).toFixed(1));
+    });
+    if (points.length) segments.push(points);
+    return segments.map(function(segment) { return '<polyline points="' + segment.join(' ') + '"/>'; }).join('');
+}
+
+function formatSparkline(name, metric, minTop, label) {
+    // Mean (solid) and peak (faint) of the last HISTORY_MINUTES from the daemon's history
+    const series = lastHistory && lastHistory.series[name];
+    if (!series || !series[metric]) return '';
+    const values = series[metric];
+    const peaks = values.max.filter(function(value) { return value !== null; });
+    if (peaks.length === 0) return '';
+    const peak = Math.max.apply(null, peaks);
+    const top = Math.max(minTop, peak) || 1;
+    return '<div class="sparkline" title="' + label + ', last ' + HISTORY_MINUTES + ' min (peak ' + peak + ')">' +
+        '<svg viewBox="0 0 120 24" preserveAspectRatio="none">' +
+            '<g class="sparkline-max">' + sparklinePoints(values.max, top) + '</g>' +
+            '<g class="sparkline-mean">' + sparklinePoints(values.mean, top) + '</g>' +
+        '</svg>' +
+    '</div>';
+}
+
 function createVMCard(vm) {
     const statusClass = vm.status === 'running' ? 'running status-running' : 'stopped status-stopped';
+    const restarts = vm.restarts === undefined ? '' : '<div><strong>Restarts:</strong> ' + vm.restarts + '</div>';
     
     return '<div class="vm-card ' + vm.status + '">' +
         '<div class="vm-header">' +
@@ -40,18 +100,23 @@ function createVMCard(vm) {
         '<div class="vm-metrics">' +
             '<div class="metric">' +
                 '<div class="metric-value">' + (vm.cpu_percent || 0) + '%</div>' +
-                '<div class="metric-label">CPU</div>' +
+                '<div class="metric-label">' + formatCpuLabel(vm) + '</div>' +
+                formatSparkline(vm.name, 'cpu_percent', 100, 'CPU %') +
             '</div>' +
             '<div class="metric">' +
                 '<div class="metric-value">' + (vm.memory_mb || 0) + '</div>' +
                 '<div class="metric-label">Memory (MB)</div>' +
+                formatSparkline(vm.name, 'memory_mb', 0, 'Memory (MB)') +
             '</div>' +
         '</div>' +
         '<div class="vm-details">' +
             '<div><strong>PID:</strong> ' + (vm.pid || 'N/A') + '</div>' +
             '<div><strong>Uptime:</strong> ' + formatUptime(vm.uptime) + '</div>' +
-            '<div><strong>Network:</strong> ' + (vm.network_interfaces || 'default') + '</div>' +
+            formatVcpus(vm) +
+            '<div><strong>KSM merged:</strong> ' + (vm.ksm_merged_mb || 0) + ' MB</div>' +
+            '<div><strong>Network:</strong> ' + formatNetwork(vm) + '</div>' +
             '<div><strong>Type:</strong> ' + (vm.type || 'nexus9000v') + '</div>' +
+            restarts + formatLastExit(vm) +
         '</div>' +
     '</div>';
 }
@@ -72,13 +137,93 @@ function updateVMDisplay(data) {
         container.innerHTML = '<div class="vm-grid">' + vmCards + '</div>';
     }
 
-    lastUpdatedDiv.textContent = 'Last updated: ' + formatTimestamp(data.timestamp) + ' (' + data.vm_count + ' VMs found)';
+    let ksmText = '';
+    if (data.ksm) {
+        ksmText = data.ksm.run === 1 ? ', KSM saving ' + data.ksm.saved_mb + ' MB' : ', KSM off';
+    }
+    let hostText = '';
+    if (data.host_cpu) {
+        hostText = ', host ' + data.host_cpu.busy_percent + '% busy / ' + data.host_cpu.iowait_percent + '% iowait / ' + data.host_cpu.steal_percent + '% steal';
+    }
+    let supervisorText = '';
+    if (data.supervisor) {
+        supervisorText = data.supervisor.running ? ', supervised' : ', supervisor NOT running';
+    }
+    lastUpdatedDiv.textContent = 'Last updated: ' + formatTimestamp(data.timestamp) + ' (' + data.vm_count + ' VMs found' + hostText + ksmText + supervisorText + ')';
+}
+
+// Last snapshot from the monitor daemon; later refreshes only ask what changed since lastSeq
+let lastData = null;
+let lastSeq = null;
+let lastEpoch = null;
+
+// Minutes of metrics history drawn as sparklines (see MetricsHistory in monitor_daemon.py)
+const HISTORY_MINUTES = 10;
+let lastHistory = null;
+
+function vmKey(vm) {
+    // Same key as vm_key() in nexus9000v_monitor.py
+    return vm.name + '/' + (vm.pid || '');
+}
+
+function applyReply(reply) {
+    if (reply.full) {
+        lastData = reply.data;
+    } else {
+        const vms = {};
+        lastData.vms.concat(reply.vms).forEach(function(vm) { vms[vmKey(vm)] = vm; });
+        Object.keys(reply.fields).forEach(function(field) { lastData[field] = reply.fields[field]; });
+        lastData.vms = reply.order.map(function(key) { return vms[key]; });
+    }
+    lastSeq = lastData ? reply.seq : null;
+    lastEpoch = reply.epoch;
+    lastHistory = reply.history || null;
+    return lastData;
+}
+
+function queryDaemon() {
+    // One request line to the daemon socket (see nexus9000v_monitor.py --daemon), one reply line back
+    return new Promise(function(resolve, reject) {
+        const request = lastSeq === null ? { history: HISTORY_MINUTES } : { since: lastSeq, epoch: lastEpoch, history: HISTORY_MINUTES };
+        const channel = cockpit.channel({ payload: 'stream', unix: '/run/nexus9000v-monitor/monitor.sock' });
+        let buffer = '';
+        channel.addEventListener('message', function(event, data) { buffer += data; });
+        channel.addEventListener('close', function(event, options) {
+            if (options.problem) {
+                reject(new Error(options.problem));
+                return;
+            }
+            try {
+                resolve(applyReply(JSON.parse(buffer)));
+            } catch (e) {
+                reject(e);
+            }
+        });
+        channel.send(JSON.stringify(request) + '\n');
+    });
 }
 
 function refreshData() {
     clearError();
     showLoading();
 
+    queryDaemon()
+        .then(function(data) {
+            if (!data) {
+                throw new Error('daemon has not finished its first scan');
+            }
+            hideLoading();
+            updateVMDisplay(data);
+        })
+        .catch(function() {
+            // No daemon (or no scan yet): run the monitor once
+            lastSeq = null;
+            lastHistory = null;
+            executeDirectly();
+        });
+}
+
+function executeDirectly() {
     cockpit.spawn(['/usr/bin/python3', '/usr/local/bin/nexus9000v_monitor.py', '--json'])
         .done(function(data) {
             hideLoading();
@@ -106,7 +251,7 @@ function toggleAutoRefresh() {
         icon.className = 'fa fa-play';
         text.textContent = 'Start Auto-refresh';
     } else {
-        autoRefreshInterval = setInterval(refreshData, 30000);
+        autoRefreshInterval = setInterval(refreshData, 10000);
         isAutoRefresh = true;
         icon.className = 'fa fa-pause';
         text.textContent = 'Stop Auto-refresh';
@@ -20,12 +20,17 @@ IOS-XE numbers NICs flatly in PCI order:
   index i -> GigabitEthernet(i+1) = WAN/ISN link i (isl_bridges[i-1])
 """
 
+import hashlib
+import importlib
+import json
+import os
+import socket
 import subprocess
 import sys
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Tuple
 
 try:
     import yaml
@@ -49,6 +54,38 @@ class GlobalConfig:  # pylint: disable=too-many-instance-attributes
     default_vcpus: int = 4
     default_disk_size: Optional[str] = None  # no resize by default; the 16G image variant carries its disk
     default_interface_type: str = "virtio-net-pci"
+    # virtio-net-pci only: vhost-net kernel datapath and multiqueue (queues per NIC)
+    default_vhost: bool = False  # opt in: true switches existing virtio NICs to the vhost-net datapath
+    default_net_queues: int = 1
+    # "clone" = full cp of the base image; "overlay" = thin qcow2 backed by the read-only base
+    default_disk_mode: str = "clone"
+
+    # Block layer. aio=native needs O_DIRECT (disk_cache none/directsync).
+    disk_cache: str = "writethrough"  # writethrough | writeback | none | directsync
+    disk_aio: str = "threads"  # threads | native | io_uring
+    disk_discard: bool = False  # pass guest TRIM through (discard=unmap) so qcow2 clusters are freed
+    disk_bus: str = "sata"  # "sata" (AHCI) or "virtio" (virtio-blk with a dedicated iothread)
+
+    # Host admission check before launch (config/nexus9000v/capacity.py): "off", "warn" or "enforce"
+    admission: str = "warn"
+    mem_reserve_mb: int = 8192  # host RAM never given to guests
+    max_vcpu_ratio: float = 2.0  # vCPUs per host CPU before a launch is refused
+
+    # QMP (machine-readable monitor) Unix sockets, one <name>.qmp per VM; see qmp.py
+    qmp_socket_dir: str = "/run/n9kv"
+    # Runtime registry of launched VMs, shared with nexus9000v.py (config/nexus9000v/registry.py)
+    registry_file: str = "/run/n9kv/registry.json"
+    # Per-VM logs kept for supervisor.py crash reports: <name>.console.log (serial console,
+    # appended) and <name>.qemu.log (QEMU stderr). None = no logs, console on plain telnet
+    console_log_dir: Optional[str] = None
+
+    def qmp_socket(self, name: str) -> str:
+        """Path of the QMP socket for VM name."""
+        return str(Path(self.qmp_socket_dir) / f"{name}.qmp")
+
+    def vm_log(self, name: str, log: str) -> Optional[Path]:
+        """<console_log_dir>/<name>.<log>.log ("console" or "qemu"), or None if logging is off."""
+        return Path(self.console_log_dir) / f"{name}.{log}.log" if self.console_log_dir else None
 
 
 @dataclass
@@ -60,6 +97,13 @@ class NetworkInterface:
     mac: str
     interface_type: str = "virtio-net-pci"
     tap: Optional[str] = None  # host-side TAP device attached to the OVS bridge
+    vhost: bool = False  # virtio only
+    queues: int = 1  # virtio only; >1 needs a multi_queue TAP
+
+    @property
+    def is_virtio(self) -> bool:
+        """True for virtio-net NIC models."""
+        return self.interface_type.startswith("virtio-net")
 
 
 @dataclass
@@ -85,7 +129,15 @@ class RouterConfig:  # pylint: disable=too-many-instance-attributes
     vcpus: Optional[int] = None
     disk_size: Optional[str] = None
     interface_type: Optional[str] = None
+    interface_types: Dict[str, str] = field(default_factory=dict)  # per-NIC model: "mgmt" or an isl_bridges name -> model
+    vhost: Optional[bool] = None
+    net_queues: Optional[int] = None
     image_name: Optional[str] = None
+    disk_mode: Optional[str] = None  # "clone" or "overlay"
+    disk_cache: Optional[str] = None
+    disk_aio: Optional[str] = None
+    disk_discard: Optional[bool] = None
+    disk_bus: Optional[str] = None
 
     def __post_init__(self):
         """Validate configuration after initialization."""
@@ -93,6 +145,17 @@ class RouterConfig:  # pylint: disable=too-many-instance-attributes
             raise ValueError(f"SID must be a 4-digit value between 1000-9999, got {self.sid}")
         if len(self.neighbors) != len(self.isl_bridges):
             raise ValueError("Number of neighbors must match number of ISL bridges")
+        if self.disk_mode is not None and self.disk_mode not in DiskManager.DISK_MODES:
+            raise ValueError(f"disk_mode must be one of {DiskManager.DISK_MODES}, got {self.disk_mode!r}")
+        unknown = set(self.interface_types) - {"mgmt", *self.isl_bridges}
+        if unknown:
+            raise ValueError(f"interface_types keys must be 'mgmt' or one of isl_bridges, got {sorted(unknown)}")
+        if self.net_queues is not None and self.net_queues < 1:
+            raise ValueError(f"net_queues must be >= 1, got {self.net_queues}")
+        for option, choices in C8000vQEMUBuilder.OPTION_CHOICES.items():
+            value = getattr(self, option)
+            if value is not None and value not in choices:
+                raise ValueError(f"{option} must be one of {choices}, got {value!r}")
 
     @property
     def telnet_port(self) -> int:
@@ -105,6 +168,18 @@ class RouterConfig:  # pylint: disable=too-many-instance-attributes
         return 20000 + self.sid
 
 
+def console_args(telnet_port: int, log: Optional[Path]) -> List[str]:
+    """QEMU args for the serial console on telnet localhost:telnet_port, also appended to log if given."""
+    if log is None:
+        return ["-serial", f"telnet:localhost:{telnet_port},server=on,wait=off"]
+    return [
+        "-chardev",
+        f"socket,id=console0,host=localhost,port={telnet_port},telnet=on,server=on,wait=off,logfile={log},logappend=on",
+        "-serial",
+        "chardev:console0",
+    ]
+
+
 class MACAddressGenerator(Protocol):
     """Protocol for MAC address generation strategies."""
 
@@ -168,6 +243,13 @@ class QEMUCommandBuilder(ABC):
 class C8000vQEMUBuilder(QEMUCommandBuilder):
     """QEMU command builder for Catalyst 8000V routers."""
 
+    # Allowed values of options settable both globally and per router
+    OPTION_CHOICES = {
+        "disk_cache": ("writethrough", "writeback", "none", "directsync"),
+        "disk_aio": ("threads", "native", "io_uring"),
+        "disk_bus": ("sata", "virtio"),
+    }
+
     def validate_files(self, config: RouterConfig, global_config: GlobalConfig) -> List[str]:
         """Return missing-file issues. The image is EFI, so OVMF is required."""
         issues = []
@@ -224,13 +306,33 @@ class C8000vQEMUBuilder(QEMUCommandBuilder):
         cdrom_image = Path(global_config.cdrom_path) / f"{config.name}.iso"
         vm_disk = Path(global_config.cdrom_path) / f"{config.name}.qcow2"
 
+        cache = config.disk_cache or global_config.disk_cache
+        aio = config.disk_aio or global_config.disk_aio
+        if aio == "native" and cache not in ("none", "directsync"):
+            raise ValueError(f"{config.name}: disk_aio native requires disk_cache none or directsync (O_DIRECT), got {cache}")
+        options = f"cache={cache},aio={aio}"
+        discard = config.disk_discard if config.disk_discard is not None else global_config.disk_discard
+        if discard:
+            options += ",discard=unmap,detect-zeroes=unmap"
+
+        if (config.disk_bus or global_config.disk_bus) == "virtio":
+            return [
+                "-drive",
+                f"file={cdrom_image},media=cdrom",
+                "-drive",
+                f"file={vm_disk},if=none,id=drive-virtio-disk0,format=qcow2,{options}",
+                "-object",
+                "iothread,id=iothread-disk0",
+                "-device",
+                "virtio-blk-pci,drive=drive-virtio-disk0,iothread=iothread-disk0,bootindex=1",
+            ]
         return [
             "-device",
             "ahci,id=ahci0,bus=pcie.0",
             "-drive",
             f"file={cdrom_image},media=cdrom",
             "-drive",
-            f"file={vm_disk},if=none,id=drive-sata-disk0,format=qcow2,cache=writethrough",
+            f"file={vm_disk},if=none,id=drive-sata-disk0,format=qcow2,{options}",
             "-device",
             "ide-hd,bus=ahci0.0,drive=drive-sata-disk0,bootindex=1",
         ]
@@ -239,18 +341,20 @@ class C8000vQEMUBuilder(QEMUCommandBuilder):
         """Build network interface arguments.
 
         TAPs are pre-created and attached to OVS by OVSPortManager, so QEMU
-        must NOT manage them: script=no / downscript=no.
+        must NOT manage them: script=no / downscript=no. virtio NICs may add
+        vhost=on and queues=N with one MSI-X vector pair per queue.
         """
         args = []
         for iface in interfaces:
-            args.extend(
-                [
-                    "-netdev",
-                    f"tap,id={iface.name},ifname={iface.tap},script=no,downscript=no",
-                    "-device",
-                    f"{iface.interface_type},netdev={iface.name},mac={iface.mac}",
-                ]
-            )
+            netdev = f"tap,id={iface.name},ifname={iface.tap},script=no,downscript=no"
+            device = f"{iface.interface_type},netdev={iface.name},mac={iface.mac}"
+            if iface.is_virtio:
+                if iface.vhost:
+                    netdev += ",vhost=on"
+                if iface.queues > 1:
+                    netdev += f",queues={iface.queues}"
+                    device += f",mq=on,vectors={2 * iface.queues + 2}"
+            args.extend(["-netdev", netdev, "-device", device])
         return args
 
     def _build_misc_args(self, config: RouterConfig, global_config: GlobalConfig) -> List[str]:
@@ -261,10 +365,11 @@ class C8000vQEMUBuilder(QEMUCommandBuilder):
             "-nographic",
             "-bios",
             global_config.bios_file,
-            "-serial",
-            f"telnet:localhost:{config.telnet_port},server=on,wait=off",
+            *console_args(config.telnet_port, global_config.vm_log(config.name, "console")),
             "-monitor",
             f"telnet:localhost:{config.monitor_port},server,nowait",
+            "-qmp",
+            f"unix:{global_config.qmp_socket(config.name)},server=on,wait=off",
             "-name",
             config.name,
         ]
@@ -333,42 +438,122 @@ class OVSPortManager:
         """
         cls._run(["ovs-vsctl", "set", "bridge", bridge, "other-config:forward-bpdu=true"])
 
+    @classmethod
+    def list_bridges(cls) -> set:
+        """Names of all OVS bridges, in one ovs-vsctl call."""
+        return set(cls._run(["ovs-vsctl", "list-br"]).stdout.split())
+
+    @staticmethod
+    def _tap_exists(tap: str) -> bool:
+        try:
+            socket.if_nametoindex(tap)  # ioctl in the caller's netns; no fork
+            return True
+        except OSError:
+            return False
+
+    @classmethod
+    def _ip_batch(cls, lines: List[str]) -> None:
+        """Apply many ip(8) commands in a single process (ip -batch)."""
+        if not lines:
+            return
+        result = subprocess.run(["ip", "-batch", "-"], input="\n".join(lines) + "\n", capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(f"ip -batch failed: {result.stderr.strip()}")
+
+    @classmethod
+    def setup_ports(cls, ifaces: List[NetworkInterface]) -> None:
+        """Create, attach and bring up every iface.tap with one ip -batch and one OVS transaction.
+
+        Replaces ~9 forks per interface (br-exists, teardown, tuntap, link set x2,
+        add-port, mtu_request, forward-bpdu) with three for the whole set:
+        ovs-vsctl list-br, ip -batch, and a single chained ovs-vsctl transaction
+        in which forward-bpdu is asserted once per bridge. Idempotent: stale
+        taps/ports of the same name are replaced.
+        """
+        ports: List[Tuple[str, str]] = []  # (tap, bridge)
+        for iface in ifaces:
+            if not iface.tap:
+                raise ValueError(f"Interface '{iface.name}' has no TAP name assigned")
+            ports.append((iface.tap, iface.bridge))
+        if not ports:
+            return
+        bridges = sorted({bridge for _, bridge in ports})
+        existing = cls.list_bridges()
+        missing = [bridge for bridge in bridges if bridge not in existing]
+        if missing:
+            raise RuntimeError(
+                f"OVS bridge(s) not found: {', '.join(missing)}. "
+                f"Create them first via netplan / bridges_config_ovs.sh."
+            )
+
+        multi_queue = {iface.tap for iface in ifaces if iface.queues > 1}
+        lines = []
+        for tap, _ in ports:
+            if cls._tap_exists(tap):  # clear stale state from a prior run
+                lines.append(f"link del dev {tap}")
+            lines.append(f"tuntap add dev {tap} mode tap" + (" multi_queue" if tap in multi_queue else ""))
+            lines.append(f"link set dev {tap} mtu {cls.MTU} up")
+        cls._ip_batch(lines)
+
+        cmd = ["ovs-vsctl"]
+        for tap, bridge in ports:
+            cmd += ["--", "--if-exists", "del-port", tap]
+            cmd += ["--", "add-port", bridge, tap]
+            cmd += ["--", "set", "interface", tap, f"mtu_request={cls.MTU}"]
+        # Forward LACP/STP/LLDP/CDP (reserved multicast) once per bridge, not per port.
+        for bridge in bridges:
+            cmd += ["--", "set", "bridge", bridge, "other-config:forward-bpdu=true"]
+        result = cls._run(cmd, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(f"ovs-vsctl transaction failed: {result.stderr.strip()}")
+
+    @classmethod
+    def teardown_ports(cls, ifaces: List[NetworkInterface]) -> None:
+        """Remove every iface.tap from OVS and the kernel in one transaction + one ip -batch."""
+        taps = [iface.tap for iface in ifaces if iface.tap]
+        if not taps:
+            return
+        cmd = ["ovs-vsctl"]
+        for tap in taps:
+            cmd += ["--", "--if-exists", "del-port", tap]
+        cls._run(cmd, check=False)
+        cls._ip_batch([f"link del dev {tap}" for tap in taps if cls._tap_exists(tap)])
+
     @classmethod
     def setup_port(cls, iface: NetworkInterface) -> None:
         """Create iface.tap, attach to iface.bridge on OVS, bring it up.
 
         Idempotent: any stale tap/port of the same name is cleared first.
         """
-        if not iface.tap:
-            raise ValueError(f"Interface '{iface.name}' has no TAP name assigned")
-        if not cls.bridge_exists(iface.bridge):
-            raise RuntimeError(
-                f"OVS bridge '{iface.bridge}' not found. "
-                f"Create it first via netplan / bridges_config_ovs.sh."
-            )
-        cls.teardown_port(iface)  # clear stale state from a prior run
-        cls._run(["ip", "tuntap", "add", "dev", iface.tap, "mode", "tap"])
-        cls._run(["ip", "link", "set", "dev", iface.tap, "mtu", str(cls.MTU)])
-        cls._run(["ovs-vsctl", "--may-exist", "add-port", iface.bridge, iface.tap])
-        cls._run(["ovs-vsctl", "set", "int", iface.tap, f"mtu_request={cls.MTU}"])
-        cls.ensure_forward_bpdu(iface.bridge)
-        cls._run(["ip", "link", "set", "dev", iface.tap, "up"])
+        cls.setup_ports([iface])
 
     @classmethod
     def teardown_port(cls, iface: NetworkInterface) -> None:
         """Remove iface.tap from OVS and delete it. Safe if already absent."""
-        if not iface.tap:
-            return
-        cls._run(["ovs-vsctl", "--if-exists", "del-port", iface.bridge, iface.tap], check=False)
-        cls._run(["ip", "link", "del", "dev", iface.tap], check=False)
+        cls.teardown_ports([iface])
+
 
+class DiskManager:
+    """Manages VM disk operations.
+
+    clone copies the base image; overlay creates a thin qcow2 backed by it and
+    guards the base as config/nexus9000v/nexus9000v.py does (write bits
+    dropped, size/mtime recorded in a ``<disk>.backing.json`` sidecar). Routers
+    have no snapshot restore, so the disk is rebuilt on every launch and an
+    existing overlay is never reused; nothing here re-checks the sidecar.
+    """
 
-class DiskManager:  # pylint: disable=too-few-public-methods
-    """Manages VM disk operations."""
+    DISK_MODES = ("clone", "overlay")
 
     @staticmethod
-    def create_vm_disk(source_image: Path, dest_disk: Path, size: Optional[str]) -> None:
+    def create_vm_disk(source_image: Path, dest_disk: Path, size: Optional[str], mode: str = "clone") -> None:
         """Create the per-VM disk from the base image; resize only if size is set."""
+        if mode not in DiskManager.DISK_MODES:
+            raise ValueError(f"Unknown disk mode {mode!r}; expected one of {DiskManager.DISK_MODES}")
+        if mode == "overlay":
+            DiskManager.create_overlay_disk(source_image, dest_disk, size)
+            return
+        DiskManager._sidecar(dest_disk).unlink(missing_ok=True)  # no longer an overlay
         try:
             subprocess.run(["cp", str(source_image), str(dest_disk)], check=True)
             if size:
@@ -376,6 +561,41 @@ class DiskManager:  # pylint: disable=too-few-public-methods
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Failed to create VM disk: {e}") from e
 
+    @staticmethod
+    def create_overlay_disk(backing_image: Path, dest_disk: Path, size: Optional[str]) -> None:
+        """Create dest_disk as a qcow2 overlay on backing_image (never written)."""
+        backing_image = backing_image.resolve()
+        DiskManager.protect_backing_image(backing_image)
+        before = DiskManager._fingerprint(backing_image)
+
+        cmd = ["qemu-img", "create", "-f", "qcow2", "-F", "qcow2", "-b", str(backing_image), str(dest_disk)]
+        if size:
+            cmd.append(size)
+        try:
+            subprocess.run(cmd, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to create overlay disk: {e.stderr.strip() or e}") from e
+
+        if DiskManager._fingerprint(backing_image) != before:
+            raise RuntimeError(f"Backing image {backing_image} changed while creating {dest_disk}")
+        DiskManager._sidecar(dest_disk).write_text(json.dumps({"backing": str(backing_image), **before}), encoding="utf-8")
+
+    @staticmethod
+    def protect_backing_image(image: Path) -> None:
+        """Drop write permission on a backing image so stray tools fail loudly."""
+        mode = image.stat().st_mode
+        if mode & 0o222:
+            image.chmod(mode & ~0o222)
+
+    @staticmethod
+    def _fingerprint(image: Path) -> Dict[str, int]:
+        st = image.stat()
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    @staticmethod
+    def _sidecar(disk: Path) -> Path:
+        return disk.with_name(disk.name + ".backing.json")
+
 
 class ConfigLoader:
     """Handles loading and merging of configuration files."""
@@ -386,15 +606,14 @@ class ConfigLoader:
         global_config = GlobalConfig()
 
         if config_path and config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-                for key, value in data.items():
-                    if hasattr(global_config, key):
-                        # base_mac can be parsed as a time by YAML; force str
-                        if key == "base_mac" and not isinstance(value, str):
-                            setattr(global_config, key, str(value))
-                        else:
-                            setattr(global_config, key, value)
+            data = load_yaml(config_path) or {}
+            for key, value in data.items():
+                if hasattr(global_config, key):
+                    # base_mac can be parsed as a time by YAML; force str
+                    if key == "base_mac" and not isinstance(value, str):
+                        setattr(global_config, key, str(value))
+                    else:
+                        setattr(global_config, key, value)
 
         return global_config
 
@@ -404,10 +623,27 @@ class ConfigLoader:
         if not config_path.exists():
             raise FileNotFoundError(f"Router config file not found: {config_path}")
 
-        with open(config_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        return RouterConfig(**load_yaml(config_path))
 
-        return RouterConfig(**data)
+
+def shared_module(name: str) -> Any:
+    """Import a helper shared with the Nexus launcher (config/nexus9000v/<name>.py), or None if absent."""
+    sys.path.append(str(Path(__file__).resolve().parent.parent / "nexus9000v"))
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+    finally:
+        sys.path.pop()
+
+
+def load_yaml(path: Path) -> Any:
+    """Parse a YAML file through the shared parse cache (config/nexus9000v/fabric.py), or directly if it is absent."""
+    fabric = shared_module("fabric")
+    if fabric is not None:
+        return fabric.load_yaml(path)
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
 
 
 class RouterVMManager:
@@ -422,8 +658,33 @@ class RouterVMManager:
         self.global_config = global_config
         self.mac_generator = mac_generator or StandardMACGenerator()
         self.qemu_builder = qemu_builder or C8000vQEMUBuilder()
+        for option, choices in C8000vQEMUBuilder.OPTION_CHOICES.items():
+            if getattr(global_config, option) not in choices:
+                raise ValueError(f"{option} must be one of {choices}, got {getattr(global_config, option)!r}")
+        if global_config.admission not in ("off", "warn", "enforce"):
+            raise ValueError(f"admission must be 'off', 'warn' or 'enforce', got {global_config.admission!r}")
         self.disk_manager = DiskManager()
 
+    def admit(self, config: RouterConfig, dry_run: bool = False) -> None:
+        """Check the host can hold this router on top of what is already running.
+
+        Uses the shared planner in config/nexus9000v/capacity.py when that
+        directory is present; this launcher still runs without it.
+        """
+        if self.global_config.admission == "off":
+            return
+        capacity = shared_module("capacity")
+        if capacity is None:
+            print("Warning: capacity.py not found next to this launcher; skipping the capacity check")
+            return
+        host = capacity.HostCapacity.probe(self.global_config.cdrom_path, exclude=[config.name])
+        planner = capacity.CapacityPlanner(host, self.global_config.mem_reserve_mb, self.global_config.max_vcpu_ratio)
+        report = planner.check([capacity.vm_demand("c8000v", config, self.global_config)])
+        if report.findings:
+            print(report.format() + "\n")
+        if report.verdict == "refuse" and self.global_config.admission == "enforce" and not dry_run:
+            raise RuntimeError("Host capacity exceeded; set admission: warn to launch anyway")
+
     def create_router(self, config: RouterConfig, dry_run: bool = False, debug: bool = False) -> Dict[str, Any]:
         """Create and start a C8000V router VM."""
 
@@ -453,9 +714,13 @@ class RouterVMManager:
             else:
                 raise FileNotFoundError("; ".join(file_issues))
 
+        self.admit(config, dry_run=dry_run)
         interfaces = self._generate_interfaces(config)
 
         if not dry_run:
+            Path(self.global_config.qmp_socket_dir).mkdir(parents=True, exist_ok=True)
+            if self.global_config.console_log_dir:
+                Path(self.global_config.console_log_dir).mkdir(parents=True, exist_ok=True)
             self._prepare_vm_disk(config)
             self._setup_network(interfaces)
 
@@ -470,11 +735,28 @@ class RouterVMManager:
             }
 
         process = self._start_vm(qemu_cmd, config, debug=debug)
+        registry = shared_module("registry")
+        if registry is not None:
+            registry.VMRegistry(self.global_config.registry_file).record(
+                config.name,
+                process.pid,
+                kind="c8000v",
+                telnet_port=config.telnet_port,
+                monitor_port=config.monitor_port,
+                qmp_socket=self.global_config.qmp_socket(config.name),
+                taps=[iface.tap for iface in interfaces],
+                disks=[str(Path(self.global_config.cdrom_path) / f"{config.name}.qcow2")],
+                config_hash=hashlib.sha256(json.dumps(asdict(config), sort_keys=True).encode()).hexdigest()[:16],
+                config=asdict(config),
+                console_log=str(self.global_config.vm_log(config.name, "console") or ""),
+                qemu_log=str(self.global_config.vm_log(config.name, "qemu") or ""),
+            )
 
         return {
             "process_id": process.pid,
             "telnet_port": config.telnet_port,
             "monitor_port": config.monitor_port,
+            "qmp_socket": self.global_config.qmp_socket(config.name),
             "interfaces": interfaces,
             "config": config,
         }
@@ -501,7 +783,7 @@ class RouterVMManager:
                 name="MGMT",
                 bridge=config.mgmt_bridge,
                 mac=mgmt_mac,
-                interface_type=interface_type,
+                interface_type=config.interface_types.get("mgmt", interface_type),
                 tap=self._tap_name(config.sid, 0),
             )
         )
@@ -513,22 +795,25 @@ class RouterVMManager:
                     name=f"WAN_{i}",
                     bridge=bridge,
                     mac=eth_mac,
-                    interface_type=interface_type,
+                    interface_type=config.interface_types.get(bridge, interface_type),
                     tap=self._tap_name(config.sid, i),
                 )
             )
 
+        vhost = config.vhost if config.vhost is not None else self.global_config.default_vhost
+        queues = config.net_queues or self.global_config.default_net_queues
+        for iface in interfaces:
+            if iface.is_virtio:
+                iface.vhost, iface.queues = vhost, queues
         return interfaces
 
     def _setup_network(self, interfaces: List[NetworkInterface]) -> None:
-        """Create TAPs and attach them to their OVS bridges."""
-        for iface in interfaces:
-            OVSPortManager.setup_port(iface)
+        """Create TAPs and attach them to their OVS bridges (one batched transaction)."""
+        OVSPortManager.setup_ports(interfaces)
 
     def teardown_router(self, config: RouterConfig) -> None:
         """Remove all TAP interfaces for a router (run after stopping its VM)."""
-        for iface in self._generate_interfaces(config):
-            OVSPortManager.teardown_port(iface)
+        OVSPortManager.teardown_ports(self._generate_interfaces(config))
         print(f"Removed TAP interfaces for {config.name}")
 
     def _prepare_vm_disk(self, config: RouterConfig) -> None:
@@ -537,9 +822,10 @@ class RouterVMManager:
         source_image = Path(self.global_config.image_path) / image_name
         dest_disk = Path(self.global_config.cdrom_path) / f"{config.name}.qcow2"
         disk_size = config.disk_size or self.global_config.default_disk_size
+        disk_mode = config.disk_mode or self.global_config.default_disk_mode
 
         dest_disk.parent.mkdir(parents=True, exist_ok=True)
-        self.disk_manager.create_vm_disk(source_image, dest_disk, disk_size)
+        self.disk_manager.create_vm_disk(source_image, dest_disk, disk_size, mode=disk_mode)
 
     def _start_vm(self, qemu_cmd: List[str], config: RouterConfig, debug: bool = False) -> subprocess.Popen[Any]:
         """Start the VM process."""
@@ -563,7 +849,9 @@ class RouterVMManager:
                     raise RuntimeError(f"QEMU process failed with exit code: {process.returncode}")
 
             else:
-                process = subprocess.Popen(qemu_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # pylint: disable=consider-using-with
+                qemu_log = self.global_config.vm_log(config.name, "qemu")
+                with open(qemu_log, "ab") if qemu_log else open(os.devnull, "wb") as stderr:
+                    process = subprocess.Popen(qemu_cmd, stdout=subprocess.DEVNULL, stderr=stderr)  # pylint: disable=consider-using-with
 
             print(f"{config.name} instance created.")
             print(f"Role: {config.role}")
@@ -575,6 +863,7 @@ class RouterVMManager:
 
             print(f"\nConsole access: telnet localhost {config.telnet_port}")
             print(f"Monitor access: telnet localhost {config.monitor_port}")
+            print(f"QMP socket: {self.global_config.qmp_socket(config.name)}")
             print(f"Process ID: {process.pid}")
 
             if debug:
@@ -620,6 +909,7 @@ def create_sample_configs(force: bool = False):
         "default_ram": 8192,
         "default_vcpus": 4,
         "default_interface_type": "virtio-net-pci",
+        "default_disk_mode": "clone",  # "overlay" is opt-in: it makes the base image read-only
     }
     _write_sample(out_dir / "global_config.yaml", global_config, force)
 
@@ -697,9 +987,11 @@ def main():
             print("\nInterfaces:")
             for i, iface in enumerate(result["interfaces"]):
                 print(f"  GigabitEthernet{i + 1} ({iface.name}): {iface.bridge} -> {iface.mac} (tap: {iface.tap})")
+            print(f"\nDisk mode: {router_config.disk_mode or global_config.default_disk_mode}")
             print("\nPorts:")
             print(f"  Telnet: {router_config.telnet_port}")
             print(f"  Monitor: {router_config.monitor_port}")
+            print(f"  QMP: {global_config.qmp_socket(router_config.name)}")
 
     except Exception as e:  # pylint: disable=broad-exception-caught
         print(f"Error: {e}")
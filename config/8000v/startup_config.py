@@ -31,9 +31,16 @@ TEMPLATE = "iosxe_startup_config.j2"
 
 
 def load_yaml(path: Path) -> dict:
-    """Load one YAML file."""
-    with open(path, encoding="utf-8") as handle:
-        return yaml.safe_load(handle) or {}
+    """Load one YAML file, through the shared parse cache in config/nexus9000v when present."""
+    sys.path.append(str(HERE.parent / "nexus9000v"))
+    try:
+        from fabric import load_yaml as cached_load  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        with open(path, encoding="utf-8") as handle:
+            return yaml.safe_load(handle) or {}
+    finally:
+        sys.path.pop()
+    return cached_load(path) or {}
 
 
 def derive_interfaces(router: dict) -> list:
@@ -27,6 +27,18 @@ and locally-set variables to define the testbed configuration.
 It first tries to read the variables from the environment,
 and if not set, it uses the defaults defined in this script.
 
+### Switches
+
+Per-switch variables are derived from the switch YAML through the shared lab
+model (`config/nexus9000v/topology.py`), one set per `S*_*.yaml`:
+
+- `<NAME>_HOSTNAME`: the switch name
+- `<NAME>_IP4`: the management address (mgmt_ip without the prefix length)
+- `<NAME>_INTERFACE_<n>`: `Ethernet1/<n>` for each of its isl_bridges
+
+Each can still be overridden by an environment variable of the same name.
+The `nxos` group lists every switch.
+
 ### Naming convention
 
 Hostnames and env var prefixes follow `S<site>_<role><idx>` (per-site
@@ -35,7 +47,13 @@ border gateway in SITE4 is `S4_BG1`.
 
 """
 import json
+import sys
 from os import environ
+from pathlib import Path
+
+SWITCH_DIR = Path(__file__).resolve().parents[1] / "nexus9000v"
+sys.path.append(str(SWITCH_DIR))
+from topology import load_topology  # noqa: E402  pylint: disable=wrong-import-position
 
 # Try to populate vars from the environment, else use defaults.
 
@@ -44,29 +62,10 @@ from os import environ
 ND_IP4 = environ.get("ND_IP4", "192.168.7.7")
 ND_IP4_2 = environ.get("ND_IP4_2", "192.168.7.8")
 
-# SITE1 / SITE2
-S1_BG1_IP4 = environ.get("S1_BG1_IP4", "192.168.12.131")
-S2_BG1_IP4 = environ.get("S2_BG1_IP4", "192.168.12.132")
-S1_SP1_IP4 = environ.get("S1_SP1_IP4", "192.168.12.141")
-S2_SP1_IP4 = environ.get("S2_SP1_IP4", "192.168.12.142")
-S1_LE1_IP4 = environ.get("S1_LE1_IP4", "192.168.12.151")
-S1_LE2_IP4 = environ.get("S1_LE2_IP4", "192.168.12.152")
-S1_TOR1_IP4 = environ.get("S1_TOR1_IP4", "192.168.12.161")
-S1_LE3_IP4 = environ.get("S1_LE3_IP4", "192.168.12.154")
-S1_LE4_IP4 = environ.get("S1_LE4_IP4", "192.168.12.155")
 S1_LE1_IP4_INTERFACE_2 = environ.get("S1_LE1_IP4_INTERFACE_2", "192.168.0.1")
-S2_LE1_IP4 = environ.get("S2_LE1_IP4", "192.168.12.153")
 S2_LE1_IP4_INTERFACE_2 = environ.get("S2_LE1_IP4_INTERFACE_2", "192.168.0.2")
 
 # SITE3 / SITE4
-S3_BG1_IP4 = environ.get("S3_BG1_IP4", "192.168.14.131")
-S4_BG1_IP4 = environ.get("S4_BG1_IP4", "192.168.14.132")
-S3_SP1_IP4 = environ.get("S3_SP1_IP4", "192.168.14.141")
-S4_SP1_IP4 = environ.get("S4_SP1_IP4", "192.168.14.142")
-S3_LE1_IP4 = environ.get("S3_LE1_IP4", "192.168.14.151")
-S4_LE1_IP4 = environ.get("S4_LE1_IP4", "192.168.14.152")
-S4_LE2_IP4 = environ.get("S4_LE2_IP4", "192.168.14.153")
-S4_LE3_IP4 = environ.get("S4_LE3_IP4", "192.168.14.154")
 S3_LE1_IP4_INTERFACE_2 = environ.get("S3_LE1_IP4_INTERFACE_2", "192.168.0.3")
 S4_LE1_IP4_INTERFACE_2 = environ.get("S4_LE1_IP4_INTERFACE_2", "192.168.0.4")
 
@@ -87,114 +86,22 @@ ND_USERNAME = environ.get("ND_USERNAME", "admin")
 NXOS_PASSWORD = environ.get("NXOS_PASSWORD", "SuperSecretPassword")
 NXOS_USERNAME = environ.get("NXOS_USERNAME", "admin")
 
-# Switch hostnames
+# Switch hostnames, management IPs and interfaces, from the switch YAML.
 # BG = Border Gateway
 # SP = Spine
 # LE = Leaf
-
-# SITE1 / SITE2
-S1_BG1_HOSTNAME = environ.get("S1_BG1_HOSTNAME", "S1_BG1")
-S2_BG1_HOSTNAME = environ.get("S2_BG1_HOSTNAME", "S2_BG1")
-S1_SP1_HOSTNAME = environ.get("S1_SP1_HOSTNAME", "S1_SP1")
-S2_SP1_HOSTNAME = environ.get("S2_SP1_HOSTNAME", "S2_SP1")
-S1_LE1_HOSTNAME = environ.get("S1_LE1_HOSTNAME", "S1_LE1")
-S2_LE1_HOSTNAME = environ.get("S2_LE1_HOSTNAME", "S2_LE1")
-S1_LE2_HOSTNAME = environ.get("S1_LE2_HOSTNAME", "S1_LE2")
-S1_TOR1_HOSTNAME = environ.get("S1_TOR1_HOSTNAME", "S1_TOR1")
-S1_LE3_HOSTNAME = environ.get("S1_LE3_HOSTNAME", "S1_LE3")
-S1_LE4_HOSTNAME = environ.get("S1_LE4_HOSTNAME", "S1_LE4")
-
-# SITE3 / SITE4
-S3_BG1_HOSTNAME = environ.get("S3_BG1_HOSTNAME", "S3_BG1")
-S4_BG1_HOSTNAME = environ.get("S4_BG1_HOSTNAME", "S4_BG1")
-S3_SP1_HOSTNAME = environ.get("S3_SP1_HOSTNAME", "S3_SP1")
-S4_SP1_HOSTNAME = environ.get("S4_SP1_HOSTNAME", "S4_SP1")
-S3_LE1_HOSTNAME = environ.get("S3_LE1_HOSTNAME", "S3_LE1")
-S4_LE1_HOSTNAME = environ.get("S4_LE1_HOSTNAME", "S4_LE1")
-S4_LE2_HOSTNAME = environ.get("S4_LE2_HOSTNAME", "S4_LE2")
-S4_LE3_HOSTNAME = environ.get("S4_LE3_HOSTNAME", "S4_LE3")
-
-# Links
-# Source                  Destination             Bridge
-# S1_BG1_INTERFACE_2      S1_SP1_INTERFACE_1      BR_S1_BG1_SP1_1
-# S2_BG1_INTERFACE_2      S2_SP1_INTERFACE_1      BR_S2_BG1_SP1_1
-# S1_SP1_INTERFACE_2      S1_LE1_INTERFACE_1      BR_S1_SP1_LE1_1
-# S2_SP1_INTERFACE_2      S2_LE1_INTERFACE_1      BR_S2_SP1_LE1_1
-# S1_TOR1_INTERFACE_3     S1_H1_INTERFACE_1       BR_S1_T1_H1_1
-# S2_LE1_INTERFACE_2      S2_H1_INTERFACE_1       BR_S2_LE1_H1_1
-# S1_SP1_INTERFACE_4      S1_LE3_INTERFACE_1      BR_S1_SP1_LE3_1
-# S1_SP1_INTERFACE_5      S1_LE4_INTERFACE_1      BR_S1_SP1_LE4_1
-# S1_LE3_INTERFACE_2      S1_LE4_INTERFACE_2      BR_S1_LE3_LE4_1
-
-# Base set of interfaces
-# SITE1 / SITE2
-S1_BG1_INTERFACE_1 = environ.get("S1_BG1_INTERFACE_1", "Ethernet1/1")
-S1_BG1_INTERFACE_2 = environ.get("S1_BG1_INTERFACE_2", "Ethernet1/2")
-
-S2_BG1_INTERFACE_1 = environ.get("S2_BG1_INTERFACE_1", "Ethernet1/1")
-S2_BG1_INTERFACE_2 = environ.get("S2_BG1_INTERFACE_2", "Ethernet1/2")
-
-S1_SP1_INTERFACE_1 = environ.get("S1_SP1_INTERFACE_1", "Ethernet1/1")
-S1_SP1_INTERFACE_2 = environ.get("S1_SP1_INTERFACE_2", "Ethernet1/2")
-
-S2_SP1_INTERFACE_1 = environ.get("S2_SP1_INTERFACE_1", "Ethernet1/1")
-S2_SP1_INTERFACE_2 = environ.get("S2_SP1_INTERFACE_2", "Ethernet1/2")
-
-S1_LE1_INTERFACE_1 = environ.get("S1_LE1_INTERFACE_1", "Ethernet1/1")
-S1_LE1_INTERFACE_2 = environ.get("S1_LE1_INTERFACE_2", "Ethernet1/2")
-
-S2_LE1_INTERFACE_1 = environ.get("S2_LE1_INTERFACE_1", "Ethernet1/1")
-S2_LE1_INTERFACE_2 = environ.get("S2_LE1_INTERFACE_2", "Ethernet1/2")
-
-# S1_LE2 has 3 ISLs (spine, VPC peer-link to S1_LE1, downlink to S1_TOR1).
-# S1_LE1 grows to 4 ISLs (spine, host, VPC peer-link, downlink to S1_TOR1).
-S1_LE1_INTERFACE_3 = environ.get("S1_LE1_INTERFACE_3", "Ethernet1/3")
-S1_LE1_INTERFACE_4 = environ.get("S1_LE1_INTERFACE_4", "Ethernet1/4")
-S1_LE2_INTERFACE_1 = environ.get("S1_LE2_INTERFACE_1", "Ethernet1/1")
-S1_LE2_INTERFACE_2 = environ.get("S1_LE2_INTERFACE_2", "Ethernet1/2")
-S1_LE2_INTERFACE_3 = environ.get("S1_LE2_INTERFACE_3", "Ethernet1/3")
-S1_TOR1_INTERFACE_1 = environ.get("S1_TOR1_INTERFACE_1", "Ethernet1/1")
-S1_TOR1_INTERFACE_2 = environ.get("S1_TOR1_INTERFACE_2", "Ethernet1/2")
-S1_TOR1_INTERFACE_3 = environ.get("S1_TOR1_INTERFACE_3", "Ethernet1/3")
-S1_SP1_INTERFACE_3 = environ.get("S1_SP1_INTERFACE_3", "Ethernet1/3")
-S1_SP1_INTERFACE_4 = environ.get("S1_SP1_INTERFACE_4", "Ethernet1/4")
-S1_SP1_INTERFACE_5 = environ.get("S1_SP1_INTERFACE_5", "Ethernet1/5")
-
-# S1_LE3/S1_LE4 are a second VPC pair (spine uplink + peer-link).
-S1_LE3_INTERFACE_1 = environ.get("S1_LE3_INTERFACE_1", "Ethernet1/1")
-S1_LE3_INTERFACE_2 = environ.get("S1_LE3_INTERFACE_2", "Ethernet1/2")
-S1_LE4_INTERFACE_1 = environ.get("S1_LE4_INTERFACE_1", "Ethernet1/1")
-S1_LE4_INTERFACE_2 = environ.get("S1_LE4_INTERFACE_2", "Ethernet1/2")
-
-# SITE3 / SITE4
-S3_BG1_INTERFACE_1 = environ.get("S3_BG1_INTERFACE_1", "Ethernet1/1")
-S3_BG1_INTERFACE_2 = environ.get("S3_BG1_INTERFACE_2", "Ethernet1/2")
-
-S4_BG1_INTERFACE_1 = environ.get("S4_BG1_INTERFACE_1", "Ethernet1/1")
-S4_BG1_INTERFACE_2 = environ.get("S4_BG1_INTERFACE_2", "Ethernet1/2")
-
-S3_SP1_INTERFACE_1 = environ.get("S3_SP1_INTERFACE_1", "Ethernet1/1")
-S3_SP1_INTERFACE_2 = environ.get("S3_SP1_INTERFACE_2", "Ethernet1/2")
-
-S4_SP1_INTERFACE_1 = environ.get("S4_SP1_INTERFACE_1", "Ethernet1/1")
-S4_SP1_INTERFACE_2 = environ.get("S4_SP1_INTERFACE_2", "Ethernet1/2")
-S4_SP1_INTERFACE_3 = environ.get("S4_SP1_INTERFACE_3", "Ethernet1/3")
-S4_SP1_INTERFACE_4 = environ.get("S4_SP1_INTERFACE_4", "Ethernet1/4")
-
-S3_LE1_INTERFACE_1 = environ.get("S3_LE1_INTERFACE_1", "Ethernet1/1")
-S3_LE1_INTERFACE_2 = environ.get("S3_LE1_INTERFACE_2", "Ethernet1/2")
-
-S4_LE1_INTERFACE_1 = environ.get("S4_LE1_INTERFACE_1", "Ethernet1/1")
-S4_LE1_INTERFACE_2 = environ.get("S4_LE1_INTERFACE_2", "Ethernet1/2")
-
-S4_LE2_INTERFACE_1 = environ.get("S4_LE2_INTERFACE_1", "Ethernet1/1")
-S4_LE2_INTERFACE_2 = environ.get("S4_LE2_INTERFACE_2", "Ethernet1/2")
-
-S4_LE3_INTERFACE_1 = environ.get("S4_LE3_INTERFACE_1", "Ethernet1/1")
-S4_LE3_INTERFACE_2 = environ.get("S4_LE3_INTERFACE_2", "Ethernet1/2")
+LAB = load_topology(SWITCH_DIR)
+SWITCHES = LAB.of_kind("nexus9000v")
+SWITCH_VARS: dict = {}
+for switch in SWITCHES:
+    SWITCH_VARS[f"{switch.name}_HOSTNAME"] = switch.name
+    SWITCH_VARS[f"{switch.name}_IP4"] = switch.mgmt.address if switch.mgmt else None
+    for port in switch.data_ports:
+        SWITCH_VARS[f"{switch.name}_INTERFACE_{port.index}"] = port.name
+SWITCH_VARS = {key: environ.get(key, value) for key, value in SWITCH_VARS.items()}
 
 # output is printed to STDOUT, where ansible-playbook -i reads it.
-# If you change any vars above, be sure to add them below.
+# If you change any vars above (other than the per-switch ones), be sure to add them below.
 # We'll clean this up as the integration test vars are standardized.
 
 output = {
@@ -212,91 +119,11 @@ output = {
             "ISN_FABRIC": ISN_FABRIC,
             "ND_IP4": ND_IP4,
             "ND_IP4_2": ND_IP4_2,
-            "S1_BG1_IP4": S1_BG1_IP4,
-            "S2_BG1_IP4": S2_BG1_IP4,
-            "S1_SP1_IP4": S1_SP1_IP4,
-            "S2_SP1_IP4": S2_SP1_IP4,
-            "S1_LE1_IP4": S1_LE1_IP4,
-            "S2_LE1_IP4": S2_LE1_IP4,
-            "S1_LE2_IP4": S1_LE2_IP4,
-            "S1_TOR1_IP4": S1_TOR1_IP4,
-            "S1_LE3_IP4": S1_LE3_IP4,
-            "S1_LE4_IP4": S1_LE4_IP4,
-            "S3_BG1_IP4": S3_BG1_IP4,
-            "S4_BG1_IP4": S4_BG1_IP4,
-            "S3_SP1_IP4": S3_SP1_IP4,
-            "S4_SP1_IP4": S4_SP1_IP4,
-            "S3_LE1_IP4": S3_LE1_IP4,
-            "S4_LE1_IP4": S4_LE1_IP4,
-            "S4_LE2_IP4": S4_LE2_IP4,
-            "S4_LE3_IP4": S4_LE3_IP4,
-            "S1_BG1_HOSTNAME": S1_BG1_HOSTNAME,
-            "S2_BG1_HOSTNAME": S2_BG1_HOSTNAME,
-            "S1_SP1_HOSTNAME": S1_SP1_HOSTNAME,
-            "S2_SP1_HOSTNAME": S2_SP1_HOSTNAME,
-            "S1_LE1_HOSTNAME": S1_LE1_HOSTNAME,
-            "S2_LE1_HOSTNAME": S2_LE1_HOSTNAME,
-            "S1_LE2_HOSTNAME": S1_LE2_HOSTNAME,
-            "S1_TOR1_HOSTNAME": S1_TOR1_HOSTNAME,
-            "S1_LE3_HOSTNAME": S1_LE3_HOSTNAME,
-            "S1_LE4_HOSTNAME": S1_LE4_HOSTNAME,
-            "S3_BG1_HOSTNAME": S3_BG1_HOSTNAME,
-            "S4_BG1_HOSTNAME": S4_BG1_HOSTNAME,
-            "S3_SP1_HOSTNAME": S3_SP1_HOSTNAME,
-            "S4_SP1_HOSTNAME": S4_SP1_HOSTNAME,
-            "S3_LE1_HOSTNAME": S3_LE1_HOSTNAME,
-            "S4_LE1_HOSTNAME": S4_LE1_HOSTNAME,
-            "S4_LE2_HOSTNAME": S4_LE2_HOSTNAME,
-            "S4_LE3_HOSTNAME": S4_LE3_HOSTNAME,
-            "S1_BG1_INTERFACE_1": S1_BG1_INTERFACE_1,
-            "S1_BG1_INTERFACE_2": S1_BG1_INTERFACE_2,
-            "S2_BG1_INTERFACE_1": S2_BG1_INTERFACE_1,
-            "S2_BG1_INTERFACE_2": S2_BG1_INTERFACE_2,
-            "S1_SP1_INTERFACE_1": S1_SP1_INTERFACE_1,
-            "S1_SP1_INTERFACE_2": S1_SP1_INTERFACE_2,
-            "S2_SP1_INTERFACE_1": S2_SP1_INTERFACE_1,
-            "S2_SP1_INTERFACE_2": S2_SP1_INTERFACE_2,
-            "S1_LE1_INTERFACE_1": S1_LE1_INTERFACE_1,
-            "S1_LE1_INTERFACE_2": S1_LE1_INTERFACE_2,
-            "S2_LE1_INTERFACE_1": S2_LE1_INTERFACE_1,
-            "S2_LE1_INTERFACE_2": S2_LE1_INTERFACE_2,
-            "S1_LE1_INTERFACE_3": S1_LE1_INTERFACE_3,
-            "S1_LE1_INTERFACE_4": S1_LE1_INTERFACE_4,
-            "S1_LE2_INTERFACE_1": S1_LE2_INTERFACE_1,
-            "S1_LE2_INTERFACE_2": S1_LE2_INTERFACE_2,
-            "S1_LE2_INTERFACE_3": S1_LE2_INTERFACE_3,
-            "S1_TOR1_INTERFACE_1": S1_TOR1_INTERFACE_1,
-            "S1_TOR1_INTERFACE_2": S1_TOR1_INTERFACE_2,
-            "S1_TOR1_INTERFACE_3": S1_TOR1_INTERFACE_3,
-            "S1_SP1_INTERFACE_3": S1_SP1_INTERFACE_3,
-            "S1_SP1_INTERFACE_4": S1_SP1_INTERFACE_4,
-            "S1_SP1_INTERFACE_5": S1_SP1_INTERFACE_5,
-            "S1_LE3_INTERFACE_1": S1_LE3_INTERFACE_1,
-            "S1_LE3_INTERFACE_2": S1_LE3_INTERFACE_2,
-            "S1_LE4_INTERFACE_1": S1_LE4_INTERFACE_1,
-            "S1_LE4_INTERFACE_2": S1_LE4_INTERFACE_2,
+            **SWITCH_VARS,
             "S1_LE1_IP4_INTERFACE_2": S1_LE1_IP4_INTERFACE_2,
             "S2_LE1_IP4_INTERFACE_2": S2_LE1_IP4_INTERFACE_2,
-            "S3_BG1_INTERFACE_1": S3_BG1_INTERFACE_1,
-            "S3_BG1_INTERFACE_2": S3_BG1_INTERFACE_2,
-            "S4_BG1_INTERFACE_1": S4_BG1_INTERFACE_1,
-            "S4_BG1_INTERFACE_2": S4_BG1_INTERFACE_2,
-            "S3_SP1_INTERFACE_1": S3_SP1_INTERFACE_1,
-            "S3_SP1_INTERFACE_2": S3_SP1_INTERFACE_2,
-            "S4_SP1_INTERFACE_1": S4_SP1_INTERFACE_1,
-            "S4_SP1_INTERFACE_2": S4_SP1_INTERFACE_2,
-            "S4_SP1_INTERFACE_3": S4_SP1_INTERFACE_3,
-            "S4_SP1_INTERFACE_4": S4_SP1_INTERFACE_4,
-            "S3_LE1_INTERFACE_1": S3_LE1_INTERFACE_1,
-            "S3_LE1_INTERFACE_2": S3_LE1_INTERFACE_2,
-            "S4_LE1_INTERFACE_1": S4_LE1_INTERFACE_1,
-            "S4_LE1_INTERFACE_2": S4_LE1_INTERFACE_2,
             "S3_LE1_IP4_INTERFACE_2": S3_LE1_IP4_INTERFACE_2,
             "S4_LE1_IP4_INTERFACE_2": S4_LE1_IP4_INTERFACE_2,
-            "S4_LE2_INTERFACE_1": S4_LE2_INTERFACE_1,
-            "S4_LE2_INTERFACE_2": S4_LE2_INTERFACE_2,
-            "S4_LE3_INTERFACE_1": S4_LE3_INTERFACE_1,
-            "S4_LE3_INTERFACE_2": S4_LE3_INTERFACE_2,
             "S4_LE2_IP4_INTERFACE_2": S4_LE2_IP4_INTERFACE_2,
             "S4_LE3_IP4_INTERFACE_2": S4_LE3_IP4_INTERFACE_2,
             "ND_PASSWORD": ND_PASSWORD,
@@ -322,26 +149,7 @@ output = {
         },
     },
     "nxos": {
-        "children": [
-            "S1_BG1",
-            "S2_BG1",
-            "S3_BG1",
-            "S4_BG1",
-            "S1_SP1",
-            "S2_SP1",
-            "S3_SP1",
-            "S4_SP1",
-            "S1_LE1",
-            "S2_LE1",
-            "S3_LE1",
-            "S4_LE1",
-            "S4_LE2",
-            "S4_LE3",
-            "S1_LE2",
-            "S1_LE3",
-            "S1_LE4",
-            "S1_TOR1",
-        ],
+        "children": [switch.name for switch in SWITCHES],
         "vars": {
             "ansible_become": "true",
             "ansible_become_method": "enable",
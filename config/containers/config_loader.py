@@ -3,13 +3,16 @@
 Configuration loader for container specifications from YAML files
 """
 
+import sys
 from pathlib import Path
 from typing import Any, Dict
 
-import yaml
-
 from models import ContainerSpec, NetworkInterface, VLANConfig
 
+# YAML parsing is shared with the VM launchers (cached, libyaml-backed)
+sys.path.append(str(Path(__file__).resolve().parent.parent / "nexus9000v"))
+from fabric import load_yaml  # noqa: E402  pylint: disable=wrong-import-position,wrong-import-order
+
 
 class ConfigLoader:
     """Loads container configurations from YAML files"""
@@ -27,8 +30,7 @@ class ConfigLoader:
 
     def load_config(self) -> Dict[str, Any]:
         """Load and parse the YAML configuration file"""
-        with open(self.config_file, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
+        return load_yaml(self.config_file)
 
     def create_container_spec(self, container_name: str) -> ContainerSpec:
         """
@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """Populate NetBox on glide with the n9kv-kvm lab topology.
 
-Parses this repo's authoritative YAML (switches, WAN1, host containers) plus two
-static entries (ND node, glide) and upserts sites, roles, device types, devices,
+Loads this repo's authoritative YAML (switches, WAN1, host containers) plus two
+static entries (ND node, glide) into the shared lab model
+(config/nexus9000v/topology.py) and upserts sites, roles, device types, devices,
 interfaces, cables, prefixes, and IP addresses into NetBox. Idempotent: safe to
 re-run after topology changes; never deletes.
 
@@ -17,21 +18,18 @@ from __future__ import annotations
 
 import os
 import sys
-from collections import defaultdict
 from pathlib import Path
 
 import pynetbox
-import yaml
 
 REPO = Path(__file__).resolve().parents[2]
 SWITCH_DIR = REPO / "config" / "nexus9000v"
+sys.path.append(str(SWITCH_DIR))
+from topology import Device, Port, Topology, load_topology  # noqa: E402  pylint: disable=wrong-import-position
+
 WAN1_YAML = REPO / "config" / "8000v" / "WAN1.yaml"
 CONTAINERS_YAML = REPO / "config" / "containers" / "container_configs_access_mode.yaml"
 
-# Multi-access segments: devices share these bridges, so they never become cables.
-SHARED_BRIDGE_PREFIXES = ("BR_ND_DATA_",)
-SHARED_BRIDGES = {"outside"}
-
 SITE_GROUP_LAB = "n9kv-lab"
 SITE_SHARED = "Lab-Shared"
 
@@ -42,6 +40,7 @@ ROLE_BY_YAML = {
     "Top-of-Rack Switch": "tor",
     "WAN Router": "wan-router",
 }
+TYPE_BY_KIND = {"nexus9000v": "nexus9300v", "c8000v": "catalyst-8000v", "container": "lxc-container"}
 
 IFACE_TYPE = "1000base-t"  # e1000 emulation on the n9kv VMs
 
@@ -72,20 +71,17 @@ def ensure(endpoint, lookup: dict, desired: dict):
     return record
 
 
-def site_for(device_name: str) -> str:
-    prefix = device_name.split("_", 1)[0]
-    if prefix in {"S1", "S2", "S3", "S4"}:
-        return f"SITE{prefix[1]}"
-    return SITE_SHARED
+def site_for(device: Device) -> str:
+    return f"SITE{device.site}" if device.site in {1, 2, 3, 4} else SITE_SHARED
 
 
-def load_switches() -> list[dict]:
-    switches = []
-    for path in sorted(SWITCH_DIR.glob("S*_*.yaml")):
-        if path.name.endswith(".netplan.yaml"):
-            continue
-        switches.append(yaml.safe_load(path.read_text()))
-    return switches
+def load_lab() -> Topology:
+    """Switches, WAN1 and host containers from the repo YAML, plus the static ND node and glide."""
+    # Static entries: ND node (IPs live in the ND install wizard, not the repo) and glide.
+    nd1 = Device("nd1", "static", "Nexus Dashboard (single-node cluster)")
+    nd1.ports = [Port("nd1", "mgmt", 0, "outside", ip="192.168.7.7/24"), Port("nd1", "data", 1, "BR_ND_DATA_12")]
+    glide = Device("glide", "static", "KVM/OVS host running the whole lab (n9kv-kvm repo)")
+    return load_topology(SWITCH_DIR, [WAN1_YAML], [CONTAINERS_YAML], strict=True, extra=[nd1, glide])
 
 
 def main() -> int:
@@ -121,38 +117,21 @@ def main() -> int:
     # -- collect desired devices/interfaces/IPs from repo YAML ------------------
     # devices: name -> (type_slug, role_slug, site_name, description)
     # ifaces:  (device, ifname) -> {bridge, mgmt_only, ip, mac}
+    lab = load_lab()
+    warnings.extend(f"topology: {problem}" for problem in lab.problems)
     devices: dict[str, tuple[str, str, str, str]] = {}
     ifaces: dict[tuple[str, str], dict] = {}
 
-    for sw in load_switches():
-        name = sw["name"]
-        devices[name] = ("nexus9300v", ROLE_BY_YAML[sw["role"]], site_for(name), sw["role"])
-        ifaces[(name, "mgmt0")] = {"bridge": sw["mgmt_bridge"], "mgmt_only": True, "ip": sw["mgmt_ip"]}
-        for i, bridge in enumerate(sw["isl_bridges"], 1):
-            ifaces[(name, f"Ethernet1/{i}")] = {"bridge": bridge, "mgmt_only": False, "ip": None}
-
-    wan = yaml.safe_load(WAN1_YAML.read_text())
-    devices[wan["name"]] = ("catalyst-8000v", ROLE_BY_YAML[wan["role"]], SITE_SHARED, wan["role"])
-    ifaces[(wan["name"], "GigabitEthernet1")] = {"bridge": wan["mgmt_bridge"], "mgmt_only": True, "ip": wan["mgmt_ip"]}
-    for i, bridge in enumerate(wan["isl_bridges"], 2):
-        ifaces[(wan["name"], f"GigabitEthernet{i}")] = {"bridge": bridge, "mgmt_only": False, "ip": None}
-
-    for cname, c in yaml.safe_load(CONTAINERS_YAML.read_text())["containers"].items():
-        devices[cname] = ("lxc-container", "host", site_for(cname), "LXC test host container")
-        for key in ("management_interface", "test_interface"):
-            spec = c[key]
-            ifaces[(cname, spec["name"])] = {
-                "bridge": spec["bridge"],
-                "mgmt_only": key == "management_interface",
-                "ip": f"{spec['ip_address']}/{spec['netmask']}",
-                "mac": spec["mac_address"],
-            }
-
-    # Static entries: ND node (IPs live in the ND install wizard, not the repo) and glide.
-    devices["nd1"] = ("nd-node", "nd-node", SITE_SHARED, "Nexus Dashboard (single-node cluster)")
-    ifaces[("nd1", "mgmt")] = {"bridge": "outside", "mgmt_only": True, "ip": "192.168.7.7/24"}
-    ifaces[("nd1", "data")] = {"bridge": "BR_ND_DATA_12", "mgmt_only": False, "ip": None}
-    devices["glide"] = ("ubuntu-kvm-host", "hypervisor", SITE_SHARED, "KVM/OVS host running the whole lab (n9kv-kvm repo)")
+    for device in lab.devices.values():
+        if device.kind == "container":
+            devices[device.name] = ("lxc-container", "host", site_for(device), "LXC test host container")
+        elif device.kind == "static":
+            static_type = {"nd1": ("nd-node", "nd-node"), "glide": ("ubuntu-kvm-host", "hypervisor")}[device.name]
+            devices[device.name] = (*static_type, SITE_SHARED, device.role)
+        else:
+            devices[device.name] = (TYPE_BY_KIND[device.kind], ROLE_BY_YAML[device.role], site_for(device), device.role)
+        for port in device.ports:
+            ifaces[(device.name, port.name)] = {"bridge": port.bridge, "mgmt_only": port.index == 0, "ip": port.ip, "mac": port.mac}
 
     # -- prefixes ---------------------------------------------------------------
     for prefix, desc in [
@@ -221,19 +200,10 @@ def main() -> int:
         if spec["mgmt_only"]:
             ensure(nb.dcim.devices, {"name": dev}, {"primary_ip4": ip.id})
 
-    # -- cables: any non-shared bridge with exactly two endpoints ---------------
-    endpoints: dict[str, list[tuple[str, str]]] = defaultdict(list)
-    for (dev, ifname), spec in ifaces.items():
-        bridge = spec["bridge"]
-        if bridge in SHARED_BRIDGES or bridge.startswith(SHARED_BRIDGE_PREFIXES):
-            continue
-        endpoints[bridge].append((dev, ifname))
-
-    for bridge, ends in sorted(endpoints.items()):
-        if len(ends) != 2:
-            warnings.append(f"bridge {bridge}: {len(ends)} endpoint(s) {ends} -- no cable created")
-            continue
-        (dev_a, if_a), (dev_b, if_b) = ends
+    # -- cables: one per point-to-point link in the topology -------------------
+    for port_a, port_b in lab.links():
+        bridge = port_a.bridge
+        (dev_a, if_a), (dev_b, if_b) = (port_a.device, port_a.name), (port_b.device, port_b.name)
         a, b = nb_ifaces[(dev_a, if_a)], nb_ifaces[(dev_b, if_b)]
         a = nb.dcim.interfaces.get(a.id)  # refresh: cable state may predate this run
         if a.cable:
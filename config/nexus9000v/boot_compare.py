@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Compare fabric boot times across launcher settings (e.g. block-layer tuning).
+
+Each variant is a set of global_config overrides. For every variant the
+selected switches are launched together (SwitchVMManager.create_fabric), which
+is exactly the concurrent I/O storm of a real site bring-up. The script waits
+on the serial consoles until every switch reaches login (boot_watcher), then
+quits the VMs over QMP and removes their TAPs before the next variant. Per-VM
+disks are recreated at each launch, so every run is a cold boot.
+
+Variants are NAME:key=value,key=value; values are parsed as YAML scalars.
+Without --variant, the default block-layer settings are compared with
+cache=none/aio=io_uring/discard:
+
+    sudo python3 boot_compare.py --site 1 --site 2
+    sudo python3 boot_compare.py --site 1 --drop-caches \\
+        --variant sata:disk_cache=none,disk_aio=io_uring \\
+        --variant virtio:disk_cache=none,disk_aio=io_uring,disk_bus=virtio
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import yaml
+
+from boot_watcher import BootRecord, BootTarget, percentile, print_report, wait_for_ready
+from nexus9000v import ConfigLoader, GlobalConfig, OVSPortManager, SwitchConfig, SwitchVMManager
+from qmp import QMPPool
+
+DEFAULT_VARIANTS = [
+    "baseline:disk_cache=writethrough,disk_aio=threads,disk_discard=false",
+    "tuned:disk_cache=none,disk_aio=io_uring,disk_discard=true",
+]
+
+
+def parse_variant(text: str) -> Tuple[str, Dict[str, Any]]:
+    """'name:key=value,...' -> (name, overrides)."""
+    name, _, spec = text.partition(":")
+    overrides = {}
+    for item in filter(None, spec.split(",")):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"variant {name}: expected key=value, got {item!r}")
+        overrides[key.strip()] = yaml.safe_load(value)
+    return name, overrides
+
+
+async def quit_all(socket_dir: str, names: List[str]) -> None:
+    """Stop every named VM over QMP; VMs that never started are ignored."""
+    async with QMPPool(socket_dir) as pool:
+        await pool.execute_all(names, "quit")
+
+
+def run_variant(global_config: GlobalConfig, configs: List[SwitchConfig], workers: int, timeout: float) -> Tuple[List[BootRecord], float]:
+    """Launch, wait for login, stop. Returns (boot records, seconds until the last switch was ready)."""
+    manager = SwitchVMManager(global_config)
+    start = time.monotonic()
+    try:
+        results = manager.create_fabric(configs, workers=workers)
+        by_name = {c.name: c for c in configs}
+        targets = []
+        for r in results:
+            if r["status"] != "running":
+                print(f"  {r['name']} failed to launch: {r.get('error')}")
+                continue
+            config = by_name[r["name"]]
+            image = config.image_name or global_config.default_image
+            targets.append(BootTarget(r["name"], r["telnet_port"], config.role, image, started_at=r["spawned_at"]))
+        records = wait_for_ready(targets, timeout=timeout)
+        return records, time.monotonic() - start
+    finally:
+        asyncio.run(quit_all(global_config.qmp_socket_dir, [c.name for c in configs]))
+        time.sleep(2)  # let QEMU release the TAPs
+        # every attempted switch, not just the ones that launched: a failed launch can leave TAPs behind
+        OVSPortManager.remove_taps([tap for c in configs for tap, _ in manager.ports(c) if tap], manager.tap_backend)
+
+
+def main() -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Compare concurrent fabric boot times across global_config variants")
+    parser.add_argument("--site", type=int, action="append", help="Only switches of this site (repeatable; default: all S*.yaml)")
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
+    parser.add_argument("--variant", action="append", help="NAME:key=value,... global_config overrides (repeatable)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent launches (default: 8)")
+    parser.add_argument("--boot-timeout", type=float, default=2400, help="Seconds to wait for each switch (default: 2400)")
+    parser.add_argument("--drop-caches", action="store_true", help="Drop the host page cache before each variant")
+    args = parser.parse_args()
+
+    base = ConfigLoader.load_global_config(args.global_config)
+    configs = ConfigLoader.load_fabric_configs(Path.cwd(), args.site)
+    if not configs:
+        parser.error("no switch configs matched")
+
+    summary = []
+    for name, overrides in map(parse_variant, args.variant or DEFAULT_VARIANTS):
+        global_config = replace(base, **overrides)
+        if args.drop_caches:
+            Path("/proc/sys/vm/drop_caches").write_text("3\n", encoding="utf-8")
+        print(f"\n=== {name}: {len(configs)} switches, {overrides} ===")
+        records, wall = run_variant(global_config, configs, args.workers, args.boot_timeout)
+        print_report(records)
+        ready = [r.ready_seconds for r in records if r.ready_seconds is not None]
+        summary.append((name, len(ready), len(records), ready, wall))
+
+    print(f"\n{'VARIANT':<16} {'READY':>7} {'P50':>8} {'P90':>8} {'MAX':>8} {'WALL':>8}")
+    for name, n_ready, n_total, ready, wall in summary:
+        stats = f"{percentile(ready, 50):>8.1f} {percentile(ready, 90):>8.1f} {max(ready):>8.1f}" if ready else f"{'-':>8} {'-':>8} {'-':>8}"
+        print(f"{name:<16} {f'{n_ready}/{n_total}':>7} {stats} {wall:>8.1f}")
+    return 0 if all(n_ready == n_total for _, n_ready, n_total, _, _ in summary) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Watch Nexus9000v serial consoles and time each switch's boot.
+
+Each switch's serial port is a QEMU telnet server on 10000+sid (see
+NexusQEMUBuilder._build_misc_args). The watcher connects to every console
+concurrently with asyncio, strips telnet negotiation, and timestamps the first
+occurrence of each boot milestone:
+
+    loader     GRUB / NX-OS loader is running
+    kernel     Linux kernel is starting
+    coming_up  "System is coming up ... Please wait"
+    poap       POAP / "Abort Power On Auto Provisioning" prompt
+    login      login prompt -- the switch is ready
+
+QEMU's serial telnet server accepts one client at a time, so the console is
+busy (telnet localhost <port> will hang) until the watcher disconnects, which
+it does as soon as the switch is ready or the timeout expires.
+
+Usage:
+    python3 boot_watcher.py S1_LE1.yaml S1_LE2.yaml   # watch specific switches
+    python3 boot_watcher.py --site 1 --timeout 1800   # watch every S1_*.yaml
+    python3 boot_watcher.py --site 1 --json           # machine-readable records
+
+nexus9000v.py --fabric --wait-ready runs the same watcher right after launch.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Milestones in boot order; each is recorded once, the first time it is seen.
+STAGES: List[Tuple[str, "re.Pattern[bytes]"]] = [
+    ("loader", re.compile(rb"GNU GRUB|Loader Version|loader >|Booting nxos|Trying to boot", re.IGNORECASE)),
+    ("kernel", re.compile(rb"Linux version|Starting kernel|Uncompressing Linux|INIT: version")),
+    ("coming_up", re.compile(rb"System is coming up", re.IGNORECASE)),
+    ("poap", re.compile(rb"Abort Power On Auto Provisioning|POAP", re.IGNORECASE)),
+    ("login", re.compile(rb"login:\s*$", re.MULTILINE)),
+]
+STAGE_NAMES = [name for name, _ in STAGES]
+
+IAC = 255
+SB = 250
+SE = 240
+TELNET_OPTION_CMDS = {251, 252, 253, 254}  # WILL, WONT, DO, DONT
+
+
+@dataclass
+class BootTarget:
+    """One console to watch."""
+
+    name: str
+    port: int
+    role: str = ""
+    image: str = ""
+    host: str = "localhost"
+    started_at: float = field(default_factory=time.monotonic)  # time.monotonic() of VM spawn
+
+
+@dataclass
+class BootRecord:
+    """Outcome of watching one console: seconds from spawn to each stage seen."""
+
+    name: str
+    role: str
+    image: str
+    stages: Dict[str, float] = field(default_factory=dict)
+    ready_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the ready stage was seen."""
+        return self.ready_seconds is not None
+
+
+def strip_telnet(data: bytes) -> bytes:
+    """Remove telnet IAC command/negotiation sequences from a chunk of console output."""
+    out = bytearray()
+    i = 0
+    while i < len(data):
+        byte = data[i]
+        if byte != IAC:
+            out.append(byte)
+            i += 1
+            continue
+        cmd = data[i + 1] if i + 1 < len(data) else None
+        if cmd == IAC:  # escaped 0xff
+            out.append(IAC)
+            i += 2
+        elif cmd in TELNET_OPTION_CMDS:
+            i += 3
+        elif cmd == SB:
+            end = data.find(bytes([IAC, SE]), i + 2)
+            i = len(data) if end < 0 else end + 2
+        else:
+            i += 2
+    return bytes(out)
+
+
+async def _connect(target: BootTarget, deadline: float) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Connect to the console, retrying until QEMU is listening or the deadline passes."""
+    while True:
+        try:
+            return await asyncio.open_connection(target.host, target.port)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            await asyncio.sleep(0.5)
+
+
+async def watch_console(target: BootTarget, timeout: float = 1800, ready_stage: str = "login", nudge_after: float = 30) -> BootRecord:
+    """Stream one console until ready_stage is seen or timeout seconds elapse.
+
+    If the console stays silent for nudge_after seconds (the switch may have
+    booted before we connected) a single carriage return is sent to make it
+    reprint its prompt -- never while a POAP prompt is pending, where a bare
+    return would answer the question.
+    """
+    record = BootRecord(target.name, target.role, target.image)
+    deadline = target.started_at + timeout
+    try:
+        reader, writer = await _connect(target, deadline)
+    except OSError as e:
+        record.error = f"console {target.host}:{target.port} unreachable: {e}"
+        return record
+
+    tail = b""
+    nudged = False
+    try:
+        while time.monotonic() < deadline:
+            wait = min(deadline - time.monotonic(), nudge_after)
+            try:
+                chunk = await asyncio.wait_for(reader.read(4096), timeout=max(wait, 0.1))
+            except asyncio.TimeoutError:
+                if not nudged and "poap" not in record.stages:
+                    writer.write(b"\r")
+                    await writer.drain()
+                    nudged = True
+                continue
+            if not chunk:
+                record.error = "console closed (QEMU exited?)"
+                break
+            # Keep a short tail so a milestone split across reads still matches.
+            tail = (tail + strip_telnet(chunk))[-1024:]
+            now = time.monotonic() - target.started_at
+            for name, pattern in STAGES:
+                if name not in record.stages and pattern.search(tail):
+                    record.stages[name] = round(now, 1)
+            if ready_stage in record.stages:
+                record.ready_seconds = record.stages[ready_stage]
+                break
+        else:
+            record.error = f"not ready after {timeout:.0f}s"
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+    return record
+
+
+async def watch_all(targets: List[BootTarget], timeout: float = 1800, ready_stage: str = "login") -> List[BootRecord]:
+    """Watch every console concurrently; returns records in target order."""
+    return list(await asyncio.gather(*(watch_console(t, timeout, ready_stage) for t in targets)))
+
+
+def wait_for_ready(targets: List[BootTarget], timeout: float = 1800, ready_stage: str = "login") -> List[BootRecord]:
+    """Blocking wrapper around watch_all() for synchronous callers."""
+    return asyncio.run(watch_all(targets, timeout, ready_stage))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def print_report(records: List[BootRecord]) -> None:
+    """Per-switch stage table plus time-to-ready percentiles per (image, role)."""
+    header = f"{'SWITCH':<10} " + " ".join(f"{name.upper():>9}" for name in STAGE_NAMES) + "  STATUS"
+    print(header)
+    for r in records:
+        cells = " ".join(f"{r.stages[name]:>9.1f}" if name in r.stages else f"{'-':>9}" for name in STAGE_NAMES)
+        print(f"{r.name:<10} {cells}  {'ready' if r.ready else r.error or 'not ready'}")
+
+    groups: Dict[Tuple[str, str], List[float]] = {}
+    for r in records:
+        if r.ready_seconds is not None:
+            groups.setdefault((r.image, r.role), []).append(r.ready_seconds)
+    if groups:
+        print(f"\n{'IMAGE':<32} {'ROLE':<20} {'N':>3} {'P50':>8} {'P90':>8} {'MAX':>8}")
+        for (image, role), values in sorted(groups.items()):
+            print(f"{image:<32} {role:<20} {len(values):>3} {percentile(values, 50):>8.1f} {percentile(values, 90):>8.1f} {max(values):>8.1f}")
+        ready = [v for values in groups.values() for v in values]
+        print(f"\nAll switches: {len(ready)}/{len(records)} ready, median {statistics.median(ready):.1f}s, slowest {max(ready):.1f}s")
+
+
+def main() -> int:
+    """CLI entry point."""
+    # Imported here so the watcher library has no hard dependency on the launcher.
+    from nexus9000v import ConfigLoader  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Watch Nexus9000v serial consoles and time boot milestones")
+    parser.add_argument("configs", nargs="*", type=Path, help="Per-switch YAML files")
+    parser.add_argument("--site", type=int, action="append", help="Watch every S<site>_*.yaml in the current directory (repeatable)")
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds to wait for each switch (default: 1800)")
+    parser.add_argument("--ready-stage", choices=STAGE_NAMES, default="login", help="Milestone that counts as ready (default: login)")
+    parser.add_argument("--json", action="store_true", help="Print records as JSON")
+    args = parser.parse_args()
+
+    global_config = ConfigLoader.load_global_config(args.global_config)
+    if args.site:
+        configs = ConfigLoader.load_fabric_configs(Path.cwd(), args.site)
+    else:
+        configs = [ConfigLoader.load_switch_config(path) for path in args.configs]
+    if not configs:
+        parser.error("give switch YAML files or --site")
+
+    targets = [BootTarget(c.name, c.telnet_port, c.role, c.image_name or global_config.default_image) for c in configs]
+    records = wait_for_ready(targets, args.timeout, args.ready_stage)
+    if args.json:
+        print(json.dumps([asdict(r) for r in records], indent=2))
+    else:
+        print_report(records)
+    return 0 if all(r.ready for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
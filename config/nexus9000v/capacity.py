@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""Host capacity planner: can this host hold the VMs about to be launched?
+
+Sums RAM, vCPUs and disk for switches, routers, Nexus Dashboard nodes and
+containers and compares them against the host:
+
+- RAM: MemTotal, minus the hugepage pool, minus mem_reserve_mb kept for the
+  host, minus what running QEMU processes were given (-m, read from their
+  command lines, because guests fault memory in lazily and MemAvailable
+  under-reports what they will use)
+- hugepages: HugePages_Free - HugePages_Rsvd, for hugepage-backed demands
+- vCPUs: online CPUs x max_vcpu_ratio, minus running QEMU vCPUs (-smp)
+- disk: free space on the filesystem holding cdrom_path (per-VM disks)
+
+A resource over capacity refuses the launch; over WARN_FRACTION of it (or, for
+vCPUs, oversubscribed at all) warns. On refusal the planner proposes reduced
+per-role RAM/vCPU sizes that would fit, never below MIN_RAM_MB / MIN_VCPUS.
+Everything comes from /proc and one statvfs, so a check takes milliseconds.
+
+Launchers use it as a library (SwitchVMManager.admit); from the shell:
+
+    python3 capacity.py --site 1 --site 2
+    python3 capacity.py --nd ../nd/nd-4-3-1-75-node1.sh --router ../8000v/WAN1.yaml \\
+        --containers ../containers/container_configs_access_mode.yaml --json
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fabric import load_yaml
+from registry import qemu_name, qemu_processes
+
+WARN_FRACTION = 0.9
+OVERLAY_RESERVE_GB = 4.0  # expected guest writes into a thin overlay disk
+MIN_RAM_MB = {"nexus9000v": 8192, "c8000v": 4096, "container": 256}  # kinds not listed are never shrunk
+MIN_VCPUS = {"nexus9000v": 2, "c8000v": 1, "container": 1}
+
+
+@dataclass
+class Demand:
+    """Resources one VM or container will take."""
+
+    name: str
+    kind: str  # nexus9000v | c8000v | nd | container
+    role: str
+    ram_mb: int
+    vcpus: int
+    disk_gb: float = 0.0
+    hugepages: bool = False
+
+    @property
+    def group(self) -> str:
+        """Proposal key: sizes are proposed per kind and role."""
+        return f"{self.kind}/{self.role}" if self.role else self.kind
+
+
+@dataclass
+class HostCapacity:
+    """Free host resources, net of what running QEMU processes already hold."""
+
+    mem_total_mb: int
+    hugepage_pool_mb: int
+    hugepage_free_mb: int
+    cpus: int
+    disk_free_gb: float
+    running_ram_mb: int = 0
+    running_vcpus: int = 0
+    running: List[str] = field(default_factory=list)
+
+    @classmethod
+    def probe(cls, disk_path: str, exclude: Optional[List[str]] = None, proc_root: Path = Path("/proc")) -> "HostCapacity":
+        """Read the host; VMs named in exclude (about to be replaced) are not counted as running."""
+        meminfo = {}
+        for line in (proc_root / "meminfo").read_text().splitlines():
+            key, _, value = line.partition(":")
+            meminfo[key] = int(value.split()[0])
+        page_kb = meminfo.get("Hugepagesize", 2048)
+        path = Path(disk_path)
+        while not path.exists() and path != path.parent:
+            path = path.parent  # cdrom_path may not exist yet
+        host = cls(
+            mem_total_mb=meminfo["MemTotal"] >> 10,
+            hugepage_pool_mb=meminfo.get("HugePages_Total", 0) * page_kb >> 10,
+            hugepage_free_mb=(meminfo.get("HugePages_Free", 0) - meminfo.get("HugePages_Rsvd", 0)) * page_kb >> 10,
+            cpus=len(os.sched_getaffinity(0)),
+            disk_free_gb=shutil.disk_usage(path).free / (1 << 30),
+        )
+        for name, ram_mb, vcpus, hugepages in running_qemu(proc_root):
+            if name in (exclude or []):
+                continue
+            host.running.append(name)
+            host.running_vcpus += vcpus
+            if not hugepages:  # hugepage guests are already out of HugePages_Free
+                host.running_ram_mb += ram_mb
+        return host
+
+
+@dataclass
+class ResourceCheck:
+    """Demand against capacity for one resource."""
+
+    resource: str
+    unit: str
+    demand: float
+    capacity: float
+    verdict: str  # ok | warn | refuse
+    note: str = ""
+
+
+@dataclass
+class CapacityReport:
+    """Outcome of CapacityPlanner.check()."""
+
+    verdict: str
+    checks: List[ResourceCheck]
+    proposal: Dict[str, Dict[str, int]] = field(default_factory=dict)  # group -> {"ram_mb", "vcpus"}
+
+    @property
+    def findings(self) -> List[ResourceCheck]:
+        """Checks that warn or refuse."""
+        return [c for c in self.checks if c.verdict != "ok"]
+
+    def format(self) -> str:
+        """Human-readable report."""
+        lines = [f"Capacity check: {self.verdict.upper()}"]
+        for c in self.checks:
+            note = f"  ({c.note})" if c.note else ""
+            lines.append(f"  {c.resource:<10} {c.demand:>9.0f} / {c.capacity:>9.0f} {c.unit:<3} {c.verdict}{note}")
+        if self.proposal:
+            lines.append("  Proposed sizes that fit:")
+            for group, sizes in sorted(self.proposal.items()):
+                lines.append(f"    {group}: " + ", ".join(f"{k}={v}" for k, v in sizes.items()))
+        return "\n".join(lines)
+
+
+class CapacityPlanner:
+    """Admission check of a set of Demands against a HostCapacity."""
+
+    def __init__(self, host: HostCapacity, mem_reserve_mb: int = 8192, max_vcpu_ratio: float = 2.0):
+        self.host = host
+        self.mem_reserve_mb = mem_reserve_mb
+        self.max_vcpu_ratio = max_vcpu_ratio
+
+    def check(self, demands: List[Demand]) -> CapacityReport:
+        """Refuse, warn or accept demands; propose smaller sizes on refusal."""
+        host = self.host
+        ram = [d for d in demands if not d.hugepages]
+        huge = [d for d in demands if d.hugepages]
+        ram_capacity = host.mem_total_mb - host.hugepage_pool_mb - self.mem_reserve_mb - host.running_ram_mb
+        vcpu_capacity = host.cpus * self.max_vcpu_ratio - host.running_vcpus
+        running = f"{len(host.running)} VMs already running" if host.running else ""
+
+        checks = [self._check("ram", "MB", sum(d.ram_mb for d in ram), ram_capacity, running)]
+        if huge:
+            checks.append(self._check("hugepages", "MB", sum(d.ram_mb for d in huge), host.hugepage_free_mb))
+        vcpus = self._check("vcpus", "", sum(d.vcpus for d in demands), vcpu_capacity, f"max {self.max_vcpu_ratio:g} per host CPU")
+        if vcpus.verdict == "ok" and vcpus.demand + host.running_vcpus > host.cpus:
+            vcpus.verdict = "warn"
+            vcpus.note = f"{vcpus.demand + host.running_vcpus:.0f} vCPUs on {host.cpus} host CPUs (oversubscribed)"
+        checks.append(vcpus)
+        checks.append(self._check("disk", "GB", sum(d.disk_gb for d in demands), host.disk_free_gb))
+
+        verdicts = {c.verdict for c in checks}
+        verdict = "refuse" if "refuse" in verdicts else "warn" if "warn" in verdicts else "ok"
+        proposal: Dict[str, Dict[str, int]] = {}
+        if checks[0].verdict == "refuse":
+            self._shrink(ram, "ram_mb", ram_capacity, MIN_RAM_MB, 1024, proposal)
+        if huge and checks[1].verdict == "refuse":
+            self._shrink(huge, "ram_mb", host.hugepage_free_mb, MIN_RAM_MB, 1024, proposal)
+        if vcpus.verdict == "refuse":
+            self._shrink(demands, "vcpus", vcpu_capacity, MIN_VCPUS, 1, proposal)
+        return CapacityReport(verdict, checks, proposal)
+
+    @staticmethod
+    def _check(resource: str, unit: str, demand: float, capacity: float, note: str = "") -> ResourceCheck:
+        if demand > capacity:
+            verdict = "refuse"
+        elif demand > capacity * WARN_FRACTION:
+            verdict = "warn"
+        else:
+            verdict = "ok"
+        return ResourceCheck(resource, unit, demand, max(capacity, 0), verdict, note)
+
+    @staticmethod
+    def _shrink(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        demands: List[Demand], attr: str, capacity: float, floors: Dict[str, int], step: int, proposal: Dict[str, Dict[str, int]]
+    ) -> None:
+        """Scale the shrinkable part (size - floor) of every group down uniformly until the total fits."""
+        sizes: Dict[str, int] = {}
+        counts: Dict[str, int] = {}
+        fixed = 0
+        for d in demands:
+            if d.kind in floors:
+                sizes[d.group] = max(sizes.get(d.group, 0), getattr(d, attr))
+                counts[d.group] = counts.get(d.group, 0) + 1
+            else:
+                fixed += getattr(d, attr)
+        floor = {g: min(floors[g.split("/")[0]], size) for g, size in sizes.items()}
+        total = fixed + sum(sizes[g] * counts[g] for g in sizes)
+        slack = sum((sizes[g] - floor[g]) * counts[g] for g in sizes)
+        need = total - capacity
+        if need <= 0 or slack < need:
+            return  # fits already, or does not fit even at the minimum sizes
+        keep = 1 - need / slack
+        for g in sizes:
+            proposed = floor[g] + int((sizes[g] - floor[g]) * keep) // step * step
+            proposal.setdefault(g, {})[attr] = max(proposed, floor[g])
+
+
+def running_qemu(proc_root: Path = Path("/proc")) -> List[Tuple[str, int, int, bool]]:
+    """(name, ram MB, vCPUs, hugepage-backed) of every running QEMU process."""
+    vms = []
+    for pid, argv in qemu_processes(proc_root).items():
+        opts = {argv[i]: argv[i + 1] for i in range(len(argv) - 1) if argv[i] in ("-m", "-smp")}
+        name = qemu_name(argv) or str(pid)
+        ram = _option(opts.get("-m", "128"), "size")
+        vcpus = int(_option(opts.get("-smp", "1"), "cpus") or 1)
+        # -m 16G, -m size=16384M, -m 16384 (MB)
+        match = re.fullmatch(r"(\d+)([MGT]?)B?", ram.upper())
+        ram_mb = int(match.group(1)) << {"": 0, "M": 0, "G": 10, "T": 20}[match.group(2)] if match else 0
+        vms.append((name, ram_mb, vcpus, any("memory-backend-file" in a for a in argv)))
+    return vms
+
+
+def _option(value: str, key: str) -> str:
+    """The value of key in a QEMU option string, or its leading positional value."""
+    parts = value.split(",")
+    for part in parts:
+        if part.startswith(f"{key}="):
+            return part.split("=", 1)[1]
+    return parts[0] if "=" not in parts[0] else ""
+
+
+def _gb(size: Optional[str]) -> float:
+    """qemu-img style size ("32G", "512M") in GB."""
+    if not size:
+        return 0.0
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    size = size.strip().upper().rstrip("B")
+    value = float(size[:-1]) * units[size[-1]] if size[-1] in units else float(size)
+    return value / (1 << 30)
+
+
+def vm_demand(kind: str, config: Any, global_config: Any) -> Demand:
+    """Demand for a SwitchConfig/RouterConfig (anything with ram, vcpus, disk_* and the matching globals)."""
+    ram = config.ram or global_config.default_ram
+    mode = getattr(config, "disk_mode", None) or getattr(global_config, "default_disk_mode", "clone")
+    size = getattr(config, "disk_size", None) or getattr(global_config, "default_disk_size", None)
+    disk = OVERLAY_RESERVE_GB if mode == "overlay" else _gb(size) or OVERLAY_RESERVE_GB
+    external = getattr(config, "enable_external_storage", None)
+    if external is None:
+        external = getattr(global_config, "external_storage_enabled", False)
+    if external and not (Path(global_config.cdrom_path) / f"{config.name}_external.qcow2").exists():
+        disk += _gb(getattr(config, "external_storage_size", None) or global_config.default_external_storage_size)
+    backend = getattr(config, "memory_backend", None) or getattr(global_config, "memory_backend", "ram")
+    return Demand(config.name, kind, getattr(config, "role", ""), ram, config.vcpus or global_config.default_vcpus, disk, backend == "hugepages")
+
+
+def nd_demands(script: Path) -> List[Demand]:
+    """Nexus Dashboard node from one of config/nd/*.sh (virt-install --vcpus/--ram, qemu-img data disk)."""
+    text = script.read_text(encoding="utf-8")
+    vcpus = re.search(r"--vcpus\s+(\d+)", text)
+    ram = re.search(r"--ram\s+(\d+)", text)
+    if not (vcpus and ram):
+        raise ValueError(f"{script}: no virt-install --vcpus/--ram found")
+    disk = sum(_gb(size) for size in re.findall(r"qemu-img create -f qcow2 \S+ (\d+[KMGT])", text))
+    return [Demand(script.stem, "nd", "", int(ram.group(1)), int(vcpus.group(1)), disk + OVERLAY_RESERVE_GB)]
+
+
+def container_demands(config_file: Path) -> List[Demand]:
+    """Every container in a config/containers/*.yaml file."""
+    data = load_yaml(config_file) or {}
+    return [
+        Demand(name, "container", "", int(spec.get("memory_kb", 1048576)) >> 10, int(spec.get("vcpus", 2)))
+        for name, spec in (data.get("containers") or {}).items()
+    ]
+
+
+def router_demands(config_files: List[Path]) -> List[Demand]:
+    """c8000v routers from their YAML files, defaults from the global_config.yaml next to them."""
+    demands = []
+    for path in config_files:
+        global_file = path.parent / "global_config.yaml"
+        defaults = {"default_ram": 8192, "default_vcpus": 4, "default_disk_mode": "overlay", "cdrom_path": "/iso2/iosxe/config"}
+        if global_file.exists():
+            defaults.update(load_yaml(global_file) or {})
+        data = load_yaml(path) or {}
+        config = argparse.Namespace(**{"ram": None, "vcpus": None, "disk_mode": None, "disk_size": None, "role": "", **data})
+        demands.append(vm_demand("c8000v", config, argparse.Namespace(**defaults)))
+    return demands
+
+
+def main() -> int:
+    """CLI entry point. Exits 1 when the host would refuse the set."""
+    from nexus9000v import ConfigLoader  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Check whether this host can hold a set of switches, routers, ND nodes and containers")
+    parser.add_argument("--site", type=int, action="append", help="Switches of this site (repeatable)")
+    parser.add_argument("--no-switches", action="store_true", help="Do not include the S*.yaml switches in the current directory")
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
+    parser.add_argument("--router", type=Path, action="append", default=[], help="8000v router YAML (repeatable)")
+    parser.add_argument("--nd", type=Path, action="append", default=[], help="ND install script from config/nd (repeatable)")
+    parser.add_argument("--containers", type=Path, action="append", default=[], help="Container config YAML (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    global_config = ConfigLoader.load_global_config(args.global_config)
+    demands = [] if args.no_switches else [vm_demand("nexus9000v", c, global_config) for c in ConfigLoader.load_fabric_configs(Path.cwd(), args.site)]
+    demands += router_demands(args.router)
+    for script in args.nd:
+        demands += nd_demands(script)
+    for config_file in args.containers:
+        demands += container_demands(config_file)
+
+    host = HostCapacity.probe(global_config.cdrom_path, exclude=[d.name for d in demands])
+    report = CapacityPlanner(host, global_config.mem_reserve_mb, global_config.max_vcpu_ratio).check(demands)
+    if args.json:
+        print(json.dumps({"host": asdict(host), "demands": [asdict(d) for d in demands], **asdict(report)}, indent=2))
+    else:
+        print(f"{len(demands)} VMs/containers: {sum(d.ram_mb for d in demands)} MB RAM, {sum(d.vcpus for d in demands)} vCPUs")
+        print(report.format())
+    return 1 if report.verdict == "refuse" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Pin each switch's vCPU threads to host CPUs.
+
+Without pinning, every NX-OS vCPU is a floating QEMU thread competing with all
+the others (and with Nexus Dashboard) for whatever CPU the scheduler picks.
+CPUPinner assigns each vCPU its own host CPU:
+
+- reserved CPUs (cpu_reserved, e.g. the host's housekeeping CPUs and the ones
+  given to ND) are never used;
+- a switch's vCPUs stay on one host NUMA node, the node its RAM is bound to
+  (host_numa_node) or else the least loaded one;
+- one vCPU per physical core is handed out before any SMT sibling is used, and
+  only once every CPU is taken do CPUs get a second vCPU (oversubscription).
+
+The plan is a JSON file (cpu_plan_file) so a restarted switch lands on the
+same CPUs. A switch that has not been running (per the launcher registry) for
+PRUNE_AFTER seconds since it was last planned is dropped from the plan, so
+removed switches do not keep their CPUs reserved. After QEMU starts, vCPU thread IDs are read over QMP
+(query-cpus-fast) or, failing that, from /proc/<pid>/task/*/comm
+("CPU <n>/KVM"), and pinned with sched_setaffinity.
+
+Usage:
+    python3 cpu_pinning.py --site 1 --site 2       # plan + oversubscription report
+    python3 cpu_pinning.py --show                  # current persisted plan
+"""
+
+import argparse
+import asyncio
+import fcntl
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from registry import VMRegistry
+
+SYS_ROOT = Path("/sys/devices/system")
+VCPU_COMM = re.compile(r"^CPU (\d+)/KVM$")
+PRUNE_AFTER = 1800  # seconds a planned switch may go without a running VM before its CPUs are released
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """Expand a kernel cpulist ("0-3,8,10-11") into sorted CPU numbers."""
+    cpus: Set[int] = set()
+    for part in text.replace(" ", "").split(","):
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        cpus.update(range(int(low), int(high or low) + 1))
+    return sorted(cpus)
+
+
+def format_cpulist(cpus: List[int]) -> str:
+    """Compress CPU numbers into a kernel-style cpulist."""
+    ranges: List[Tuple[int, int]] = []
+    for cpu in sorted(set(cpus)):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1] = (ranges[-1][0], cpu)
+        else:
+            ranges.append((cpu, cpu))
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+
+class HostTopology:
+    """Online host CPUs with their physical core and NUMA node, from sysfs."""
+
+    def __init__(self, sys_root: Path = SYS_ROOT):
+        self.core_of: Dict[int, Tuple[int, int]] = {}  # cpu -> (package, core_id)
+        self.node_of: Dict[int, int] = {}
+        for cpu in parse_cpulist((sys_root / "cpu" / "online").read_text()):
+            topology = sys_root / "cpu" / f"cpu{cpu}" / "topology"
+            self.core_of[cpu] = (int((topology / "physical_package_id").read_text()), int((topology / "core_id").read_text()))
+            self.node_of[cpu] = 0
+        for node_dir in sys_root.glob("node/node[0-9]*"):
+            for cpu in parse_cpulist((node_dir / "cpulist").read_text()):
+                if cpu in self.node_of:
+                    self.node_of[cpu] = int(node_dir.name[4:])
+
+    @property
+    def cpus(self) -> List[int]:
+        """Online CPU numbers."""
+        return sorted(self.core_of)
+
+    def cores(self) -> Dict[Tuple[int, int], List[int]]:
+        """Physical core -> its SMT sibling CPUs."""
+        cores: Dict[Tuple[int, int], List[int]] = {}
+        for cpu in self.cpus:
+            cores.setdefault(self.core_of[cpu], []).append(cpu)
+        return cores
+
+
+class CPUPinner:
+    """Plans, persists and applies vCPU -> host CPU assignments."""
+
+    def __init__(self, plan_file: Path, reserved: str = "", topology: Optional[HostTopology] = None, registry: Optional[VMRegistry] = None):
+        self.plan_file = Path(plan_file)
+        self.reserved = set(parse_cpulist(reserved))
+        self.topology = topology or HostTopology()
+        self.registry = registry  # running switches; None = never prune
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self.plan_file.read_text()).get("switches", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, switches: Dict[str, Dict]) -> None:
+        self.plan_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.plan_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"reserved": sorted(self.reserved), "switches": switches}, indent=2, sort_keys=True))
+        os.replace(tmp, self.plan_file)
+
+    def load_plan(self) -> Dict[str, Dict]:
+        """The persisted plan: name -> {"vcpus", "node", "cpus"}."""
+        return self._load()
+
+    def plan(self, demands: List[Tuple[str, int, Optional[int]]], save: bool = True) -> Dict[str, Dict]:
+        """Assign host CPUs for (name, vcpus, host_node) demands and return the full plan.
+
+        Existing entries are kept when the vCPU count and node still match and
+        their CPUs are still online and unreserved, so restarts reuse them.
+        Entries of other switches are dropped once they are PRUNE_AFTER seconds
+        old and their VM is not in the registry.
+        The plan file is flocked for the read-modify-write; concurrent
+        launchers (threads or processes) serialize on it.
+        """
+        if not save:
+            return self._merge(self._load(), demands)
+        self.plan_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.plan_file.with_suffix(".lock"), "w", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            switches = self._merge(self._load(), demands)
+            self._save(switches)
+        return switches
+
+    def _merge(self, switches: Dict[str, Dict], demands: List[Tuple[str, int, Optional[int]]]) -> Dict[str, Dict]:
+        now = time.time()
+        if self.registry is not None:
+            keep = {entry["name"] for entry in self.registry.entries("nexus9000v")} | {name for name, _, _ in demands}
+            # The grace period covers switches planned by a launcher that has not started their QEMU yet
+            switches = {name: entry for name, entry in switches.items() if name in keep or now - entry.get("planned", 0) < PRUNE_AFTER}
+        usable = set(self.topology.cpus) - self.reserved
+        for name, vcpus, node in demands:
+            entry = switches.get(name)
+            if entry and entry["vcpus"] == vcpus and (node is None or entry["node"] == node) and set(entry["cpus"]) <= usable:
+                entry["planned"] = now
+                continue
+            switches.pop(name, None)
+            load = Counter(cpu for other in switches.values() for cpu in other["cpus"])
+            chosen_node, cpus = self._assign(vcpus, node, load)
+            switches[name] = {"vcpus": vcpus, "node": chosen_node, "cpus": cpus, "planned": now}
+        return switches
+
+    def _assign(self, vcpus: int, node: Optional[int], load: Counter) -> Tuple[int, List[int]]:
+        """Greedy pick: least-loaded CPU on the least-loaded core, one at a time."""
+        usable = [cpu for cpu in self.topology.cpus if cpu not in self.reserved]
+        if not usable:
+            raise RuntimeError("cpu_reserved leaves no host CPUs for switches")
+        by_node: Dict[int, List[int]] = {}
+        for cpu in usable:
+            by_node.setdefault(self.topology.node_of[cpu], []).append(cpu)
+        if node is None or node not in by_node:
+            node = min(by_node, key=lambda n: (sum(load[c] for c in by_node[n]) / len(by_node[n]), n))
+        candidates = by_node[node] if len(by_node[node]) >= vcpus else usable
+
+        load = Counter(load)
+        cpus: List[int] = []
+        for _ in range(vcpus):
+            core_load: Counter = Counter()
+            for cpu in candidates:
+                core_load[self.topology.core_of[cpu]] += load[cpu]
+            free = [cpu for cpu in candidates if cpu not in cpus] or candidates
+            cpu = min(free, key=lambda c: (load[c], core_load[self.topology.core_of[c]], c))
+            load[cpu] += 1
+            cpus.append(cpu)
+        return node, cpus
+
+    def oversubscription(self, switches: Dict[str, Dict]) -> Dict[Tuple[int, int], float]:
+        """vCPUs per hardware thread on each physical core."""
+        load = Counter(cpu for entry in switches.values() for cpu in entry["cpus"])
+        return {core: sum(load[cpu] for cpu in siblings) / len(siblings) for core, siblings in self.topology.cores().items()}
+
+    def report(self, switches: Dict[str, Dict]) -> str:
+        """Human-readable plan with per-core oversubscription."""
+        lines = [f"{'SWITCH':<10} {'NODE':>4} {'VCPUS':>5}  HOST CPUS"]
+        for name, entry in sorted(switches.items()):
+            lines.append(f"{name:<10} {entry['node']:>4} {entry['vcpus']:>5}  {format_cpulist(entry['cpus'])}")
+        ratios = self.oversubscription(switches)
+        lines.append(f"\n{'CORE':<10} {'CPUS':<12} RATIO")
+        for core, siblings in sorted(self.topology.cores().items()):
+            flag = "  reserved" if set(siblings) <= self.reserved else ("  OVERSUBSCRIBED" if ratios[core] > 1 else "")
+            lines.append(f"{core[0]}/{core[1]:<8} {format_cpulist(siblings):<12} {ratios[core]:.2f}{flag}")
+        usable = len(set(self.topology.cpus) - self.reserved)
+        total = sum(entry["vcpus"] for entry in switches.values())
+        lines.append(f"\n{total} vCPUs on {usable} usable host CPUs: {total / max(usable, 1):.2f} vCPUs per CPU")
+        return "\n".join(lines)
+
+    @staticmethod
+    def vcpu_threads(pid: int, qmp_socket: Optional[str] = None, timeout: float = 10.0) -> Dict[int, int]:
+        """Map vCPU index -> host thread id for a running QEMU process."""
+        if qmp_socket and Path(qmp_socket).is_socket():
+            from qmp import QMPClient, QMPError  # pylint: disable=import-outside-toplevel
+
+            async def query() -> Dict[int, int]:
+                async with QMPClient(qmp_socket) as client:
+                    return await client.vcpu_thread_ids()
+
+            try:
+                return asyncio.run(query())
+            except QMPError:
+                pass  # fall back to /proc
+
+        deadline = time.monotonic() + timeout
+        while True:
+            threads = {}
+            for task in Path(f"/proc/{pid}/task").glob("*"):
+                try:
+                    match = VCPU_COMM.match((task / "comm").read_text().strip())
+                except OSError:
+                    continue
+                if match:
+                    threads[int(match.group(1))] = int(task.name)
+            if threads or time.monotonic() >= deadline:
+                return threads
+            time.sleep(0.2)  # vCPU threads appear shortly after QEMU starts
+
+    def apply(self, name: str, pid: int, qmp_socket: Optional[str] = None) -> Dict[int, int]:
+        """Pin a running switch's vCPU threads per the plan; returns vCPU -> host CPU."""
+        entry = self._load().get(name)
+        if entry is None:
+            raise RuntimeError(f"No CPU plan for {name}")
+        threads = self.vcpu_threads(pid, qmp_socket)
+        if len(threads) != entry["vcpus"]:
+            raise RuntimeError(f"{name}: found {len(threads)} vCPU threads in pid {pid}, plan has {entry['vcpus']}")
+        pinned = {}
+        for index, tid in sorted(threads.items()):
+            cpu = entry["cpus"][index]
+            os.sched_setaffinity(tid, {cpu})
+            pinned[index] = cpu
+        return pinned
+
+
+def main() -> int:
+    """CLI entry point: plan (without saving) and report, or show the saved plan."""
+    from nexus9000v import ConfigLoader  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Plan vCPU pinning and report host CPU oversubscription")
+    parser.add_argument("--site", type=int, action="append", help="Only switches of this site (repeatable)")
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
+    parser.add_argument("--show", action="store_true", help="Report the persisted plan instead of planning")
+    args = parser.parse_args()
+
+    global_config = ConfigLoader.load_global_config(args.global_config)
+    pinner = CPUPinner(Path(global_config.cpu_plan_file), global_config.cpu_reserved, registry=VMRegistry(global_config.registry_file))
+    if args.show:
+        switches = pinner.load_plan()
+    else:
+        configs = ConfigLoader.load_fabric_configs(Path.cwd(), args.site)
+        demands = [(c.name, c.vcpus or global_config.default_vcpus, c.host_numa_node) for c in configs]
+        switches = pinner.plan(demands, save=False)
+    print(pinner.report(switches))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 #!/bin/bash
 # Script to expand bootflash in Nexus 9000v image
 # Run this BEFORE creating VMs
+#
+# NOTE: nexus9000v.py does this automatically when golden_cache_path and
+# golden_bootflash_size are set in global_config.yaml (the expanded image is
+# built once per image/disk size and cached). This script remains for manual use.
 
 SOURCE_IMAGE="/iso1/nxos/nexus9300v64.10.3.8.M.qcow2"
 MODIFIED_IMAGE="/iso1/nxos/nexus9300v64.10.3.8.M-expanded.qcow2"
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Shared, cached loader for the lab's topology YAML.
+
+Every tool that reads the per-VM YAML (nexus9000v.py, 8000v.py,
+startup_config.py, capacity.py, reconcile.py, supervisor.py, the container
+builder and populate_netbox.py) goes through load_yaml()/load_many() here
+instead of calling yaml.safe_load itself.
+
+Parsing uses libyaml's CSafeLoader when PyYAML was built with it (an order of
+magnitude faster than the pure-Python SafeLoader it falls back to). Parsed
+documents are cached in one JSON file (default ~/.cache/n9kv/yaml-cache.json,
+or $N9KV_YAML_CACHE) keyed by absolute path:
+
+    - same mtime, size and inode as recorded: the cached document is used and
+      the file is not even opened;
+    - stat changed but the SHA-256 of the content did not (touch, git checkout
+      of identical content): cached document, new stat recorded;
+    - otherwise the file is parsed again.
+
+load_many() reads and writes the cache file once for the whole batch, so a
+fabric of hundreds of switches costs one JSON load plus a stat per file. Typed
+validation (SwitchConfig, RouterConfig, ContainerSpec) stays with the tools
+that own those dataclasses; constructing them from the cached dicts is cheap.
+Documents JSON cannot represent exactly (YAML timestamps, sets, non-string
+mapping keys) are parsed every time.
+The cache is only a speed-up: if it is unreadable or unwritable, files are
+simply parsed.
+
+Usage:
+    python3 fabric.py stats [--json]     # cache location, entries, loader
+    python3 fabric.py warm S*.yaml ../8000v/WAN1.yaml
+    python3 fabric.py clear
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import yaml
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+CACHE_VERSION = 1
+DEFAULT_CACHE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "n9kv" / "yaml-cache.json"
+
+
+def cache_path() -> Path:
+    """The cache file: $N9KV_YAML_CACHE, else ~/.cache/n9kv/yaml-cache.json."""
+    return Path(os.environ.get("N9KV_YAML_CACHE") or DEFAULT_CACHE)
+
+
+class YAMLCache:
+    """Parsed YAML documents by absolute path, persisted between runs."""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path or cache_path()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._loaded = False
+        self._dirty = False
+
+    def read(self) -> None:
+        """Load the cache file once; a missing, corrupt or outdated file is an empty cache."""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION and data.get("loader") == Loader.__name__:
+            self.entries = data.get("entries") or {}
+
+    def save(self) -> None:
+        """Write the cache back if anything changed; failures are ignored."""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": CACHE_VERSION, "loader": Loader.__name__, "entries": self.entries}), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def load(self, path: Path) -> Any:
+        """path's parsed document, from the cache when the file is unchanged."""
+        self.read()
+        path = Path(path).resolve()
+        key = str(path)
+        st = path.stat()
+        stamp = [st.st_mtime_ns, st.st_size, st.st_ino]
+        cached = self.entries.get(key)
+        if cached is not None and cached["stamp"] == stamp:
+            self.hits += 1
+            return copy.deepcopy(cached["data"])
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if cached is not None and cached["sha256"] == digest:
+            self.hits += 1
+            cached["stamp"] = stamp
+            self._dirty = True
+            return copy.deepcopy(cached["data"])
+        self.misses += 1
+        data = yaml.load(raw, Loader=Loader)  # Loader is CSafeLoader/SafeLoader
+        try:
+            # Only documents that survive JSON unchanged: non-string keys (ports: {22: ...}) would come back as strings
+            cacheable = json.loads(json.dumps(data)) == data
+        except (TypeError, ValueError):
+            cacheable = False
+        if cacheable:
+            self.entries[key] = {"stamp": stamp, "sha256": digest, "data": copy.deepcopy(data)}
+        else:
+            self.entries.pop(key, None)
+        self._dirty = True
+        return data
+
+
+_cache: Optional[YAMLCache] = None
+
+
+def shared_cache() -> YAMLCache:
+    """The process-wide cache (created on first use)."""
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        _cache = YAMLCache()
+    return _cache
+
+
+def load_many(paths: Iterable[Path]) -> List[Any]:
+    """Parsed documents of paths, in order; the cache file is read and written once."""
+    cache = shared_cache()
+    try:
+        return [cache.load(Path(path)) for path in paths]
+    finally:
+        cache.save()
+
+
+def load_yaml(path: Path) -> Any:
+    """One parsed YAML document (None for an empty file)."""
+    return load_many([path])[0]
+
+
+def fabric_paths(config_dir: Path, sites: Optional[Iterable[int]] = None) -> List[Path]:
+    """Every S<site>_*.yaml switch config in config_dir, optionally limited to the given sites."""
+    prefixes = tuple(f"S{site}_" for site in sites or ())
+    return [path for path in sorted(Path(config_dir).glob("S*_*.yaml")) if not path.name.endswith(".netplan.yaml") and (not prefixes or path.name.startswith(prefixes))]
+
+
+def load_switches(config_dir: Path, sites: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+    """The switch configs of config_dir as dicts, sorted by file name."""
+    return [data or {} for data in load_many(fabric_paths(config_dir, sites))]
+
+
+def main() -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Inspect and manage the parsed-YAML cache")
+    sub = parser.add_subparsers(dest="command", required=True)
+    stats_parser = sub.add_parser("stats", help="Cache file, entry count and YAML loader")
+    stats_parser.add_argument("--json", action="store_true", help="Print JSON")
+    warm_parser = sub.add_parser("warm", help="Parse files into the cache")
+    warm_parser.add_argument("files", nargs="+", type=Path)
+    sub.add_parser("clear", help="Delete the cache file")
+    args = parser.parse_args()
+
+    cache = shared_cache()
+    if args.command == "clear":
+        try:
+            cache.path.unlink()
+        except FileNotFoundError:
+            pass
+        print(f"Removed {cache.path}")
+        return 0
+
+    if args.command == "warm":
+        try:
+            load_many(args.files)
+        except (OSError, yaml.YAMLError) as e:
+            print(f"Error: {e}")
+            return 1
+        print(f"{len(args.files)} file(s): {cache.hits} cached, {cache.misses} parsed")
+        return 0
+
+    cache.read()
+    stale = sum(1 for key in cache.entries if not Path(key).exists())
+    stats = {"path": str(cache.path), "loader": Loader.__name__, "entries": len(cache.entries), "missing_files": stale}
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        for key, value in stats.items():
+            print(f"{key:<14} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
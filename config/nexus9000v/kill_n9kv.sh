@@ -5,8 +5,9 @@
 # NOTE: these VMs are launched as raw qemu-system-x86_64 processes (see
 # nexus9000v.py), NOT as libvirt domains,
 # so "virsh destroy" does not apply -- they don't appear in "virsh list".
-# We therefore match the QEMU processes the same way list_n9kv.sh does and
-# kill them by PID.
+# nexus9000v.py records each VM it starts (pid + process start time) in the
+# runtime registry (/run/n9kv/registry.json); registry.py kills through a
+# pidfd after re-checking the start time, so a recycled PID is never hit.
 #
 # Usage:
 #   ./kill_n9kv.sh          # graceful TERM
@@ -31,23 +32,8 @@ for arg in "$@"; do
     esac
 done
 
-# grep -v grep avoids matching this pipeline's own grep process.
-# PID is field 2 of "ps -ef"; the switch name follows the "-name" QEMU flag.
-# Emit "PID name" per line (name defaults to "?" if -name is absent).
-MATCHES=$(ps -ef | grep manufacturer=Cisco,product=Nexus9000 | grep -v grep \
-    | awk '{ name="?"; for (i=1;i<=NF;i++) if ($i=="-name") name=$(i+1); print $2, name }')
+ARGS=(kill --all --kind nexus9000v)
+[ "$SIGNAL" = KILL ] && ARGS+=(-9)
+[ "$DRY_RUN" -eq 1 ] && ARGS+=(-n)
 
-if [ -z "$MATCHES" ]; then
-    echo "No nexus9000v processes found."
-    exit 0
-fi
-
-while read -r pid name; do
-    [ -z "$pid" ] && continue
-    if [ "$DRY_RUN" -eq 1 ]; then
-        echo "Would kill $name (PID $pid, SIG$SIGNAL)"
-    else
-        echo "Killing $name (PID $pid, SIG$SIGNAL)"
-        sudo kill -"$SIGNAL" "$pid"
-    fi
-done <<< "$MATCHES"
+sudo python3 "$(dirname "$0")/registry.py" "${ARGS[@]}"
@@ -1,3 +1,10 @@
 #!/usr/bin/env bash
+#
+# List running nexus9000v VMs from the launcher's runtime registry
+# (/run/n9kv/registry.json, see registry.py) instead of grepping ps.
+#
+# Usage:
+#   ./list_n9kv.sh          # table
+#   ./list_n9kv.sh --json   # full registry entries
 
-ps -ef | grep manufacturer=Cisco,product=Nexus9000
+exec python3 "$(dirname "$0")/registry.py" list --kind nexus9000v "$@"
@@ -12,12 +12,34 @@ multicast frames (other-config:forward-bpdu=true) so LACP / STP / LLDP / CDP
 PDUs cross the link -- without this, vPC peer-links never bundle.
 """
 
+import asyncio
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import select
+import signal
+import socket
+import struct
 import subprocess
 import sys
+import threading
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass, field
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Set, Tuple
+
+from capacity import CapacityPlanner, CapacityReport, HostCapacity, vm_demand
+from cpu_pinning import CPUPinner
+from fabric import fabric_paths, load_many, load_yaml
+from qmp import QMPPool
+from registry import VMRegistry, process_start_time, qemu_vms
+from snapshot import SnapshotStore
+from topology import Topology, switch_device
 
 try:
     import yaml
@@ -41,11 +63,76 @@ class GlobalConfig:  # pylint: disable=too-many-instance-attributes
     default_vcpus: int = 4
     default_disk_size: str = "32G"
     default_interface_type: str = "e1000"
+    # virtio-net-pci only: vhost-net kernel datapath and multiqueue (queues per NIC)
+    default_vhost: bool = False  # opt in: true switches existing virtio NICs to the vhost-net datapath
+    default_net_queues: int = 1
+    # "clone" = full cp of the base image; "overlay" = thin qcow2 backed by the read-only base
+    default_disk_mode: str = "clone"
+
+    # Guest RAM: "ram" (anonymous memory) or "hugepages" (memory-backend-file on hugetlbfs)
+    memory_backend: str = "ram"
+    hugepage_path: str = "/dev/hugepages"
+    mem_prealloc: bool = False  # fault in all guest RAM at start instead of during boot
+    # KSM: True marks guest RAM mergeable (merge=on), False opts out; None leaves QEMU's default.
+    # Has no effect on hugepage-backed RAM. Host-side scanning is tuned with ksm.py.
+    mem_merge: Optional[bool] = None
+    # Host NUMA binding: "none", or "auto" to spread VMs across nodes by free memory (NUMAPlacer)
+    numa_placement: str = "none"
+
+    # Block layer, both disks. aio=native needs O_DIRECT (disk_cache none/directsync).
+    disk_cache: str = "writethrough"  # writethrough | writeback | none | directsync
+    disk_aio: str = "threads"  # threads | native | io_uring
+    disk_discard: bool = False  # pass guest TRIM through (discard=unmap) so qcow2 clusters are freed
+    # "sata" (AHCI, as NX-OS expects) or "virtio" (virtio-blk, one dedicated iothread per disk)
+    disk_bus: str = "sata"
+    # vCPU pinning (cpu_pinning.py): one host CPU per vCPU, plan persisted across restarts
+    cpu_pinning: bool = False
+    cpu_reserved: str = ""  # host cpulist never given to switches, e.g. "0-1,16-31" for the host and ND
+    cpu_plan_file: str = "/var/lib/n9kv/cpu_plan.json"
+    # Host admission check before launch (capacity.py): "off", "warn" or "enforce" (refuse to launch)
+    admission: str = "warn"
+    mem_reserve_mb: int = 8192  # host RAM never given to guests
+    max_vcpu_ratio: float = 2.0  # vCPUs per host CPU before a launch is refused
 
     # External storage settings
     default_external_storage_size: str = "20G"  # Add this
     external_storage_enabled: bool = True  # Add this
 
+    # Host TAP creation: "ip" (iproute2, one ip -batch) or "netlink" (in-process ioctl/rtnetlink)
+    tap_backend: str = "ip"
+
+    # Golden image cache: one pre-resized (and optionally bootflash-expanded)
+    # copy of each base image per disk size, shared by every switch. None disables.
+    golden_cache_path: Optional[str] = None
+    golden_cache_max_size: str = "200G"
+    golden_bootflash_size: Optional[str] = None  # e.g. "16GB" (parted units); None = resize only
+
+    # QMP (machine-readable monitor) Unix sockets, one <name>.qmp per VM; see qmp.py
+    qmp_socket_dir: str = "/run/n9kv"
+    # Runtime registry of launched VMs (registry.py): pid + start time, ports, TAPs, disks
+    registry_file: str = "/run/n9kv/registry.json"
+    # Per-VM logs kept for supervisor.py crash reports: <name>.console.log (serial console,
+    # appended) and <name>.qemu.log (QEMU stderr). None = no logs, console on plain telnet
+    console_log_dir: Optional[str] = None
+    # Warm-start snapshots (snapshot.py), one directory per switch; None = <cdrom_path>/snapshots
+    snapshot_path: Optional[str] = None
+
+    def snapshot_dir(self) -> Path:
+        """Root of the warm-start snapshots."""
+        return Path(self.snapshot_path or Path(self.cdrom_path) / "snapshots")
+
+    def disk_dirs(self) -> List[Path]:
+        """Directories holding switch disks: cdrom_path and the snapshot root (overlays there keep their golden images)."""
+        return [Path(self.cdrom_path), self.snapshot_dir()]
+
+    def qmp_socket(self, name: str) -> str:
+        """Path of the QMP socket for VM name."""
+        return str(Path(self.qmp_socket_dir) / f"{name}.qmp")
+
+    def vm_log(self, name: str, log: str) -> Optional[Path]:
+        """<console_log_dir>/<name>.<log>.log ("console" or "qemu"), or None if logging is off."""
+        return Path(self.console_log_dir) / f"{name}.{log}.log" if self.console_log_dir else None
+
 
 @dataclass
 class NetworkInterface:
@@ -56,6 +143,13 @@ class NetworkInterface:
     mac: str
     interface_type: str = "e1000"
     tap: Optional[str] = None  # host-side TAP device attached to the OVS bridge
+    vhost: bool = False  # virtio only
+    queues: int = 1  # virtio only; >1 needs a multi_queue TAP
+
+    @property
+    def is_virtio(self) -> bool:
+        """True for virtio-net NIC models."""
+        return self.interface_type.startswith("virtio-net")
 
 
 @dataclass
@@ -81,7 +175,19 @@ class SwitchConfig:  # pylint: disable=too-many-instance-attributes
     vcpus: Optional[int] = None
     disk_size: Optional[str] = None
     interface_type: Optional[str] = None
+    interface_types: Dict[str, str] = field(default_factory=dict)  # per-NIC model: "mgmt" or an isl_bridges name -> model
+    vhost: Optional[bool] = None
+    net_queues: Optional[int] = None
     image_name: Optional[str] = None
+    disk_mode: Optional[str] = None  # "clone" or "overlay"
+    memory_backend: Optional[str] = None  # "ram" or "hugepages"
+    disk_cache: Optional[str] = None
+    disk_aio: Optional[str] = None
+    disk_discard: Optional[bool] = None
+    disk_bus: Optional[str] = None
+    mem_prealloc: Optional[bool] = None
+    mem_merge: Optional[bool] = None
+    host_numa_node: Optional[int] = None  # bind guest RAM to this host node (overrides numa_placement)
 
     # External storage settings
     external_storage_size: Optional[str] = None  # Add this
@@ -93,6 +199,17 @@ class SwitchConfig:  # pylint: disable=too-many-instance-attributes
             raise ValueError(f"SID must be a 4-digit value between 1000-9999, got {self.sid}")
         if len(self.neighbors) != len(self.isl_bridges):
             raise ValueError("Number of neighbors must match number of ISL bridges")
+        if self.disk_mode is not None and self.disk_mode not in DiskManager.DISK_MODES:
+            raise ValueError(f"disk_mode must be one of {DiskManager.DISK_MODES}, got {self.disk_mode!r}")
+        unknown = set(self.interface_types) - {"mgmt", *self.isl_bridges}
+        if unknown:
+            raise ValueError(f"interface_types keys must be 'mgmt' or one of isl_bridges, got {sorted(unknown)}")
+        if self.net_queues is not None and self.net_queues < 1:
+            raise ValueError(f"net_queues must be >= 1, got {self.net_queues}")
+        for option, choices in NexusQEMUBuilder.OPTION_CHOICES.items():
+            value = getattr(self, option)
+            if value is not None and value not in choices:
+                raise ValueError(f"{option} must be one of {choices}, got {value!r}")
 
     @property
     def telnet_port(self) -> int:
@@ -105,6 +222,18 @@ class SwitchConfig:  # pylint: disable=too-many-instance-attributes
         return 20000 + self.sid
 
 
+def console_args(telnet_port: int, log: Optional[Path]) -> List[str]:
+    """QEMU args for the serial console on telnet localhost:telnet_port, also appended to log if given."""
+    if log is None:
+        return ["-serial", f"telnet:localhost:{telnet_port},server=on,wait=off"]
+    return [
+        "-chardev",
+        f"socket,id=console0,host=localhost,port={telnet_port},telnet=on,server=on,wait=off,logfile={log},logappend=on",
+        "-serial",
+        "chardev:console0",
+    ]
+
+
 class MACAddressGenerator(Protocol):
     """Protocol for MAC address generation strategies."""
 
@@ -166,6 +295,14 @@ class QEMUCommandBuilder(ABC):  # pylint: disable=too-few-public-methods
 class NexusQEMUBuilder(QEMUCommandBuilder):  # pylint: disable=too-few-public-methods
     """QEMU command builder for Nexus 9000v switches."""
 
+    # Allowed values of options settable both globally and per switch
+    OPTION_CHOICES = {
+        "memory_backend": ("ram", "hugepages"),
+        "disk_cache": ("writethrough", "writeback", "none", "directsync"),
+        "disk_aio": ("threads", "native", "io_uring"),
+        "disk_bus": ("sata", "virtio"),
+    }
+
     def build_command(self, config: SwitchConfig, global_config: GlobalConfig, interfaces: List[NetworkInterface]) -> List[str]:
         """Build complete QEMU command for Nexus switch."""
 
@@ -217,59 +354,91 @@ class NexusQEMUBuilder(QEMUCommandBuilder):  # pylint: disable=too-few-public-me
             "-m",
             str(ram),
             "-object",
-            f"memory-backend-ram,id=ram-node0,size={ram}M",
+            self._build_memory_backend(config, global_config, ram, vcpus),
             "-numa",
             f"node,nodeid=0,cpus=0-{vcpus-1},memdev=ram-node0",
         ]
 
+    @staticmethod
+    def _build_memory_backend(config: SwitchConfig, global_config: GlobalConfig, ram: int, vcpus: int) -> str:
+        """Guest RAM backend object, with optional prealloc, KSM merging and host NUMA binding."""
+        merge = config.mem_merge if config.mem_merge is not None else global_config.mem_merge
+        if (config.memory_backend or global_config.memory_backend) == "hugepages":
+            backend = f"memory-backend-file,id=ram-node0,size={ram}M,mem-path={global_config.hugepage_path}"
+        else:
+            backend = f"memory-backend-ram,id=ram-node0,size={ram}M"
+            if merge is not None:
+                backend += f",merge={'on' if merge else 'off'}"
+        prealloc = config.mem_prealloc if config.mem_prealloc is not None else global_config.mem_prealloc
+        if prealloc:
+            backend += f",prealloc=on,prealloc-threads={vcpus}"
+        if config.host_numa_node is not None:
+            backend += f",host-nodes={config.host_numa_node},policy=bind"
+        return backend
+
     def _build_storage_args(self, config: SwitchConfig, global_config: GlobalConfig) -> List[str]:
-        """Build storage-related arguments."""
+        """Build storage-related arguments.
+
+        On the sata bus both disks sit on one AHCI controller, whose emulation
+        runs in QEMU's main loop. The virtio bus gives each disk a virtio-blk
+        device with its own iothread.
+        """
         cdrom_image = Path(global_config.cdrom_path) / f"{config.name}.iso"
-        vm_disk = Path(global_config.cdrom_path) / f"{config.name}.qcow2"
-
-        args = [
-            "-device",
-            "ahci,id=ahci0,bus=pcie.0",
-            "-drive",
-            f"file={cdrom_image},media=cdrom",
-            "-drive",
-            f"file={vm_disk},if=none,id=drive-sata-disk0,format=qcow2,cache=writethrough",
-            "-device",
-            "ide-hd,bus=ahci0.0,drive=drive-sata-disk0,bootindex=1",
-        ]
+        disks = [Path(global_config.cdrom_path) / f"{config.name}.qcow2"]
 
         # Add external storage if enabled
         enable_external = config.enable_external_storage
         if enable_external is None:
             enable_external = global_config.external_storage_enabled
-
         if enable_external:
-            external_disk = Path(global_config.cdrom_path) / f"{config.name}_external.qcow2"
-            args.extend([
-                "-drive",
-                f"file={external_disk},if=none,id=drive-sata-disk1,format=qcow2,cache=writethrough",
-                "-device",
-                "ide-hd,bus=ahci0.1,drive=drive-sata-disk1",
-            ])
-
+            disks.append(Path(global_config.cdrom_path) / f"{config.name}_external.qcow2")
+
+        bus = config.disk_bus or global_config.disk_bus
+        drive_options = self._build_drive_options(config, global_config)
+        args = ["-device", "ahci,id=ahci0,bus=pcie.0"] if bus == "sata" else []
+        args.extend(["-drive", f"file={cdrom_image},media=cdrom"])
+        for index, disk in enumerate(disks):
+            drive_id = f"drive-{bus}-disk{index}"
+            boot = ",bootindex=1" if index == 0 else ""
+            args.extend(["-drive", f"file={disk},if=none,id={drive_id},format=qcow2,{drive_options}"])
+            if bus == "virtio":
+                args.extend(["-object", f"iothread,id=iothread-disk{index}", "-device", f"virtio-blk-pci,drive={drive_id},iothread=iothread-disk{index}{boot}"])
+            else:
+                args.extend(["-device", f"ide-hd,bus=ahci0.{index},drive={drive_id}{boot}"])
         return args
 
+    @staticmethod
+    def _build_drive_options(config: SwitchConfig, global_config: GlobalConfig) -> str:
+        """cache/aio/discard options shared by every -drive of a switch."""
+        cache = config.disk_cache or global_config.disk_cache
+        aio = config.disk_aio or global_config.disk_aio
+        if aio == "native" and cache not in ("none", "directsync"):
+            raise ValueError(f"{config.name}: disk_aio native requires disk_cache none or directsync (O_DIRECT), got {cache}")
+        options = f"cache={cache},aio={aio}"
+        discard = config.disk_discard if config.disk_discard is not None else global_config.disk_discard
+        if discard:
+            options += ",discard=unmap,detect-zeroes=unmap"
+        return options
+
     def _build_network_args(self, interfaces: List[NetworkInterface]) -> List[str]:
         """Build network interface arguments.
 
         TAPs are pre-created and attached to OVS by OVSPortManager, so QEMU
-        must NOT manage them: script=no / downscript=no.
+        must NOT manage them: script=no / downscript=no. virtio NICs may add
+        vhost=on (packets handled by the vhost-net kernel thread instead of
+        QEMU's main loop) and queues=N with one MSI-X vector pair per queue.
         """
         args = []
         for iface in interfaces:
-            args.extend(
-                [
-                    "-netdev",
-                    f"tap,id={iface.name},ifname={iface.tap},script=no,downscript=no",
-                    "-device",
-                    f"{iface.interface_type},netdev={iface.name},mac={iface.mac}",
-                ]
-            )
+            netdev = f"tap,id={iface.name},ifname={iface.tap},script=no,downscript=no"
+            device = f"{iface.interface_type},netdev={iface.name},mac={iface.mac}"
+            if iface.is_virtio:
+                if iface.vhost:
+                    netdev += ",vhost=on"
+                if iface.queues > 1:
+                    netdev += f",queues={iface.queues}"
+                    device += f",mq=on,vectors={2 * iface.queues + 2}"
+            args.extend(["-netdev", netdev, "-device", device])
         return args
 
     def _build_misc_args(self, config: SwitchConfig, global_config: GlobalConfig) -> List[str]:
@@ -283,15 +452,68 @@ class NexusQEMUBuilder(QEMUCommandBuilder):  # pylint: disable=too-few-public-me
             "-nographic",
             "-bios",
             global_config.bios_file,
-            "-serial",
-            f"telnet:localhost:{telnet_port},server=on,wait=off",
+            *console_args(telnet_port, global_config.vm_log(config.name, "console")),
             "-monitor",
             f"telnet:localhost:{monitor_port},server,nowait",
+            "-qmp",
+            f"unix:{global_config.qmp_socket(config.name)},server=on,wait=off",
             "-name",
             config.name,
         ]
 
 
+class NUMAPlacer:
+    """Spread guest RAM across host NUMA nodes by free memory.
+
+    Free memory per node comes from /sys/devices/system/node/node*/meminfo, or
+    from the node's free hugepages for hugepage-backed guests. Each placement
+    is reserved against its node, so a fabric launched in one go is balanced
+    before any guest has touched its memory.
+    """
+
+    NODE_ROOT = Path("/sys/devices/system/node")
+
+    def __init__(self, node_root: Optional[Path] = None):
+        self.node_root = node_root or self.NODE_ROOT
+        self._reserved: Dict[Tuple[bool, int], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def free_mb(self, hugepages: bool = False) -> Dict[int, int]:
+        """Free MB per host node (free hugepages only, if hugepages)."""
+        free = {}
+        for node_dir in self.node_root.glob("node[0-9]*"):
+            node = int(node_dir.name[4:])
+            if hugepages:
+                free[node] = sum(
+                    int((pool / "free_hugepages").read_text()) * int(pool.name.removeprefix("hugepages-").removesuffix("kB")) // 1024
+                    for pool in (node_dir / "hugepages").glob("hugepages-*kB")
+                )
+                continue
+            for line in (node_dir / "meminfo").read_text().splitlines():
+                fields = line.split()  # "Node 0 MemFree:  123456 kB"
+                if len(fields) >= 4 and fields[2] == "MemFree:":
+                    free[node] = int(fields[3]) // 1024
+        return free
+
+    def place(self, ram_mb: int, hugepages: bool = False) -> Optional[int]:
+        """Reserve ram_mb on the node with the most unreserved free memory.
+
+        Returns None on single-node hosts (nothing to bind). Hugepage-backed
+        guests must fit entirely in one node's free pool or RuntimeError is
+        raised, since QEMU would otherwise fail after the launch was reported.
+        """
+        with self._lock:
+            free = self.free_mb(hugepages)
+            if not free:
+                return None
+            available = {node: mb - self._reserved[(hugepages, node)] for node, mb in free.items()}
+            node = max(available, key=lambda n: available[n])
+            if hugepages and available[node] < ram_mb:
+                raise RuntimeError(f"No host NUMA node has {ram_mb} MB of free hugepages (free after reservations: {available})")
+            self._reserved[(hugepages, node)] += ram_mb
+            return node if len(free) > 1 else None
+
+
 class ProcessValidator:  # pylint: disable=too-few-public-methods
     """Validates system requirements and process status."""
 
@@ -301,8 +523,6 @@ class ProcessValidator:  # pylint: disable=too-few-public-methods
         issues = []
 
         # Check if running as root/sudo
-        import os  # pylint: disable=import-outside-toplevel
-
         if os.geteuid() != 0:
             issues.append("Script should be run with sudo for TAP/OVS access")
 
@@ -312,6 +532,9 @@ class ProcessValidator:  # pylint: disable=too-few-public-methods
         except (subprocess.CalledProcessError, FileNotFoundError):
             issues.append("KVM may not be available or kvm-ok not installed")
 
+        if not Path("/dev/vhost-net").exists():
+            issues.append("/dev/vhost-net missing (modprobe vhost_net); virtio NICs with vhost will not start")
+
         # Check if bridges exist (we'll check this in the VM manager)
         return issues
 
@@ -334,14 +557,140 @@ class ProcessValidator:  # pylint: disable=too-few-public-methods
     def check_process_running(pid: int) -> bool:
         """Check if a process is still running."""
         try:
-            import os  # pylint: disable=import-outside-toplevel
-
             os.kill(pid, 0)
             return True
         except OSError:
             return False
 
 
+class TapBackend(ABC):
+    """Strategy for creating/deleting host TAP devices (OVS attachment is separate)."""
+
+    @abstractmethod
+    def create_taps(self, taps: List[str], mtu: int, multi_queue: Optional[Set[str]] = None) -> None:
+        """Create persistent TAPs (replacing stale ones), set MTU and bring them up.
+
+        Taps named in multi_queue are created with IFF_MULTI_QUEUE so QEMU can
+        attach several queues (netdev queues=N) to them.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_taps(self, taps: List[str]) -> None:
+        """Delete TAPs; names that do not exist are ignored."""
+        raise NotImplementedError
+
+    @staticmethod
+    def tap_exists(tap: str) -> bool:
+        """True if tap exists in the caller's network namespace (ioctl, no fork)."""
+        try:
+            socket.if_nametoindex(tap)
+            return True
+        except OSError:
+            return False
+
+
+class IPRouteTapBackend(TapBackend):
+    """TAP lifecycle through iproute2, batched into a single ``ip -batch`` process."""
+
+    @staticmethod
+    def _ip_batch(lines: List[str]) -> None:
+        """Apply many ip(8) commands in a single process (ip -batch)."""
+        if not lines:
+            return
+        result = subprocess.run(["ip", "-batch", "-"], input="\n".join(lines) + "\n", capture_output=True, text=True, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(f"ip -batch failed: {result.stderr.strip()}")
+
+    def create_taps(self, taps: List[str], mtu: int, multi_queue: Optional[Set[str]] = None) -> None:
+        lines = []
+        for tap in taps:
+            if self.tap_exists(tap):  # clear stale state from a prior run
+                lines.append(f"link del dev {tap}")
+            lines.append(f"tuntap add dev {tap} mode tap" + (" multi_queue" if multi_queue and tap in multi_queue else ""))
+            lines.append(f"link set dev {tap} mtu {mtu} up")
+        self._ip_batch(lines)
+
+    def delete_taps(self, taps: List[str]) -> None:
+        self._ip_batch([f"link del dev {tap}" for tap in taps if self.tap_exists(tap)])
+
+
+class NetlinkTapBackend(TapBackend):
+    """TAP lifecycle in-process: TUNSETIFF/TUNSETPERSIST ioctls plus rtnetlink.
+
+    Equivalent to ``ip tuntap add ... mode tap`` + ``ip link set mtu/up`` +
+    ``ip link del`` without any fork/exec. Needs only CAP_NET_ADMIN in the
+    current network namespace, so it runs under ``unshare -rn`` unprivileged.
+    """
+
+    TUNSETIFF = 0x400454CA
+    TUNSETPERSIST = 0x400454CB
+    IFF_TAP = 0x0002
+    IFF_NO_PI = 0x1000
+    IFF_MULTI_QUEUE = 0x0100
+    IFF_UP = 0x1
+
+    RTM_NEWLINK = 16
+    RTM_DELLINK = 17
+    NLM_F_REQUEST = 0x1
+    NLM_F_ACK = 0x4
+    NLMSG_ERROR = 2
+    IFLA_MTU = 4
+
+    def create_taps(self, taps: List[str], mtu: int, multi_queue: Optional[Set[str]] = None) -> None:
+        stale = [tap for tap in taps if self.tap_exists(tap)]
+        if stale:
+            self.delete_taps(stale)
+        for tap in taps:
+            self._create_persistent_tap(tap, bool(multi_queue and tap in multi_queue))
+        with self._rtnl() as sock:
+            for seq, tap in enumerate(taps, 1):
+                mtu_attr = struct.pack("=HHI", 8, self.IFLA_MTU, mtu)
+                self._request(sock, self.RTM_NEWLINK, seq, socket.if_nametoindex(tap), self.IFF_UP, self.IFF_UP, mtu_attr)
+
+    def delete_taps(self, taps: List[str]) -> None:
+        with self._rtnl() as sock:
+            for seq, tap in enumerate(taps, 1):
+                if self.tap_exists(tap):
+                    self._request(sock, self.RTM_DELLINK, seq, socket.if_nametoindex(tap), 0, 0, b"")
+
+    def _create_persistent_tap(self, tap: str, multi_queue: bool = False) -> None:
+        if len(tap) > 15:  # IFNAMSIZ
+            raise ValueError(f"TAP name exceeds 15 chars: {tap}")
+        flags = self.IFF_TAP | self.IFF_NO_PI | (self.IFF_MULTI_QUEUE if multi_queue else 0)
+        fd = os.open("/dev/net/tun", os.O_RDWR)
+        try:
+            ifreq = struct.pack("16sH22x", tap.encode(), flags)
+            fcntl.ioctl(fd, self.TUNSETIFF, ifreq)
+            fcntl.ioctl(fd, self.TUNSETPERSIST, 1)  # survive close(); QEMU re-attaches by name
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _rtnl() -> socket.socket:
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        sock.bind((0, 0))
+        return sock
+
+    def _request(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, sock: socket.socket, msg_type: int, seq: int, ifindex: int, flags: int, change: int, attrs: bytes
+    ) -> None:
+        """Send one RTM_*LINK request for ifindex and raise on a negative ack."""
+        ifinfomsg = struct.pack("=BxHiII", socket.AF_UNSPEC, 0, ifindex, flags, change)
+        body = ifinfomsg + attrs
+        header = struct.pack("=IHHII", 16 + len(body), msg_type, self.NLM_F_REQUEST | self.NLM_F_ACK, seq, 0)
+        sock.send(header + body)
+        reply = sock.recv(65536)
+        _, reply_type, _, _, _ = struct.unpack_from("=IHHII", reply)
+        if reply_type == self.NLMSG_ERROR:
+            (error,) = struct.unpack_from("=i", reply, 16)
+            if error:
+                raise OSError(-error, f"rtnetlink request for ifindex {ifindex} failed: {os.strerror(-error)}")
+
+
+TAP_BACKENDS = {"ip": IPRouteTapBackend, "netlink": NetlinkTapBackend}
+
+
 class OVSPortManager:
     """Creates host TAP interfaces and attaches them to OVS bridges.
 
@@ -369,52 +718,206 @@ class OVSPortManager:
         """
         cls._run(["ovs-vsctl", "set", "bridge", bridge, "other-config:forward-bpdu=true"])
 
+    @classmethod
+    def list_bridges(cls) -> set:
+        """Names of all OVS bridges, in one ovs-vsctl call."""
+        return set(cls._run(["ovs-vsctl", "list-br"]).stdout.split())
+
+    @classmethod
+    def setup_ports(cls, ifaces: List[NetworkInterface], backend: Optional[TapBackend] = None) -> None:
+        """Create, attach and bring up every iface.tap with one TAP batch and one OVS transaction.
+
+        Replaces ~9 forks per interface (br-exists, teardown, tuntap, link set x2,
+        add-port, mtu_request, forward-bpdu) with three for the whole set:
+        ovs-vsctl list-br, the TAP backend (one ip -batch, or no fork at all
+        with NetlinkTapBackend), and a single chained ovs-vsctl transaction in
+        which forward-bpdu is asserted once per bridge. Idempotent: stale
+        taps/ports of the same name are replaced.
+        """
+        ports: List[Tuple[str, str]] = []  # (tap, bridge)
+        for iface in ifaces:
+            if not iface.tap:
+                raise ValueError(f"Interface '{iface.name}' has no TAP name assigned")
+            ports.append((iface.tap, iface.bridge))
+        if not ports:
+            return
+        bridges = sorted({bridge for _, bridge in ports})
+        existing = cls.list_bridges()
+        missing = [bridge for bridge in bridges if bridge not in existing]
+        if missing:
+            raise RuntimeError(
+                f"OVS bridge(s) not found: {', '.join(missing)}. "
+                f"Create them first via netplan / bridges_config_ovs.sh."
+            )
+
+        multi_queue = {iface.tap for iface in ifaces if iface.tap and iface.queues > 1}
+        (backend or IPRouteTapBackend()).create_taps([tap for tap, _ in ports], cls.MTU, multi_queue)
+        cls.attach_ports(ports)
+
+    @classmethod
+    def attach_ports(cls, ports: List[Tuple[str, str]]) -> None:
+        """(Re)attach existing TAPs to their bridges in one ovs-vsctl transaction; a TAP on another bridge moves."""
+        bridges = sorted({bridge for _, bridge in ports})
+        cmd = ["ovs-vsctl"]
+        for tap, bridge in ports:
+            cmd += ["--", "--if-exists", "del-port", tap]
+            cmd += ["--", "add-port", bridge, tap]
+            cmd += ["--", "set", "interface", tap, f"mtu_request={cls.MTU}"]
+        # Forward LACP/STP/LLDP/CDP (reserved multicast) once per bridge, not per port.
+        for bridge in bridges:
+            cmd += ["--", "set", "bridge", bridge, "other-config:forward-bpdu=true"]
+        result = cls._run(cmd, check=False)
+        if result.returncode != 0:
+            raise RuntimeError(f"ovs-vsctl transaction failed: {result.stderr.strip()}")
+
+    @classmethod
+    def port_bridges(cls) -> Dict[str, str]:
+        """Port name -> OVS bridge for every port on the host, in two ovs-vsctl calls."""
+        table = ["ovs-vsctl", "--format=csv", "--data=bare", "--no-headings"]
+        names = dict(line.split(",", 1) for line in cls._run(table + ["--columns=_uuid,name", "list", "Port"]).stdout.splitlines() if line)
+        ports = {}
+        for line in cls._run(table + ["--columns=name,ports", "list", "Bridge"]).stdout.splitlines():
+            bridge, _, uuids = line.partition(",")
+            for uuid in uuids.split():
+                if uuid in names:
+                    ports[names[uuid]] = bridge
+        return ports
+
+    @classmethod
+    def teardown_ports(cls, ifaces: List[NetworkInterface], backend: Optional[TapBackend] = None) -> None:
+        """Remove every iface.tap from OVS and the kernel in one transaction + one TAP batch."""
+        cls.remove_taps([iface.tap for iface in ifaces if iface.tap], backend)
+
+    @classmethod
+    def remove_taps(cls, taps: List[str], backend: Optional[TapBackend] = None) -> None:
+        """Remove TAPs by name from OVS and the kernel in one transaction + one TAP batch."""
+        if not taps:
+            return
+        cmd = ["ovs-vsctl"]
+        for tap in taps:
+            cmd += ["--", "--if-exists", "del-port", tap]
+        cls._run(cmd, check=False)
+        (backend or IPRouteTapBackend()).delete_taps(taps)
+
     @classmethod
     def setup_port(cls, iface: NetworkInterface) -> None:
         """Create iface.tap, attach to iface.bridge on OVS, bring it up.
 
         Idempotent: any stale tap/port of the same name is cleared first.
         """
-        if not iface.tap:
-            raise ValueError(f"Interface '{iface.name}' has no TAP name assigned")
-        if not cls.bridge_exists(iface.bridge):
-            raise RuntimeError(
-                f"OVS bridge '{iface.bridge}' not found. "
-                f"Create it first via netplan / bridges_config_ovs.sh."
-            )
-        cls.teardown_port(iface)  # clear stale state from a prior run
-        cls._run(["ip", "tuntap", "add", "dev", iface.tap, "mode", "tap"])
-        cls._run(["ip", "link", "set", "dev", iface.tap, "mtu", str(cls.MTU)])
-        cls._run(["ovs-vsctl", "--may-exist", "add-port", iface.bridge, iface.tap])
-        cls._run(["ovs-vsctl", "set", "int", iface.tap, f"mtu_request={cls.MTU}"])
-        cls.ensure_forward_bpdu(iface.bridge)
-        cls._run(["ip", "link", "set", "dev", iface.tap, "up"])
+        cls.setup_ports([iface])
 
     @classmethod
     def teardown_port(cls, iface: NetworkInterface) -> None:
         """Remove iface.tap from OVS and delete it. Safe if already absent."""
-        if not iface.tap:
-            return
-        cls._run(["ovs-vsctl", "--if-exists", "del-port", iface.bridge, iface.tap], check=False)
-        cls._run(["ip", "link", "del", "dev", iface.tap], check=False)
+        cls.teardown_ports([iface])
 
 
 class DiskManager:
-    """Manages VM disk operations."""
+    """Manages VM disk operations.
+
+    Two ways to derive a per-VM boot disk from the base image:
+
+    - clone:   full ``cp`` of the base image, then ``qemu-img resize``.
+    - overlay: thin qcow2 whose backing file is the base image (like the ND
+               scripts' ``qemu-img create -b``). Only blocks the guest writes
+               land in the overlay, so creation is near-instant.
+
+    QEMU opens a backing file read-only, but anything that writes the base
+    (a VM launched on it directly, ``qemu-img commit``) silently corrupts every
+    overlay built on it. Overlay mode therefore drops the base image's write
+    bits and records its size/mtime in a ``<disk>.backing.json`` sidecar, which
+    check_backing_unmodified() compares against before an existing overlay is
+    used again (a snapshot restore checks the saved overlay before putting it
+    back in place).
+    """
+
+    DISK_MODES = ("clone", "overlay")
 
     @staticmethod
-    def create_vm_disk(source_image: Path, dest_disk: Path, size: str) -> None:
-        """Create VM disk from source image."""
+    def create_vm_disk(source_image: Path, dest_disk: Path, size: Optional[str], mode: str = "clone") -> None:
+        """Create VM disk from source image, as a full clone or a thin overlay."""
+        if mode not in DiskManager.DISK_MODES:
+            raise ValueError(f"Unknown disk mode {mode!r}; expected one of {DiskManager.DISK_MODES}")
+        if mode == "overlay":
+            DiskManager.create_overlay_disk(source_image, dest_disk, size)
+            return
+        DiskManager._sidecar(dest_disk).unlink(missing_ok=True)  # no longer an overlay
         try:
             # Copy source image
             subprocess.run(["cp", str(source_image), str(dest_disk)], check=True)
 
             # Resize disk
-            subprocess.run(["qemu-img", "resize", str(dest_disk), size], check=True)
+            if size:
+                subprocess.run(["qemu-img", "resize", str(dest_disk), size], check=True)
 
         except subprocess.CalledProcessError as e:
             raise RuntimeError(f"Failed to create VM disk: {e}") from e
 
+    @staticmethod
+    def create_overlay_disk(backing_image: Path, dest_disk: Path, size: Optional[str]) -> None:
+        """Create dest_disk as a qcow2 overlay on backing_image (never written)."""
+        backing_image = backing_image.resolve()
+        DiskManager.protect_backing_image(backing_image)
+        before = DiskManager._fingerprint(backing_image)
+
+        cmd = ["qemu-img", "create", "-f", "qcow2", "-F", "qcow2", "-b", str(backing_image), str(dest_disk)]
+        if size:
+            cmd.append(size)
+        try:
+            subprocess.run(cmd, capture_output=True, text=True, check=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Failed to create overlay disk: {e.stderr.strip() or e}") from e
+
+        if DiskManager._fingerprint(backing_image) != before:
+            raise RuntimeError(f"Backing image {backing_image} changed while creating {dest_disk}")
+        DiskManager._sidecar(dest_disk).write_text(json.dumps({"backing": str(backing_image), **before}), encoding="utf-8")
+
+    @staticmethod
+    def protect_backing_image(image: Path) -> None:
+        """Drop write permission on a backing image so stray tools fail loudly."""
+        mode = image.stat().st_mode
+        if mode & 0o222:
+            image.chmod(mode & ~0o222)
+
+    @staticmethod
+    def check_backing_unmodified(disk: Path) -> None:
+        """Raise if disk's backing chain no longer matches what it was built on.
+
+        Checks that qemu-img still reports the recorded backing file and that the
+        backing image's size/mtime are unchanged since the overlay was created.
+        No-op for full clones (no sidecar).
+        """
+        sidecar = DiskManager._sidecar(disk)
+        if not sidecar.exists():
+            return
+        recorded = json.loads(sidecar.read_text(encoding="utf-8"))
+        backing = Path(recorded["backing"])
+
+        info = subprocess.run(["qemu-img", "info", "--output=json", str(disk)], capture_output=True, text=True, check=True)
+        details = json.loads(info.stdout)
+        actual = details.get("full-backing-filename") or details.get("backing-filename")
+        if not actual or Path(actual).resolve() != backing:
+            raise RuntimeError(f"{disk}: backing file is {actual!r}, expected {backing}")
+
+        if not backing.exists():
+            raise RuntimeError(f"{disk}: backing image {backing} is missing")
+        current = DiskManager._fingerprint(backing)
+        if current["size"] != recorded["size"] or current["mtime_ns"] != recorded["mtime_ns"]:
+            raise RuntimeError(
+                f"Backing image {backing} was modified after {disk} was created "
+                "(every overlay on it is now inconsistent); rebuild the overlay"
+            )
+
+    @staticmethod
+    def _fingerprint(image: Path) -> Dict[str, int]:
+        st = image.stat()
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    @staticmethod
+    def _sidecar(disk: Path) -> Path:
+        return disk.with_name(disk.name + ".backing.json")
+
     @staticmethod
     def create_external_storage(storage_path: Path, size: str) -> None:
         """Create external storage disk."""
@@ -439,6 +942,213 @@ class DiskManager:
             return {"error": str(e)}
 
 
+@functools.lru_cache(maxsize=None)
+def qemu_version() -> str:
+    """First line of qemu-system-x86_64 --version ("" if QEMU is not installed)."""
+    try:
+        return subprocess.run(["qemu-system-x86_64", "--version"], capture_output=True, text=True, check=True).stdout.splitlines()[0]
+    except (OSError, subprocess.CalledProcessError, IndexError):
+        return ""
+
+
+def parse_size(size: str) -> int:
+    """Convert a qemu-img style size ("32G", "512M", "1T", "4096") to bytes."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    size = size.strip().upper().rstrip("B")
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+    return int(size)
+
+
+class GoldenImageCache:
+    """Cache of pre-resized, optionally bootflash-expanded base images.
+
+    Entries are keyed by (image name, disk size, bootflash size, SHA-256 of the
+    source qcow2), so a changed source image or golden_bootflash_size simply
+    produces a new key; entries for old source content are dropped the next
+    time that image is requested (once no overlay uses them). The SHA-256 is
+    computed once per source (path, size, mtime, inode) and remembered in
+    index.json, so repeat lookups cost one stat(). Total cache size is bounded
+    by max_size with least-recently-used eviction.
+
+    Golden images are read-only; switches consume them as overlay backing
+    files or as the source of a full clone. An entry that an overlay still
+    uses as its backing file (a <disk>.backing.json sidecar under disk_dirs:
+    the switch disks and their snapshots) is never evicted or dropped, since
+    the overlay cannot be opened without it. All index access happens under an
+    flock on <cache_dir>/.lock, so concurrent launchers build each entry once.
+    """
+
+    INDEX = "index.json"
+    LOCK = ".lock"
+
+    def __init__(self, cache_dir: Path, max_size: str = "200G", bootflash_size: Optional[str] = None, disk_dirs: Sequence[Path] = ()):
+        self.cache_dir = cache_dir
+        self.max_bytes = parse_size(max_size)
+        self.bootflash_size = bootflash_size
+        self.disk_dirs = list(disk_dirs)
+
+    def get(self, source_image: Path, disk_size: Optional[str]) -> Path:
+        """Return the golden image for (source_image, disk_size), building it if needed."""
+        source_image = source_image.resolve()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_dir / self.LOCK, "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = self._load_index()
+            digest = self._source_digest(index, source_image)
+            key = self._key(source_image, disk_size, digest)
+            golden = self.cache_dir / f"{key}.qcow2"
+
+            # Source content changed: entries built from older content are dead once no overlay uses them.
+            stale = [k for k, entry in index["entries"].items() if entry["source"] == str(source_image) and entry["sha256"] != digest]
+            if stale:
+                dependents = self.dependents()
+                for stale_key in stale:
+                    if stale_key not in dependents:
+                        self._remove(index, stale_key)
+
+            if key not in index["entries"] or not golden.exists():
+                print(f"Building golden image {golden.name} (one-time for this image/size)")
+                self._build(source_image, golden, disk_size)
+                index["entries"][key] = {
+                    "source": str(source_image),
+                    "image": source_image.name,
+                    "disk_size": disk_size,
+                    "bootflash_size": self.bootflash_size,
+                    "sha256": digest,
+                    "bytes": golden.stat().st_size,
+                    "created": time.time(),
+                }
+            index["entries"][key]["last_used"] = time.time()
+            self._evict(index, keep=key)
+            self._save_index(index)
+        return golden
+
+    def list_entries(self) -> List[Dict[str, Any]]:
+        """Return cache entries, most recently used first."""
+        index = self._load_index()
+        entries = [{"key": key, **entry} for key, entry in index["entries"].items()]
+        return sorted(entries, key=lambda e: e.get("last_used", 0), reverse=True)
+
+    def prune(self, clear: bool = False) -> None:
+        """Evict down to max_size (or remove everything when clear is True)."""
+        if not self.cache_dir.exists():
+            return
+        with open(self.cache_dir / self.LOCK, "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            index = self._load_index()
+            if clear:
+                dependents = self.dependents()
+                if dependents:
+                    disks = "\n".join(f"  {key}: {disk}" for key, disks in sorted(dependents.items()) for disk in disks)
+                    raise RuntimeError(f"Golden images are still backing these disks; delete them (or their snapshots) first:\n{disks}")
+                for key in list(index["entries"]):
+                    self._remove(index, key)
+            else:
+                self._evict(index)
+            self._save_index(index)
+
+    def dependents(self) -> Dict[str, List[Path]]:
+        """Cache key -> overlay disks (under disk_dirs) whose sidecar names that golden image as backing file."""
+        found: Dict[str, List[Path]] = {}
+        for directory in self.disk_dirs:
+            for sidecar in sorted(directory.glob("*.backing.json")) + sorted(directory.glob("*/*.backing.json")):
+                try:
+                    backing = Path(json.loads(sidecar.read_text(encoding="utf-8"))["backing"])
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                if backing.parent == self.cache_dir.resolve() and backing.suffix == ".qcow2":
+                    found.setdefault(backing.stem, []).append(sidecar.with_name(sidecar.name[: -len(".backing.json")]))
+        return found
+
+    def _key(self, source_image: Path, disk_size: Optional[str], digest: str) -> str:
+        """Cache key; the bootflash layout is part of it, so changing golden_bootflash_size builds a new image."""
+        bootflash = f"-bootflash{self.bootflash_size}" if self.bootflash_size else ""
+        return f"{source_image.stem}-{disk_size or 'native'}{bootflash}-{digest[:16]}"
+
+    def _source_digest(self, index: Dict[str, Any], source_image: Path) -> str:
+        """SHA-256 of source_image, recomputed only when its stat() changes."""
+        st = source_image.stat()
+        stamp = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino}
+        known = index["sources"].get(str(source_image))
+        if known and all(known.get(k) == v for k, v in stamp.items()):
+            return known["sha256"]
+        print(f"Hashing {source_image} (source changed or not seen before)")
+        with open(source_image, "rb") as f:
+            digest = hashlib.file_digest(f, "sha256").hexdigest()
+        index["sources"][str(source_image)] = {**stamp, "sha256": digest}
+        return digest
+
+    def _build(self, source_image: Path, golden: Path, disk_size: Optional[str]) -> None:
+        tmp = golden.with_name(f".{golden.name}.tmp")
+        try:
+            subprocess.run(["cp", "--sparse=always", str(source_image), str(tmp)], check=True)
+            if disk_size:
+                subprocess.run(["qemu-img", "resize", str(tmp), disk_size], check=True, capture_output=True)
+            if self.bootflash_size:
+                self._expand_bootflash(tmp, self.bootflash_size)
+            tmp.chmod(0o444)
+            tmp.rename(golden)
+        except subprocess.CalledProcessError as e:
+            tmp.unlink(missing_ok=True)
+            raise RuntimeError(f"Failed to build golden image {golden.name}: {e}") from e
+
+    @staticmethod
+    def _expand_bootflash(image: Path, bootflash_size: str) -> None:
+        """Grow NX-OS bootflash (partition 4) and its ext filesystem in place.
+
+        Automates expand_base_image_bootflash.sh: attach over NBD, resizepart 4,
+        e2fsck + resize2fs, detach.
+        """
+        subprocess.run(["modprobe", "nbd", "max_part=8"], check=True)
+        device = next((f"/dev/{d.name}" for d in sorted(Path("/sys/block").glob("nbd*")) if not (d / "pid").exists()), None)
+        if device is None:
+            raise RuntimeError("No free /dev/nbd* device for bootflash expansion")
+        subprocess.run(["qemu-nbd", f"--connect={device}", "--format=qcow2", str(image)], check=True)
+        try:
+            subprocess.run(["udevadm", "settle"], check=False)
+            subprocess.run(["parted", "--script", device, "resizepart", "4", bootflash_size], check=True)
+            subprocess.run(["e2fsck", "-f", "-y", f"{device}p4"], check=False)  # exit 1 = errors corrected
+            subprocess.run(["resize2fs", f"{device}p4"], check=True)
+        finally:
+            subprocess.run(["qemu-nbd", "--disconnect", device], check=False)
+
+    def _evict(self, index: Dict[str, Any], keep: Optional[str] = None) -> None:
+        """Drop least-recently-used entries until the cache fits in max_bytes; entries backing overlays stay."""
+        total = sum(entry["bytes"] for entry in index["entries"].values())
+        if total <= self.max_bytes:
+            return
+        dependents = self.dependents()
+        by_age = sorted(index["entries"].items(), key=lambda item: item[1].get("last_used", 0))
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if key == keep or key in dependents:
+                continue
+            total -= entry["bytes"]
+            print(f"Evicting golden image {key} (LRU, cache over {self.max_bytes >> 30}G)")
+            self._remove(index, key)
+        if total > self.max_bytes:
+            print(f"Golden image cache stays over {self.max_bytes >> 30}G: the remaining entries back existing overlays")
+
+    def _remove(self, index: Dict[str, Any], key: str) -> None:
+        # Callers skip entries that overlays on disk still name; QEMU processes keep their open fd anyway.
+        (self.cache_dir / f"{key}.qcow2").unlink(missing_ok=True)
+        index["entries"].pop(key, None)
+
+    def _load_index(self) -> Dict[str, Any]:
+        path = self.cache_dir / self.INDEX
+        if path.exists():
+            return json.loads(path.read_text(encoding="utf-8"))
+        return {"sources": {}, "entries": {}}
+
+    def _save_index(self, index: Dict[str, Any]) -> None:
+        path = self.cache_dir / self.INDEX
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(index, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+
 class ConfigLoader:
     """Handles loading and merging of configuration files."""
 
@@ -448,20 +1158,19 @@ class ConfigLoader:
         global_config = GlobalConfig()
 
         if config_path and config_path.exists():
-            with open(config_path, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
-                # Update global config with values from file
-                for key, value in data.items():
-                    if hasattr(global_config, key):
-                        # Special handling for base_mac which might be parsed as time
-                        if key == "base_mac":
-                            if isinstance(value, str):
-                                setattr(global_config, key, value)
-                            else:
-                                # Convert time object back to string format
-                                setattr(global_config, key, str(value))
-                        else:
+            data = load_yaml(config_path) or {}
+            # Update global config with values from file
+            for key, value in data.items():
+                if hasattr(global_config, key):
+                    # Special handling for base_mac which might be parsed as time
+                    if key == "base_mac":
+                        if isinstance(value, str):
                             setattr(global_config, key, value)
+                        else:
+                            # Convert time object back to string format
+                            setattr(global_config, key, str(value))
+                    else:
+                        setattr(global_config, key, value)
 
         return global_config
 
@@ -471,10 +1180,24 @@ class ConfigLoader:
         if not config_path.exists():
             raise FileNotFoundError(f"Switch config file not found: {config_path}")
 
-        with open(config_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        return SwitchConfig(**load_yaml(config_path))
+
+    @staticmethod
+    def fabric_config_paths(config_dir: Path, sites: Optional[List[int]] = None) -> List[Path]:
+        """Every S<site>_*.yaml switch config in config_dir, optionally limited to the given sites."""
+        return fabric_paths(config_dir, sites)
 
-        return SwitchConfig(**data)
+    @staticmethod
+    def load_fabric_configs(config_dir: Path, sites: Optional[List[int]] = None) -> List[SwitchConfig]:
+        """Load every S<site>_*.yaml in config_dir, optionally limited to the given sites."""
+        paths = ConfigLoader.fabric_config_paths(config_dir, sites)
+        configs = []
+        for path, data in zip(paths, load_many(paths)):
+            try:
+                configs.append(SwitchConfig(**data))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{path.name}: {e}") from e
+        return configs
 
 
 class SwitchVMManager:  # pylint: disable=too-few-public-methods
@@ -485,14 +1208,69 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
         global_config: GlobalConfig,
         mac_generator: Optional[MACAddressGenerator] = None,
         qemu_builder: Optional[QEMUCommandBuilder] = None,
+        tap_backend: Optional[TapBackend] = None,
     ):
         self.global_config = global_config
         self.mac_generator = mac_generator or StandardMACGenerator()
         self.qemu_builder = qemu_builder or NexusQEMUBuilder()
+        if tap_backend is None:
+            if global_config.tap_backend not in TAP_BACKENDS:
+                raise ValueError(f"tap_backend must be one of {sorted(TAP_BACKENDS)}, got {global_config.tap_backend!r}")
+            tap_backend = TAP_BACKENDS[global_config.tap_backend]()
+        self.tap_backend = tap_backend
+        for option, choices in NexusQEMUBuilder.OPTION_CHOICES.items():
+            if getattr(global_config, option) not in choices:
+                raise ValueError(f"{option} must be one of {choices}, got {getattr(global_config, option)!r}")
+        if global_config.admission not in ("off", "warn", "enforce"):
+            raise ValueError(f"admission must be 'off', 'warn' or 'enforce', got {global_config.admission!r}")
+        if global_config.numa_placement not in ("none", "auto"):
+            raise ValueError(f"numa_placement must be 'none' or 'auto', got {global_config.numa_placement!r}")
+        self.numa_placer = NUMAPlacer() if global_config.numa_placement == "auto" else None
         self.disk_manager = DiskManager()
+        self.registry = VMRegistry(global_config.registry_file)
+        self.cpu_pinner = CPUPinner(Path(global_config.cpu_plan_file), global_config.cpu_reserved, registry=self.registry) if global_config.cpu_pinning else None
+        self.snapshot_store = SnapshotStore(global_config.snapshot_dir())
+        self.golden_cache: Optional[GoldenImageCache] = None
+        if global_config.golden_cache_path:
+            self.golden_cache = GoldenImageCache(
+                Path(global_config.golden_cache_path),
+                max_size=global_config.golden_cache_max_size,
+                bootflash_size=global_config.golden_bootflash_size,
+                disk_dirs=global_config.disk_dirs(),
+            )
 
-    def create_switch(self, config: SwitchConfig, dry_run: bool = False, debug: bool = False) -> Dict[str, Any]:
-        """Create and start a Nexus switch VM."""
+    def create_switch(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-branches
+        self,
+        config: SwitchConfig,
+        dry_run: bool = False,
+        debug: bool = False,
+        quiet: bool = False,
+        network_ready: bool = False,
+        admitted: bool = False,
+        restore: bool = False,
+    ) -> Dict[str, Any]:
+        """Create and start a Nexus switch VM.
+
+        network_ready skips TAP/OVS setup when the caller already provisioned
+        this switch's ports (create_fabric batches them for the whole fabric);
+        admitted likewise skips the capacity check create_fabric already made.
+        restore resumes the switch from its warm-start snapshot instead of
+        booting it: the snapshot's disks replace the per-VM disks and QEMU
+        loads the saved RAM/device state.
+        """
+        if not admitted:
+            self.admit([config], dry_run=dry_run, quiet=quiet)
+        if restore:
+            mismatches = self.snapshot_store.mismatches(config.name, self.snapshot_key(config))
+            if mismatches:
+                raise RuntimeError(f"Cannot restore {config.name}: " + "; ".join(mismatches))
+            # The key only covers the source image; a saved overlay also needs its (golden) backing file
+            # unchanged. Check the snapshot's own copies so a failure leaves the current disks untouched.
+            for disk in self.snapshot_store.disks(config.name):
+                try:
+                    self.disk_manager.check_backing_unmodified(disk)
+                except RuntimeError as e:
+                    raise RuntimeError(f"Cannot restore {config.name}: {e}") from e
 
         if debug:
             # Check system requirements
@@ -514,14 +1292,30 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
 
         # Generate network interfaces
         interfaces = self._generate_interfaces(config)
+        if self.cpu_pinner is not None:
+            self.cpu_pinner.plan(self.cpu_demands([config]), save=not dry_run)
+        requested = config  # as in the YAML; reconcile.py compares the registry's copy against it
+        config = self._place_memory(config)
+        merge = config.mem_merge if config.mem_merge is not None else self.global_config.mem_merge
+        if merge and (config.memory_backend or self.global_config.memory_backend) == "hugepages" and not quiet:
+            print(f"Warning: {config.name}: mem_merge has no effect on hugepage-backed RAM (KSM cannot merge hugetlbfs pages)")
 
         # Prepare VM disk and host networking
         if not dry_run:
-            self._prepare_vm_disk(config)
-            self._setup_network(interfaces)
+            Path(self.global_config.qmp_socket_dir).mkdir(parents=True, exist_ok=True)
+            if self.global_config.console_log_dir:
+                Path(self.global_config.console_log_dir).mkdir(parents=True, exist_ok=True)
+            if restore:
+                self.snapshot_store.restore_disks(config.name, Path(self.global_config.cdrom_path))
+            else:
+                self._prepare_vm_disk(config)
+            if not network_ready:
+                self._setup_network(interfaces)
 
         # Build QEMU command
         qemu_cmd = self.qemu_builder.build_command(config, self.global_config, interfaces)
+        if restore:
+            qemu_cmd.extend(["-incoming", "defer"])  # wait for migrate-incoming with the saved state
 
         if dry_run:
             return {
@@ -532,16 +1326,191 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
             }
 
         # Start VM
-        process = self._start_vm(qemu_cmd, config, debug=debug)
+        process = self._start_vm(qemu_cmd, config, debug=debug, quiet=quiet)
+        self.registry.record(
+            config.name,
+            process.pid,
+            kind="nexus9000v",
+            telnet_port=config.telnet_port,
+            monitor_port=config.monitor_port,
+            qmp_socket=self.global_config.qmp_socket(config.name),
+            taps=[iface.tap for iface in interfaces],
+            disks=[str(disk) for disk in self._vm_disks(config)],
+            config_hash=self.config_hash(requested),
+            config=asdict(requested),
+            host_numa_node=config.host_numa_node,  # where the RAM actually went (numa_placement: auto)
+            console_log=str(self.global_config.vm_log(config.name, "console") or ""),
+            qemu_log=str(self.global_config.vm_log(config.name, "qemu") or ""),
+        )
+        extra: Dict[str, Any] = {}
+        if restore:
+            extra["restore_seconds"] = self.snapshot_store.load_state(config.name, self.global_config.qmp_socket(config.name))
+            if not quiet:
+                print(f"Restored {config.name} from snapshot in {extra['restore_seconds']:.1f}s")
+        if self.cpu_pinner is not None:
+            try:
+                pinned = self.cpu_pinner.apply(config.name, process.pid, self.global_config.qmp_socket(config.name))
+                extra["pinned_cpus"] = pinned
+                if not quiet:
+                    print(f"Pinned vCPUs (vcpu:host cpu): {', '.join(f'{v}:{c}' for v, c in pinned.items())}")
+            except (RuntimeError, OSError) as e:
+                # The VM is up; an unpinned switch is degraded, not failed.
+                extra["error"] = f"vCPU pinning failed: {e}"
+                if not quiet:
+                    print(f"Warning: {extra['error']}")
 
         return {
+            **extra,
             "process_id": process.pid,
             "telnet_port": config.telnet_port,
             "monitor_port": config.monitor_port,
+            "qmp_socket": self.global_config.qmp_socket(config.name),
             "interfaces": interfaces,
             "config": config,
         }
 
+    def admit(self, configs: List[SwitchConfig], dry_run: bool = False, quiet: bool = False) -> Optional[CapacityReport]:
+        """Check that the host can hold configs on top of what is already running.
+
+        Prints the report when something warns or refuses; with
+        admission=enforce a refusal raises RuntimeError (except in dry runs).
+        """
+        if self.global_config.admission == "off":
+            return None
+        host = HostCapacity.probe(self.global_config.cdrom_path, exclude=[c.name for c in configs])
+        planner = CapacityPlanner(host, self.global_config.mem_reserve_mb, self.global_config.max_vcpu_ratio)
+        report = planner.check([vm_demand("nexus9000v", c, self.global_config) for c in configs])
+        if report.findings and not quiet:
+            print(report.format() + "\n")
+        if report.verdict == "refuse" and self.global_config.admission == "enforce" and not dry_run:
+            refused = ", ".join(f"{c.resource} {c.demand:.0f}/{c.capacity:.0f}{c.unit}" for c in report.findings if c.verdict == "refuse")
+            raise RuntimeError(f"Host capacity exceeded ({refused}); set admission: warn to launch anyway")
+        return report
+
+    def snapshot_key(self, config: SwitchConfig) -> Dict[str, Any]:
+        """What a warm-start snapshot of config depends on; a restore needs an identical key."""
+        image = config.image_name or self.global_config.default_image
+        files = {"image": Path(self.global_config.image_path) / image, "day0_iso": Path(self.global_config.cdrom_path) / f"{config.name}.iso"}
+        fingerprints = {name: DiskManager._fingerprint(path) if path.exists() else None for name, path in files.items()}  # pylint: disable=protected-access
+        return {
+            "image": image,
+            "image_fingerprint": fingerprints["image"],
+            "day0_iso_fingerprint": fingerprints["day0_iso"],
+            "ram": config.ram or self.global_config.default_ram,
+            "vcpus": config.vcpus or self.global_config.default_vcpus,
+            "nics": [[iface.interface_type, iface.mac, iface.queues] for iface in self._generate_interfaces(config)],
+            "disk_bus": config.disk_bus or self.global_config.disk_bus,
+            "disks": [disk.name for disk in self._vm_disks(config)],
+            "qemu": qemu_version(),
+        }
+
+    def save_snapshot(self, config: SwitchConfig, resume: bool = True) -> Dict[str, Any]:
+        """Snapshot a running switch (RAM, devices, disks); it keeps running unless resume is False."""
+        return self.snapshot_store.save(config.name, self.global_config.qmp_socket(config.name), self._vm_disks(config), self.snapshot_key(config), resume=resume)
+
+    def _vm_disks(self, config: SwitchConfig) -> List[Path]:
+        """The switch's writable disks: boot qcow2 and, if enabled, external storage."""
+        disks = [Path(self.global_config.cdrom_path) / f"{config.name}.qcow2"]
+        enable_external = config.enable_external_storage
+        if enable_external is None:
+            enable_external = self.global_config.external_storage_enabled
+        if enable_external:
+            disks.append(Path(self.global_config.cdrom_path) / f"{config.name}_external.qcow2")
+        return disks
+
+    def cpu_demands(self, configs: List[SwitchConfig]) -> List[Tuple[str, int, Optional[int]]]:
+        """(name, vcpus, host node) for CPUPinner.plan()."""
+        return [(c.name, c.vcpus or self.global_config.default_vcpus, c.host_numa_node) for c in configs]
+
+    def _place_memory(self, config: SwitchConfig) -> SwitchConfig:
+        """Resolve numa_placement=auto into a concrete host_numa_node for this launch.
+
+        With vCPU pinning, RAM follows the node the switch's CPUs were planned on.
+        """
+        if self.numa_placer is None or config.host_numa_node is not None:
+            return config
+        if self.cpu_pinner is not None:
+            entry = self.cpu_pinner.load_plan().get(config.name)
+            if entry is not None and len(set(self.numa_placer.free_mb())) > 1:
+                return replace(config, host_numa_node=entry["node"])
+        ram = config.ram or self.global_config.default_ram
+        hugepages = (config.memory_backend or self.global_config.memory_backend) == "hugepages"
+        node = self.numa_placer.place(ram, hugepages)
+        return config if node is None else replace(config, host_numa_node=node)
+
+    def topology(self, configs: List[SwitchConfig]) -> Topology:
+        """Indexed model of configs, with each port's MAC as this manager would assign it."""
+
+        def mac(sid: int, port: int) -> str:
+            base_mac = self.global_config.base_mac
+            return self.mac_generator.generate_ethernet_mac(sid, port, base_mac) if port else self.mac_generator.generate_mgmt_mac(sid, base_mac)
+
+        return Topology(switch_device(asdict(config), mac) for config in configs)
+
+    def validate_fabric(self, configs: List[SwitchConfig]) -> List[str]:
+        """Cross-switch checks that a single SwitchConfig cannot make on its own.
+
+        Names, sids (hence TAPs and console/monitor ports), MACs and management
+        IPs must be unique; a point-to-point ISL bridge may have at most two
+        endpoints in the set; and when both ends of a link are loaded they must
+        name each other as neighbors on that bridge. See topology.py.
+        """
+        return self.topology(configs).problems
+
+    def create_fabric(self, configs: List[SwitchConfig], workers: int = 4, dry_run: bool = False, restore: bool = False) -> List[Dict[str, Any]]:
+        """Bring up several switches concurrently through a bounded worker pool.
+
+        Every switch's TAPs are first provisioned in one batched OVS
+        transaction; each worker then runs create_switch() (disk prep, QEMU
+        spawn) for one switch, so wall time tracks the slowest switch rather
+        than the sum. Failures are captured per switch, never raised; a switch
+        whose OVS bridges are missing is reported FAILED and the rest still
+        come up.
+        """
+        issues = self.validate_fabric(configs)
+        if issues:
+            raise ValueError("Fabric validation failed:\n  " + "\n  ".join(issues))
+
+        self.admit(configs, dry_run=dry_run)
+
+        failed: Dict[str, str] = {}  # name -> error, for switches that are not launched
+        if not dry_run:
+            existing = OVSPortManager.list_bridges()
+            for config in configs:
+                missing = sorted({iface.bridge for iface in self._generate_interfaces(config)} - existing)
+                if missing:
+                    failed[config.name] = f"OVS bridge(s) not found: {', '.join(missing)}"
+            ifaces = [iface for config in configs if config.name not in failed for iface in self._generate_interfaces(config)]
+            OVSPortManager.setup_ports(ifaces, self.tap_backend)
+
+        def launch(config: SwitchConfig) -> Dict[str, Any]:
+            start = time.monotonic()
+            result: Dict[str, Any] = {"name": config.name, "sid": config.sid, "telnet_port": config.telnet_port}
+            if config.name in failed:
+                result.update(status="FAILED", error=failed[config.name], seconds=0.0)
+                return result
+            try:
+                result.update(self.create_switch(config, dry_run=dry_run, quiet=True, network_ready=True, admitted=True, restore=restore))
+                result["status"] = "dry-run" if dry_run else "running"
+                result["spawned_at"] = time.monotonic()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                result.update(status="FAILED", error=str(e))
+            result["seconds"] = time.monotonic() - start
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fabric") as pool:
+            return list(pool.map(launch, configs))
+
+    @staticmethod
+    def print_fabric_results(results: List[Dict[str, Any]]) -> None:
+        """Print the per-switch outcome table for create_fabric()."""
+        print(f"{'SWITCH':<10} {'SID':<6} {'STATUS':<9} {'PID':<9} {'TELNET':<7} {'SECONDS':>8}  ERROR")
+        for r in results:
+            pid = r.get("process_id", "-")
+            print(f"{r['name']:<10} {r['sid']:<6} {r['status']:<9} {pid!s:<9} {r['telnet_port']:<7} {r['seconds']:>8.1f}  {r.get('error', '')}")
+        failed = sum(1 for r in results if r["status"] == "FAILED")
+        print(f"\n{len(results) - failed}/{len(results)} switches OK")
+
     @staticmethod
     def _tap_name(sid: int, index: int) -> str:
         """Deterministic, unique, <=15-char host TAP name (e.g. 'tap1501-1')."""
@@ -550,6 +1519,15 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
             raise ValueError(f"TAP name exceeds 15 chars: {name}")
         return name
 
+    @staticmethod
+    def config_hash(config: SwitchConfig) -> str:
+        """Short hash of the switch config, as recorded in the registry."""
+        return hashlib.sha256(json.dumps(asdict(config), sort_keys=True).encode()).hexdigest()[:16]
+
+    def ports(self, config: SwitchConfig) -> List[Tuple[str, str]]:
+        """(TAP, OVS bridge) of each of the switch's NICs, management first."""
+        return [(iface.tap or "", iface.bridge) for iface in self._generate_interfaces(config)]
+
     def _generate_interfaces(self, config: SwitchConfig) -> List[NetworkInterface]:
         """Generate network interface configurations."""
         interfaces = []
@@ -562,7 +1540,7 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
                 name="ND_DATA",
                 bridge=config.mgmt_bridge,
                 mac=mgmt_mac,
-                interface_type=interface_type,
+                interface_type=config.interface_types.get("mgmt", interface_type),
                 tap=self._tap_name(config.sid, 0),
             )
         )
@@ -575,36 +1553,131 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
                     name=f"ISL_BRIDGE_{i}",
                     bridge=bridge,
                     mac=eth_mac,
-                    interface_type=interface_type,
+                    interface_type=config.interface_types.get(bridge, interface_type),
                     tap=self._tap_name(config.sid, i),
                 )
             )
 
+        vhost = config.vhost if config.vhost is not None else self.global_config.default_vhost
+        queues = config.net_queues or self.global_config.default_net_queues
+        for iface in interfaces:
+            if iface.is_virtio:
+                iface.vhost, iface.queues = vhost, queues
         return interfaces
 
     def _setup_network(self, interfaces: List[NetworkInterface]) -> None:
-        """Create TAPs and attach them to their OVS bridges."""
-        for iface in interfaces:
-            OVSPortManager.setup_port(iface)
+        """Create TAPs and attach them to their OVS bridges (one batched transaction)."""
+        OVSPortManager.setup_ports(interfaces, self.tap_backend)
 
     def teardown_switch(self, config: SwitchConfig) -> None:
         """Remove all TAP interfaces for a switch (run after stopping its VM)."""
-        for iface in self._generate_interfaces(config):
-            OVSPortManager.teardown_port(iface)
+        OVSPortManager.teardown_ports(self._generate_interfaces(config), self.tap_backend)
         print(f"Removed TAP interfaces for {config.name}")
 
+    def teardown_fabric(self, configs: List[SwitchConfig], deadline: float = 20.0, registered: bool = True, names: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """Stop switches concurrently, then remove all their TAPs in one batch.
+
+        Every running VM (configs, the registered nexus9000v VMs in names, or
+        every registered one when registered is set) gets an ACPI powerdown
+        over QMP at once; exits are awaited on pidfds until deadline seconds.
+        Stragglers are quit over QMP, then SIGKILLed. Returns one row per VM
+        with how it stopped.
+        """
+        start = time.monotonic()
+        entries = {e["name"]: e for e in self.registry.entries("nexus9000v")}
+        if not registered:
+            entries = {name: e for name, e in entries.items() if name in {c.name for c in configs} | set(names)}
+        pids = {name: e["pid"] for name, e in entries.items()}
+        unregistered = {c.name for c in configs} - set(pids)
+        if unregistered:  # started before the registry existed
+            pids.update({name: pid for pid, name in qemu_vms().items() if name in unregistered})
+
+        rows: Dict[str, Dict[str, Any]] = {c.name: {"name": c.name, "pid": None, "stopped": "not running"} for c in configs}
+        pidfds: Dict[int, str] = {}
+        for name, pid in pids.items():
+            rows[name] = {"name": name, "pid": pid, "stopped": None}
+            try:
+                fd = os.pidfd_open(pid)
+            except ProcessLookupError:
+                rows[name]["stopped"] = "not running"
+                continue
+            if name in entries and process_start_time(pid) != entries[name]["start_time"]:
+                os.close(fd)  # pid was reused; not our VM
+                rows[name]["stopped"] = "not running"
+                continue
+            if name in entries:
+                self.registry.mark_stopping(name)
+            pidfds[fd] = name
+
+        poller = select.poll()
+        for fd in pidfds:
+            poller.register(fd, select.POLLIN)  # readable once the process exits
+
+        def wait(phase: str, until: float) -> None:
+            pending = {fd for fd, name in pidfds.items() if rows[name]["stopped"] is None}
+            while pending and time.monotonic() < until:
+                for fd, _ in poller.poll(max(0, int((until - time.monotonic()) * 1000))):
+                    pending.discard(fd)
+                    poller.unregister(fd)
+                    rows[pidfds[fd]].update(stopped=phase, seconds=time.monotonic() - start)
+
+        async def qmp_all(command: str) -> None:
+            async with QMPPool(self.global_config.qmp_socket_dir) as pool:
+                await pool.execute_all([name for name in pidfds.values() if rows[name]["stopped"] is None], command)
+
+        asyncio.run(qmp_all("system_powerdown"))
+        wait("powerdown", start + deadline)
+        if any(rows[name]["stopped"] is None for name in pidfds.values()):
+            asyncio.run(qmp_all("quit"))
+            wait("quit", time.monotonic() + 5)
+        for fd, name in pidfds.items():
+            if rows[name]["stopped"] is None:
+                try:
+                    signal.pidfd_send_signal(fd, signal.SIGKILL)
+                except ProcessLookupError:  # exited after the quit wait gave up on it
+                    rows[name].update(stopped="quit", seconds=time.monotonic() - start)
+        wait("killed", time.monotonic() + 5)
+        for fd, name in pidfds.items():
+            os.close(fd)
+            if rows[name]["stopped"] is None:
+                rows[name]["stopped"] = "STILL RUNNING"
+            else:
+                self.registry.remove(name)
+                Path(self.global_config.qmp_socket(name)).unlink(missing_ok=True)
+
+        taps = {iface.tap for c in configs for iface in self._generate_interfaces(c) if iface.tap}
+        taps.update(tap for e in entries.values() for tap in e.get("taps", []))
+        OVSPortManager.remove_taps(sorted(taps), self.tap_backend)
+        for row in rows.values():
+            row.setdefault("seconds", None)
+        return sorted(rows.values(), key=lambda row: row["name"])
+
+    @staticmethod
+    def print_teardown_results(rows: List[Dict[str, Any]]) -> None:
+        """Print the per-switch outcome table for teardown_fabric()."""
+        print(f"{'SWITCH':<10} {'PID':<9} {'STOPPED BY':<14} {'SECONDS':>8}")
+        for row in rows:
+            seconds = "-" if row["seconds"] is None else f"{row['seconds']:.1f}"
+            print(f"{row['name']:<10} {row['pid'] or '-'!s:<9} {row['stopped']:<14} {seconds:>8}")
+
     def _prepare_vm_disk(self, config: SwitchConfig) -> None:
         """Prepare VM disk image."""
         image_name = config.image_name or self.global_config.default_image
         source_image = Path(self.global_config.image_path) / image_name
         dest_disk = Path(self.global_config.cdrom_path) / f"{config.name}.qcow2"
-        disk_size = config.disk_size or self.global_config.default_disk_size
+        disk_size: Optional[str] = config.disk_size or self.global_config.default_disk_size
+        disk_mode = config.disk_mode or self.global_config.default_disk_mode
 
         # Ensure destination directory exists
         dest_disk.parent.mkdir(parents=True, exist_ok=True)
 
+        # The golden image is already resized, so the per-VM disk inherits its size
+        if self.golden_cache:
+            source_image = self.golden_cache.get(source_image, disk_size)
+            disk_size = None
+
         # Create VM disk
-        self.disk_manager.create_vm_disk(source_image, dest_disk, disk_size)
+        self.disk_manager.create_vm_disk(source_image, dest_disk, disk_size, mode=disk_mode)
 
         # Create external storage if enabled
         enable_external = config.enable_external_storage
@@ -621,8 +1694,8 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
             else:
                 print(f"Using existing external storage: {external_disk}")
 
-    def _start_vm(self, qemu_cmd: List[str], config: SwitchConfig, debug: bool = False) -> subprocess.Popen:
-        """Start the VM process."""
+    def _start_vm(self, qemu_cmd: List[str], config: SwitchConfig, debug: bool = False, quiet: bool = False) -> subprocess.Popen:
+        """Start the VM process. quiet suppresses the per-switch banner (fabric mode)."""
         try:
             if debug:
                 print("QEMU Command:")
@@ -635,8 +1708,6 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
                 process = subprocess.Popen(qemu_cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
 
                 # Give it a moment to start
-                import time  # pylint: disable=import-outside-toplevel
-
                 time.sleep(2)
 
                 # Check if process is still running
@@ -649,7 +1720,12 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
 
             else:
                 # Normal mode - background process
-                process = subprocess.Popen(qemu_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # pylint: disable=consider-using-with
+                qemu_log = self.global_config.vm_log(config.name, "qemu")
+                with open(qemu_log, "ab") if qemu_log else open(os.devnull, "wb") as stderr:
+                    process = subprocess.Popen(qemu_cmd, stdout=subprocess.DEVNULL, stderr=stderr)  # pylint: disable=consider-using-with
+
+            if quiet:
+                return process
 
             print(f"{config.name} instance created.")
             print(f"Role: {config.role}")
@@ -661,12 +1737,11 @@ class SwitchVMManager:  # pylint: disable=too-few-public-methods
 
             print(f"\nConsole access: telnet localhost {config.telnet_port}")
             print(f"Monitor access: telnet localhost {config.monitor_port}")
+            print(f"QMP socket: {self.global_config.qmp_socket(config.name)}")
             print(f"Process ID: {process.pid}")
 
             if debug:
                 # Check process status after a moment
-                import time  # pylint: disable=import-outside-toplevel
-
                 time.sleep(1)
                 if process.poll() is not None:
                     print(f"WARNING: Process {process.pid} has already exited!")
@@ -709,6 +1784,7 @@ def create_sample_configs(force: bool = False):
         "default_vcpus": 4,
         "default_disk_size": "32G",
         "default_interface_type": "e1000",
+        "default_disk_mode": "clone",  # "overlay" is opt-in: it makes the base image read-only
         "default_external_storage_size": "20G",
         "external_storage_enabled": True,
     }
@@ -783,10 +1859,21 @@ def main():
     parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
     parser.add_argument("--dry-run", action="store_true", help="Show command without executing")
     parser.add_argument("--teardown", action="store_true", help="Remove the switch's TAP interfaces and exit")
+    parser.add_argument("--teardown-all", action="store_true", help="Power off every switch (or --site) concurrently and remove all their TAPs")
+    parser.add_argument("--teardown-deadline", type=float, default=20, help="With --teardown-all: seconds to wait for ACPI shutdown before forcing (default: 20)")
     parser.add_argument("--create-samples", action="store_true", help="Create sample config files")
     parser.add_argument("--force", action="store_true", help="Overwrite existing sample files (used with --create-samples)")
     parser.add_argument("--list-switches", action="store_true", help="List all switch config files in current directory")
     parser.add_argument("--debug", action="store_true", help="Enable debug output and show QEMU command/output")
+    parser.add_argument("--golden-cache", choices=["list", "prune", "clear"], help="Inspect or trim the golden image cache and exit")
+    parser.add_argument("--tap-backend", choices=sorted(TAP_BACKENDS), help="Override global tap_backend: ip (iproute2) or netlink (in-process)")
+    parser.add_argument("--fabric", action="store_true", help="Bring up every S*.yaml in the current directory concurrently")
+    parser.add_argument("--site", type=int, action="append", help="With --fabric: only switches of this site (repeatable)")
+    parser.add_argument("--workers", type=int, default=4, help="With --fabric: max switches prepared/launched at once (default: 4)")
+    parser.add_argument("--wait-ready", action="store_true", help="With --fabric: watch serial consoles until every switch reaches its login prompt")
+    parser.add_argument("--boot-timeout", type=float, default=1800, help="With --wait-ready: seconds to wait per switch (default: 1800)")
+    parser.add_argument("--save-snapshots", action="store_true", help="With --wait-ready: snapshot each switch once it reaches login (see snapshot.py)")
+    parser.add_argument("--restore", action="store_true", help="Resume from the switch's warm-start snapshot instead of booting")
 
     args = parser.parse_args()
 
@@ -794,6 +1881,24 @@ def main():
         create_sample_configs(force=args.force)
         return
 
+    if args.golden_cache:
+        global_config = ConfigLoader.load_global_config(args.global_config)
+        if not global_config.golden_cache_path:
+            print("Error: golden_cache_path is not set in the global config")
+            sys.exit(1)
+        cache = GoldenImageCache(Path(global_config.golden_cache_path), max_size=global_config.golden_cache_max_size, disk_dirs=global_config.disk_dirs())
+        if args.golden_cache == "list":
+            for entry in cache.list_entries():
+                used = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.get("last_used", 0)))
+                print(f"  {entry['key']:<48} {entry['bytes'] >> 20:>8} MB  last used {used}")
+        else:
+            try:
+                cache.prune(clear=args.golden_cache == "clear")
+            except RuntimeError as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+        return
+
     if args.list_switches:
         switch_files = list(Path.cwd().glob("*.yaml"))
         switch_files = [f for f in switch_files if f.name != "global_config.yaml"]
@@ -802,11 +1907,85 @@ def main():
             print(f"  {f.name}")
         return
 
+    if args.fabric:
+        try:
+            global_config = ConfigLoader.load_global_config(args.global_config)
+            if args.tap_backend:
+                global_config.tap_backend = args.tap_backend
+            configs = ConfigLoader.load_fabric_configs(Path.cwd(), args.site)
+            if not configs:
+                print("Error: no switch configs matched")
+                sys.exit(1)
+            manager = SwitchVMManager(global_config)
+            if args.debug:
+                for issue in ProcessValidator.check_system_requirements():
+                    print(f"System requirement issue: {issue}")
+                bridges = sorted({b for c in configs for b in [c.mgmt_bridge] + c.isl_bridges})
+                for issue in ProcessValidator.check_bridges(bridges):
+                    print(f"Bridge issue: {issue}")
+            if manager.cpu_pinner is not None:
+                print(manager.cpu_pinner.report(manager.cpu_pinner.plan(manager.cpu_demands(configs), save=not args.dry_run)) + "\n")
+            start = time.monotonic()
+            results = manager.create_fabric(configs, workers=args.workers, dry_run=args.dry_run, restore=args.restore)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Error: {e}")
+            sys.exit(1)
+        if args.dry_run:
+            for r in results:
+                if "command" in r:
+                    print(f"{r['name']}: {r['command']}\n")
+        manager.print_fabric_results(results)
+        print(f"Fabric bring-up took {time.monotonic() - start:.1f}s")
+        failed = any(r["status"] == "FAILED" for r in results)
+        if args.wait_ready and not args.dry_run:
+            from boot_watcher import BootTarget, print_report, wait_for_ready  # pylint: disable=import-outside-toplevel
+
+            by_name = {c.name: c for c in configs}
+            targets = []
+            for r in results:
+                if r["status"] == "running":
+                    config = by_name[r["name"]]
+                    image = config.image_name or global_config.default_image
+                    targets.append(BootTarget(r["name"], r["telnet_port"], config.role, image, started_at=r["spawned_at"]))
+            print(f"\nWaiting up to {args.boot_timeout:.0f}s for {len(targets)} switches to reach login...")
+            records = wait_for_ready(targets, timeout=args.boot_timeout)
+            print_report(records)
+            print(f"Fabric ready after {time.monotonic() - start:.1f}s")
+            failed = failed or not all(r.ready for r in records)
+            if args.save_snapshots:
+                for record in records:
+                    if not record.ready:
+                        continue
+                    try:
+                        meta = manager.save_snapshot(by_name[record.name])
+                        print(f"Snapshot {record.name}: {meta['state_bytes'] >> 20} MB state in {meta['save_seconds']}s")
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        print(f"Snapshot {record.name} failed: {e}")
+                        failed = True
+        if failed:
+            sys.exit(1)
+        return
+
+    if args.teardown_all:
+        global_config = ConfigLoader.load_global_config(args.global_config)
+        if args.tap_backend:
+            global_config.tap_backend = args.tap_backend
+        start = time.monotonic()
+        manager = SwitchVMManager(global_config)
+        rows = manager.teardown_fabric(ConfigLoader.load_fabric_configs(Path.cwd(), args.site), deadline=args.teardown_deadline, registered=not args.site)
+        manager.print_teardown_results(rows)
+        print(f"Teardown took {time.monotonic() - start:.1f}s")
+        if any(row["stopped"] == "STILL RUNNING" for row in rows):
+            sys.exit(1)
+        return
+
     if args.teardown:
         if not args.config:
             print("Error: --teardown requires --config")
             sys.exit(1)
         global_config = ConfigLoader.load_global_config(args.global_config)
+        if args.tap_backend:
+            global_config.tap_backend = args.tap_backend
         switch_config = ConfigLoader.load_switch_config(args.config)
         SwitchVMManager(global_config).teardown_switch(switch_config)
         return
@@ -820,23 +1999,30 @@ def main():
     try:
         # Load configurations
         global_config = ConfigLoader.load_global_config(args.global_config)
+        if args.tap_backend:
+            global_config.tap_backend = args.tap_backend
         switch_config = ConfigLoader.load_switch_config(args.config)
 
         # Create VM manager
         manager = SwitchVMManager(global_config)
 
         # Create switch
-        result = manager.create_switch(switch_config, dry_run=args.dry_run, debug=args.debug)
+        result = manager.create_switch(switch_config, dry_run=args.dry_run, debug=args.debug, restore=args.restore)
 
         if args.dry_run:
             print("QEMU Command:")
             print(result["command"])
             print("\nInterfaces:")
             for iface in result["interfaces"]:
-                print(f"  {iface.name}: {iface.bridge} -> {iface.mac} (tap: {iface.tap})")
+                print(f"  {iface.name}: {iface.bridge} -> {iface.mac} (tap: {iface.tap}, {iface.interface_type})")
+            print(f"\nDisk mode: {switch_config.disk_mode or global_config.default_disk_mode}")
+            placed = result["config"]
+            node = "unbound" if placed.host_numa_node is None else f"host node {placed.host_numa_node}"
+            print(f"Memory: {placed.memory_backend or global_config.memory_backend}, {node}")
             print("\nPorts:")
             print(f"  Telnet: {switch_config.telnet_port}")
             print(f"  Monitor: {switch_config.monitor_port}")
+            print(f"  QMP: {global_config.qmp_socket(switch_config.name)}")
 
     except Exception as e:  # pylint: disable=broad-exception-caught
         print(f"Error: {e}")
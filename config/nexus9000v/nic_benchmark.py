@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""Benchmark NIC models (e1000 vs virtio-net) on the link between two switches.
+
+For each model the two switches are launched with that model on their shared
+ISL (interface_types override), waited on until they reach the login prompt,
+then each switch's TAP on the link is driven from the host for --duration
+seconds while the script samples:
+
+- frames delivered into the guest (TAP tx_packets) and dropped because the
+  NIC model could not keep up (TAP tx_dropped),
+- QEMU CPU time (utime+stime of every QEMU thread, plus vhost-<pid> workers on
+  kernels where those are separate kernel threads).
+
+Frames are sent with AF_PACKET on the host side of the TAP, so they go
+straight to QEMU's TAP fd, not through OVS, and never reach the rest of the
+fabric. Each frame is addressed to the switch's own interface MAC and carries
+the IEEE local experimental ethertype 0x88B5, so NX-OS drops it after it has
+crossed the emulated NIC. That isolates the NIC model's cost. --passive skips
+the injection and only samples counters, for traffic you generate inside
+NX-OS yourself (e.g. ping/iperf between the two switches).
+
+Usage:
+    sudo python3 nic_benchmark.py S1_LE1.yaml S1_LE2.yaml
+    sudo python3 nic_benchmark.py S1_LE1.yaml S1_LE2.yaml --models e1000 virtio-net-pci --net-queues 4 --vhost
+    sudo python3 nic_benchmark.py S1_LE1.yaml S1_LE2.yaml --running --passive   # already up, measure only
+
+Without --running the two switches must not already be running: their TAPs are
+recreated, and the VMs are stopped over QMP after each model.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from boot_watcher import BootTarget, wait_for_ready
+from nexus9000v import ConfigLoader, NetworkInterface, SwitchConfig, SwitchVMManager
+from qmp import QMPClient, QMPError
+from registry import qemu_vms
+
+ETHERTYPE = 0x88B5  # IEEE 802 local experimental
+SRC_MAC = bytes.fromhex("020000000001")
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+
+
+def qemu_pid(name: str) -> Optional[int]:
+    """PID of the QEMU process started with -name <name>."""
+    return next((pid for pid, vm in qemu_vms().items() if vm == name), None)
+
+
+def cpu_seconds(pid: int) -> float:
+    """utime+stime of a process (all threads) plus its vhost-<pid> kernel workers."""
+    pids = [pid] + [int(p.name) for p in Path("/proc").glob("[0-9]*") if _comm(p) == f"vhost-{pid}" and not Path(f"/proc/{pid}/task/{p.name}").exists()]
+    total = 0
+    for p in pids:
+        try:
+            fields = Path(f"/proc/{p}/stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])  # utime, stime (fields 14, 15 of stat)
+    return total / CLK_TCK
+
+
+def _comm(proc: Path) -> str:
+    try:
+        return (proc / "comm").read_text().strip()
+    except OSError:
+        return ""
+
+
+def tap_counters(tap: str) -> Dict[str, int]:
+    """Packet/byte counters of a host TAP (tx = host -> guest)."""
+    stats = Path("/sys/class/net") / tap / "statistics"
+    return {name: int((stats / name).read_text()) for name in ("tx_packets", "tx_bytes", "tx_dropped", "rx_packets", "rx_bytes")}
+
+
+class FrameBlaster(threading.Thread):
+    """Send fixed-size frames to one MAC out of one TAP until stopped."""
+
+    def __init__(self, tap: str, dst_mac: str, frame_size: int):
+        super().__init__(daemon=True)
+        header = bytes.fromhex(dst_mac.replace(":", "")) + SRC_MAC + ETHERTYPE.to_bytes(2, "big")
+        self.frame = header + bytes(max(frame_size - len(header), 46))
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW)
+        self.sock.bind((tap, 0))
+        self.sent = 0
+        self.stop = threading.Event()
+
+    def run(self) -> None:
+        while not self.stop.is_set():
+            for _ in range(1000):
+                try:
+                    self.sock.send(self.frame)
+                    self.sent += 1
+                except BlockingIOError:
+                    break  # qdisc full; QEMU is behind
+                except OSError:
+                    time.sleep(0.001)  # ENOBUFS: same thing
+                    break
+        self.sock.close()
+
+
+def link_interface(manager: SwitchVMManager, config: SwitchConfig, bridge: str) -> NetworkInterface:
+    """The switch's interface (TAP, MAC) on bridge."""
+    for iface in manager._generate_interfaces(config):  # pylint: disable=protected-access
+        if iface.bridge == bridge:
+            return iface
+    raise ValueError(f"{config.name} has no interface on {bridge}")
+
+
+def measure(links: List[Tuple[str, int, NetworkInterface]], duration: float, frame_size: int, inject: bool) -> List[Dict]:
+    """Sample TAP counters and QEMU CPU for every (name, pid, iface) over duration seconds."""
+    blasters = [FrameBlaster(iface.tap or "", iface.mac, frame_size) for _, _, iface in links] if inject else []
+    for blaster in blasters:
+        blaster.start()
+    time.sleep(1)  # let queues fill before sampling
+    before = [(tap_counters(iface.tap or ""), cpu_seconds(pid), [b.sent for b in blasters]) for _, pid, iface in links]
+    start = time.monotonic()
+    time.sleep(duration)
+    elapsed = time.monotonic() - start
+    after = [(tap_counters(iface.tap or ""), cpu_seconds(pid), [b.sent for b in blasters]) for _, pid, iface in links]
+    for blaster in blasters:
+        blaster.stop.set()
+    for blaster in blasters:
+        blaster.join()
+
+    rows = []
+    for i, (name, _, iface) in enumerate(links):
+        (c0, cpu0, sent0), (c1, cpu1, sent1) = before[i], after[i]
+        delta = {key: c1[key] - c0[key] for key in c0}
+        rows.append({
+            "switch": name,
+            "model": iface.interface_type,
+            "offered_kpps": (sent1[i] - sent0[i]) / elapsed / 1000 if inject else None,
+            "delivered_kpps": delta["tx_packets"] / elapsed / 1000,
+            "dropped_kpps": delta["tx_dropped"] / elapsed / 1000,
+            "to_guest_mbps": delta["tx_bytes"] * 8 / elapsed / 1e6,
+            "from_guest_mbps": delta["rx_bytes"] * 8 / elapsed / 1e6,
+            "cpu_pct": (cpu1 - cpu0) / elapsed * 100,
+        })
+    return rows
+
+
+def stop_vm(manager: SwitchVMManager, config: SwitchConfig) -> None:
+    """Quit QEMU over QMP and remove the switch's TAPs."""
+
+    async def quit_vm() -> None:
+        async with QMPClient(manager.global_config.qmp_socket(config.name)) as client:
+            await client.quit()
+
+    try:
+        asyncio.run(quit_vm())
+    except QMPError as e:
+        print(f"Warning: could not stop {config.name}: {e}")
+    time.sleep(2)
+    manager.teardown_switch(config)
+
+
+def print_rows(rows: List[Dict]) -> None:
+    """Result table; CPU per 100 kpps normalizes for models that deliver more."""
+    print(f"{'MODEL':<16} {'SWITCH':<10} {'OFFERED':>8} {'KPPS':>8} {'DROPPED':>8} {'MBIT/S':>8} {'CPU %':>7} {'CPU%/100KPPS':>13}")
+    for r in rows:
+        offered = "-" if r["offered_kpps"] is None else f"{r['offered_kpps']:.1f}"
+        per = f"{r['cpu_pct'] / r['delivered_kpps'] * 100:.1f}" if r["delivered_kpps"] >= 1 else "-"
+        mbps = r["to_guest_mbps"] + r["from_guest_mbps"]
+        print(
+            f"{r['model']:<16} {r['switch']:<10} {offered:>8} {r['delivered_kpps']:>8.1f} {r['dropped_kpps']:>8.1f} "
+            f"{mbps:>8.1f} {r['cpu_pct']:>7.1f} {per:>13}"
+        )
+
+
+def main() -> int:  # pylint: disable=too-many-locals
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Compare NIC models on the link between two Nexus9000v switches")
+    parser.add_argument("configs", nargs=2, type=Path, help="The two switches' YAML files")
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
+    parser.add_argument("--bridge", help="ISL bridge to test (default: the first bridge the two switches share)")
+    parser.add_argument("--models", nargs="+", default=["e1000", "virtio-net-pci"], help="NIC models to compare (default: e1000 virtio-net-pci)")
+    parser.add_argument("--net-queues", type=int, help="virtio queues per NIC (default: global default_net_queues)")
+    parser.add_argument("--vhost", action="store_true", help="virtio NICs use vhost-net (default: the switch's vhost / global default_vhost)")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to sample per model (default: 30)")
+    parser.add_argument("--frame-size", type=int, default=1514, help="Injected frame size in bytes (default: 1514)")
+    parser.add_argument("--passive", action="store_true", help="Do not inject frames; only sample counters")
+    parser.add_argument("--running", action="store_true", help="Measure the running switches as they are (no relaunch)")
+    parser.add_argument("--boot-timeout", type=float, default=1800, help="Seconds to wait for login after each launch (default: 1800)")
+    args = parser.parse_args()
+
+    global_config = ConfigLoader.load_global_config(args.global_config)
+    manager = SwitchVMManager(global_config)
+    configs = [ConfigLoader.load_switch_config(path) for path in args.configs]
+    shared = [b for b in configs[0].isl_bridges if b in configs[1].isl_bridges]
+    bridge = args.bridge or (shared[0] if shared else None)
+    if bridge is None or bridge not in shared:
+        parser.error(f"{configs[0].name} and {configs[1].name} share no ISL bridge{f' {bridge}' if bridge else ''}")
+
+    rows: List[Dict] = []
+    for model in [None] if args.running else args.models:
+        if model is None:
+            run_configs = configs
+        else:
+            run_configs = [
+                replace(c, interface_types={**c.interface_types, bridge: model}, net_queues=args.net_queues or c.net_queues, vhost=True if args.vhost else c.vhost)
+                for c in configs
+            ]
+            if any(qemu_pid(c.name) for c in run_configs):
+                parser.error("switches are already running; stop them or use --running")
+            print(f"\n=== {model}: launching {' and '.join(c.name for c in run_configs)} ===")
+            for config in run_configs:
+                manager.create_switch(config, quiet=True)
+            targets = [BootTarget(c.name, c.telnet_port, c.role, model) for c in run_configs]
+            if not all(r.ready for r in wait_for_ready(targets, timeout=args.boot_timeout)):
+                print(f"{model}: switches did not reach login; skipping")
+                for config in run_configs:
+                    stop_vm(manager, config)
+                continue
+        try:
+            links = []
+            for config in run_configs:
+                pid = qemu_pid(config.name)
+                if pid is None:
+                    raise RuntimeError(f"{config.name} is not running")
+                links.append((config.name, pid, link_interface(manager, config, bridge)))
+            print(f"Sampling {bridge} for {args.duration:.0f}s ({'passive' if args.passive else f'{args.frame_size}-byte frames'})...")
+            rows += measure(links, args.duration, args.frame_size, inject=not args.passive)
+        finally:
+            if model is not None:
+                for config in run_configs:
+                    stop_vm(manager, config)
+
+    print()
+    print_rows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
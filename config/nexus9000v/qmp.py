@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Async QMP client for VMs launched by nexus9000v.py / 8000v.py.
+
+Every VM is started with ``-qmp unix:<qmp_socket_dir>/<name>.qmp,server=on,wait=off``
+(GlobalConfig.qmp_socket). QMP is QEMU's JSON monitor: one JSON object per
+line, a greeting on connect, ``qmp_capabilities`` to leave negotiation mode,
+then ``{"execute": ..., "id": ...}`` requests answered by ``return``/``error``
+replies, interleaved with asynchronous ``event`` messages.
+
+QMPClient wraps one connection; QMPPool keeps one open connection per VM so
+monitoring loops and bulk operations (shutting a fabric down, polling vCPU
+threads) do not reconnect and renegotiate on every call.
+
+Usage:
+    python3 qmp.py status                     # every VM with a socket in /run/n9kv
+    python3 qmp.py cpus S1_LE1 S1_LE2         # vCPU -> host thread id
+    python3 qmp.py blockstats S1_SP1
+    python3 qmp.py powerdown S1_LE1           # ACPI shutdown (graceful)
+    python3 qmp.py quit S1_LE1                # stop QEMU immediately
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+
+DEFAULT_SOCKET_DIR = "/run/n9kv"
+
+
+class QMPError(RuntimeError):
+    """QEMU answered a command with an error, or the connection failed."""
+
+
+class QMPClient:
+    """One QMP connection to a single VM."""
+
+    def __init__(self, path: Union[str, Path], timeout: float = 5.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self.greeting: Dict[str, Any] = {}
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=256)
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._ids = itertools.count(1)
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        """True while the underlying socket is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self) -> "QMPClient":
+        """Open the socket, read the greeting and negotiate capabilities."""
+        try:
+            self._reader, self._writer = await asyncio.wait_for(asyncio.open_unix_connection(self.path), self.timeout)
+            self.greeting = await self._read_message()
+        except (OSError, asyncio.TimeoutError) as e:
+            await self.close()
+            raise QMPError(f"{self.path}: connect failed: {e}") from e
+        if "QMP" not in self.greeting:
+            await self.close()
+            raise QMPError(f"{self.path}: unexpected greeting {self.greeting}")
+        await self.execute("qmp_capabilities")
+        return self
+
+    async def close(self) -> None:
+        """Close the connection (idempotent)."""
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def __aenter__(self) -> "QMPClient":
+        return await self.connect()
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    async def _read_message(self) -> Dict[str, Any]:
+        assert self._reader is not None
+        line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+        if not line:
+            raise QMPError(f"{self.path}: connection closed by QEMU")
+        return json.loads(line)
+
+    async def execute(self, command: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """Run one QMP command and return its ``return`` value.
+
+        Events that arrive before the reply are kept in self.events.
+        """
+        if self._writer is None:
+            raise QMPError(f"{self.path}: not connected")
+        async with self._lock:
+            request_id = next(self._ids)
+            request: Dict[str, Any] = {"execute": command, "id": request_id}
+            if arguments:
+                request["arguments"] = arguments
+            try:
+                self._writer.write(json.dumps(request).encode() + b"\n")
+                await self._writer.drain()
+                while True:
+                    message = await self._read_message()
+                    if "event" in message:
+                        self.events.append(message)
+                    elif message.get("id") == request_id:
+                        break
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                await self.close()
+                raise QMPError(f"{self.path}: {command} failed: {e or type(e).__name__}") from e
+        if "error" in message:
+            raise QMPError(f"{self.path}: {command}: {message['error'].get('desc', message['error'])}")
+        return message.get("return")
+
+    async def query_status(self) -> Dict[str, Any]:
+        """Run state, e.g. {"running": True, "status": "running"}."""
+        return await self.execute("query-status")
+
+    async def query_cpus_fast(self) -> List[Dict[str, Any]]:
+        """One entry per vCPU, including its host "thread-id"."""
+        return await self.execute("query-cpus-fast")
+
+    async def vcpu_thread_ids(self) -> Dict[int, int]:
+        """Map vCPU index -> host thread id (for pinning/accounting)."""
+        return {cpu["cpu-index"]: cpu["thread-id"] for cpu in await self.query_cpus_fast()}
+
+    async def query_blockstats(self) -> List[Dict[str, Any]]:
+        """Per-device block I/O counters."""
+        return await self.execute("query-blockstats")
+
+    async def system_powerdown(self) -> None:
+        """Send an ACPI power button press (graceful guest shutdown)."""
+        await self.execute("system_powerdown")
+
+    async def quit(self) -> None:
+        """Terminate QEMU immediately; the connection is closed afterwards."""
+        try:
+            await self.execute("quit")
+        except QMPError:
+            pass  # QEMU may close the socket before its reply is read
+        await self.close()
+
+
+class QMPPool:
+    """Lazily opened, reused QMP connections keyed by VM name."""
+
+    def __init__(self, socket_dir: Union[str, Path] = DEFAULT_SOCKET_DIR, timeout: float = 5.0):
+        self.socket_dir = Path(socket_dir)
+        self.timeout = timeout
+        self._clients: Dict[str, QMPClient] = {}
+
+    def names(self) -> List[str]:
+        """VM names that currently have a QMP socket in socket_dir."""
+        return sorted(p.stem for p in self.socket_dir.glob("*.qmp") if p.is_socket())
+
+    async def client(self, name: str) -> QMPClient:
+        """Connected client for name, reconnecting if the old one dropped."""
+        client = self._clients.get(name)
+        if client is None or not client.connected:
+            client = QMPClient(self.socket_dir / f"{name}.qmp", self.timeout)
+            await client.connect()
+            self._clients[name] = client
+        return client
+
+    async def execute(self, name: str, command: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """Run command on one VM."""
+        return await (await self.client(name)).execute(command, arguments)
+
+    async def execute_all(self, names: List[str], command: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run command on every VM concurrently; failures come back as QMPError values."""
+
+        async def one(name: str) -> Any:
+            try:
+                return await self.execute(name, command, arguments)
+            except QMPError as e:
+                return e
+
+        results = await asyncio.gather(*(one(name) for name in names))
+        return dict(zip(names, results))
+
+    async def close(self) -> None:
+        """Close every pooled connection."""
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(client.close() for client in clients))
+
+    async def __aenter__(self) -> "QMPPool":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+
+COMMANDS = {
+    "status": "query-status",
+    "cpus": "query-cpus-fast",
+    "blockstats": "query-blockstats",
+    "powerdown": "system_powerdown",
+    "quit": "quit",
+}
+
+
+async def _run(socket_dir: str, command: str, names: List[str]) -> int:
+    async with QMPPool(socket_dir) as pool:
+        names = names or pool.names()
+        if not names:
+            print(f"No QMP sockets in {socket_dir}")
+            return 1
+        results = await pool.execute_all(names, COMMANDS[command])
+    failed = 0
+    for name, result in results.items():
+        if isinstance(result, QMPError):
+            failed += 1
+            print(f"{name}: ERROR {result}")
+        elif command == "status":
+            print(f"{name}: {result['status']}")
+        elif command == "cpus":
+            threads = ", ".join(f"{cpu['cpu-index']}:{cpu['thread-id']}" for cpu in result)
+            print(f"{name}: vcpu:tid {threads}")
+        elif command == "blockstats":
+            for dev in result:
+                stats = dev["stats"]
+                print(f"{name}: {dev.get('device') or dev.get('qdev', '?'):<24} rd {stats['rd_bytes'] >> 20} MB  wr {stats['wr_bytes'] >> 20} MB")
+        else:
+            print(f"{name}: {command} sent")
+    return 1 if failed else 0
+
+
+def main() -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Query or control launched VMs over QMP")
+    parser.add_argument("command", choices=sorted(COMMANDS), help="Operation to run")
+    parser.add_argument("names", nargs="*", help="VM names (default: every socket in --socket-dir)")
+    parser.add_argument("--socket-dir", default=DEFAULT_SOCKET_DIR, help=f"QMP socket directory (default: {DEFAULT_SOCKET_DIR})")
+    args = parser.parse_args()
+    return asyncio.run(_run(args.socket_dir, args.command, args.names))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
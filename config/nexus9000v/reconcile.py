@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""Reconcile the running lab with its YAML: plan the smallest change, then apply it.
+
+The desired state is every S*_*.yaml switch config (or those of --site), the
+router YAMLs given with --router and the container configs given with
+--containers. The running state is the runtime registry (each entry carries
+the config its VM was started with), the OVS port -> bridge map and libvirt
+for containers. The plan has one action per VM that differs:
+
+    + start     not running (containers: "create" if not defined yet)
+    ~ rewire    only the bridges of its NICs changed (neighbors, isl_bridges,
+                mgmt_bridge; same NIC count and models), or a TAP sits on the
+                wrong bridge: the TAPs move between OVS bridges, the VM keeps
+                running
+    ! restart   anything else QEMU or day-0 sees changed (RAM, vCPUs, image,
+                NIC count or models, mgmt_ip, ...)
+    - stop      registered but in no config (switches of --site only)
+
+Everything else is left running. apply runs the plan in three phases, each
+parallel: stops and the stop half of restarts (one teardown: concurrent ACPI
+powerdown, pidfd waits, one TAP batch), all rewires in one ovs-vsctl
+transaction, then every start through create_fabric()'s worker pool with
+routers and containers alongside.
+
+Only the per-VM YAML is compared. After editing global_config.yaml, restart the
+affected VMs yourself. A container is restarted (recreated with
+config/containers/main.py) when its NIC bridges or MACs differ.
+
+Usage:
+    python3 reconcile.py plan                          # all switches
+    python3 reconcile.py plan --site 1 --router ../8000v/WAN1.yaml --containers ../containers/container_configs_access_mode.yaml
+    sudo python3 reconcile.py apply --site 1
+"""
+
+import argparse
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from fabric import load_yaml
+from registry import VMRegistry
+
+VIRSH = ["virsh", "-c", "lxc:///"]
+CONTAINER_MAIN = Path(__file__).resolve().parent.parent / "containers" / "main.py"
+WIRING_FIELDS = {"mgmt_bridge", "neighbors", "isl_bridges", "interface_types"}
+SYMBOLS = {"start": "+", "create": "+", "rewire": "~", "restart": "!", "stop": "-"}
+
+
+@dataclass
+class Action:
+    """One change to one VM or container."""
+
+    verb: str  # start | create | rewire | restart | stop
+    kind: str  # nexus9000v | c8000v | container
+    name: str
+    reason: str
+    ports: List[Tuple[str, str]] = field(default_factory=list)  # rewire: (TAP, bridge) to move
+
+
+@dataclass
+class Plan:
+    """The actions that bring the lab to the desired state."""
+
+    actions: List[Action]
+    unchanged: List[str]
+
+    def select(self, verbs: Tuple[str, ...], kind: str) -> List[Action]:
+        """Actions with one of verbs for kind."""
+        return [a for a in self.actions if a.verb in verbs and a.kind == kind]
+
+    def format(self) -> str:
+        """Human-readable plan."""
+        if not self.actions:
+            return f"No changes; {len(self.unchanged)} unchanged."
+        counts = ", ".join(f"{sum(1 for a in self.actions if a.verb == verb)} to {verb}" for verb in SYMBOLS if any(a.verb == verb for a in self.actions))
+        lines = [f"Plan: {counts}; {len(self.unchanged)} unchanged"]
+        for a in self.actions:
+            lines.append(f"  {SYMBOLS[a.verb]} {a.verb:<8} {a.name:<10} {a.reason}")
+        return "\n".join(lines)
+
+
+def config_changes(running: Dict[str, Any], desired: Dict[str, Any]) -> List[str]:
+    """Keys of desired whose running value differs."""
+    return sorted(key for key, value in desired.items() if running.get(key) != value)
+
+
+def nic_models(config: Dict[str, Any]) -> List[Optional[str]]:
+    """NIC models by position, as QEMU sees them (bridge names do not matter)."""
+    types = config.get("interface_types") or {}
+    return [types.get("mgmt")] + [types.get(bridge) for bridge in config.get("isl_bridges", [])]
+
+
+def describe(changes: List[str], running: Dict[str, Any], desired: Dict[str, Any]) -> str:
+    """'ram: 16384 -> 24576; ...' for the first few changed keys."""
+    text = "; ".join(f"{key}: {running.get(key)!r} -> {desired.get(key)!r}" for key in changes[:3])
+    return text + (f" (+{len(changes) - 3} more)" if len(changes) > 3 else "")
+
+
+def plan_switches(manager: Any, configs: List[Any], entries: Dict[str, Dict[str, Any]], port_map: Dict[str, str], sites: Optional[List[int]]) -> Plan:
+    """Actions for nexus9000v switches."""
+    actions, unchanged = [], []
+    for config in configs:
+        entry = entries.get(config.name)
+        if entry is None:
+            actions.append(Action("start", "nexus9000v", config.name, "not running"))
+            continue
+        desired, running = asdict(config), entry.get("config")
+        if running is None:  # registered before configs were recorded
+            if entry.get("config_hash") != manager.config_hash(config):
+                actions.append(Action("restart", "nexus9000v", config.name, "config changed"))
+            else:
+                unchanged.append(config.name)
+            continue
+        changes = config_changes(running, desired)
+        if not set(changes) <= WIRING_FIELDS or nic_models(running) != nic_models(desired):
+            actions.append(Action("restart", "nexus9000v", config.name, describe(changes, running, desired)))
+            continue
+        misplaced = [(tap, bridge) for tap, bridge in manager.ports(config) if port_map.get(tap) != bridge]
+        if misplaced:
+            moves = ", ".join(f"{tap}: {port_map.get(tap, 'detached')} -> {bridge}" for tap, bridge in misplaced)
+            actions.append(Action("rewire", "nexus9000v", config.name, moves, misplaced))
+        elif changes:  # e.g. neighbor renamed, bridges unchanged: just record the new config
+            actions.append(Action("rewire", "nexus9000v", config.name, describe(changes, running, desired)))
+        else:
+            unchanged.append(config.name)
+
+    names = {config.name for config in configs}
+    for name, entry in sorted(entries.items()):
+        if entry.get("kind") != "nexus9000v" or name in names:
+            continue
+        if not sites or any(name.startswith(f"S{site}_") for site in sites):
+            actions.append(Action("stop", "nexus9000v", name, "in no switch config"))
+    return Plan(actions, unchanged)
+
+
+def plan_routers(paths: List[Path], entries: Dict[str, Dict[str, Any]]) -> Plan:
+    """Actions for c8000v routers; only the keys set in each YAML are compared."""
+    actions, unchanged, names = [], [], set()
+    for path in paths:
+        desired = load_yaml(path) or {}
+        names.add(desired["name"])
+        entry = entries.get(desired["name"])
+        if entry is None:
+            actions.append(Action("start", "c8000v", desired["name"], "not running"))
+            continue
+        running = entry.get("config") or desired
+        changes = config_changes(running, desired)
+        if changes:
+            actions.append(Action("restart", "c8000v", desired["name"], describe(changes, running, desired)))
+        else:
+            unchanged.append(desired["name"])
+    if paths:
+        for name, entry in sorted(entries.items()):
+            if entry.get("kind") == "c8000v" and name not in names:
+                actions.append(Action("stop", "c8000v", name, "in no router config"))
+    return Plan(actions, unchanged)
+
+
+def virsh(*args: str) -> str:
+    """stdout of a virsh command against the LXC driver."""
+    return subprocess.run(VIRSH + list(args), capture_output=True, text=True, check=True).stdout
+
+
+def plan_containers(config_files: List[Path]) -> Plan:
+    """Actions for libvirt LXC containers: NIC bridges and MACs against the domain."""
+    actions, unchanged = [], []
+    specs = {}
+    for path in config_files:
+        for name, spec in ((load_yaml(path) or {}).get("containers") or {}).items():
+            specs[name] = spec
+    if not specs:
+        return Plan([], [])
+    defined = set(virsh("list", "--all", "--name").split())
+    running = set(virsh("list", "--name", "--state-running").split())
+    for name, spec in sorted(specs.items()):
+        if name not in defined:
+            actions.append(Action("create", "container", name, "not defined"))
+            continue
+        desired = sorted((spec[nic]["bridge"], spec[nic]["mac_address"].lower()) for nic in ("management_interface", "test_interface"))
+        # domiflist rows: Interface Type Source Model MAC
+        actual = sorted((row[2], row[4].lower()) for row in (line.split() for line in virsh("domiflist", name).splitlines()[2:]) if len(row) == 5)
+        if actual != desired:
+            actions.append(Action("restart", "container", name, f"NICs {actual} -> {desired}"))
+        elif name not in running:
+            actions.append(Action("start", "container", name, "not running"))
+        else:
+            unchanged.append(name)
+    return Plan(actions, unchanged)
+
+
+def stop_router(registry: VMRegistry, name: str, deadline: float) -> None:
+    """SIGTERM a router's QEMU, SIGKILL it after deadline seconds, then remove its TAPs."""
+    from nexus9000v import OVSPortManager  # pylint: disable=import-outside-toplevel
+
+    entry = registry.get(name)
+    if entry is None:
+        return
+    try:
+        pidfd = os.pidfd_open(entry["pid"])
+    except ProcessLookupError:
+        pidfd = None
+    if pidfd is not None:
+        try:
+            registry.kill(name)
+            if not select.select([pidfd], [], [], deadline)[0]:
+                registry.kill(name, signal.SIGKILL)
+                select.select([pidfd], [], [], 5)
+        finally:
+            os.close(pidfd)
+    OVSPortManager.remove_taps(entry.get("taps", []))
+
+
+def start_router(path: Path) -> None:
+    """Launch a router with the 8000v.py next to its YAML."""
+    subprocess.run([sys.executable, str(path.parent / "8000v.py"), "--config", str(path)], cwd=path.parent, check=True, capture_output=True)
+
+
+def create_container(config_file: Path, name: str) -> None:
+    """Build a container with config/containers/main.py and start it."""
+    subprocess.run([sys.executable, str(CONTAINER_MAIN), "--config", str(config_file), name], check=True, capture_output=True)
+    virsh("start", name)
+
+
+def apply(  # pylint: disable=too-many-arguments
+    plan: Plan, manager: Any, configs: Dict[str, Any], routers: Dict[str, Path], containers: Dict[str, Path], deadline: float, workers: int
+) -> List[Dict[str, Any]]:
+    """Run plan; returns one result row per action.
+
+    configs, routers and containers map names to SwitchConfigs and YAML paths.
+    """
+    from nexus9000v import OVSPortManager  # pylint: disable=import-outside-toplevel
+
+    results: Dict[str, Dict[str, Any]] = {a.name: {"action": a.verb, "name": a.name, "status": "ok"} for a in plan.actions}
+    start = time.monotonic()
+
+    def run(name: str, func: Any, *args: Any) -> None:
+        try:
+            func(*args)
+        except (OSError, RuntimeError, ValueError, subprocess.CalledProcessError) as e:
+            results[name].update(status="FAILED", error=str(e))
+
+    def stop_switches(actions: List[Action]) -> None:
+        restarts = [configs[a.name] for a in actions if a.verb == "restart"]
+        try:
+            rows = manager.teardown_fabric(restarts, deadline, False, [a.name for a in actions if a.verb == "stop"])
+        except (OSError, RuntimeError) as e:
+            rows = [{"name": a.name, "stopped": f"STILL RUNNING ({e})"} for a in actions]
+        for row in rows:
+            if row["stopped"].startswith("STILL RUNNING"):
+                results[row["name"]].update(status="FAILED", error=row["stopped"].lower())
+
+    running_containers = set(virsh("list", "--name", "--state-running").split()) if plan.select(("restart",), "container") else set()
+
+    # 1. Stop: switches in one teardown, routers and containers alongside.
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        switches_down = plan.select(("stop", "restart"), "nexus9000v")
+        if switches_down:
+            pool.submit(stop_switches, switches_down)
+        for a in plan.select(("stop", "restart"), "c8000v"):
+            pool.submit(run, a.name, stop_router, manager.registry, a.name, deadline)
+        for a in plan.select(("restart",), "container"):
+            if a.name in running_containers:
+                pool.submit(run, a.name, virsh, "destroy", a.name)
+    phases = {"stop": time.monotonic() - start}
+
+    # 2. Rewire: every moved TAP in one OVS transaction, then record the new configs.
+    rewires = plan.select(("rewire",), "nexus9000v")
+    ports = [port for a in rewires for port in a.ports]
+    try:
+        if ports:
+            OVSPortManager.attach_ports(ports)
+        for a in rewires:
+            manager.registry.update(a.name, config=asdict(configs[a.name]), config_hash=manager.config_hash(configs[a.name]))
+    except RuntimeError as e:
+        for a in rewires:
+            results[a.name].update(status="FAILED", error=str(e))
+    phases["rewire"] = time.monotonic() - start - phases["stop"]
+
+    # 3. Start: switches through create_fabric (one admission check), routers and containers alongside.
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for a in plan.select(("start", "restart"), "c8000v"):
+            pool.submit(run, a.name, start_router, routers[a.name])
+        for a in plan.select(("create", "restart"), "container"):
+            pool.submit(run, a.name, create_container, containers[a.name], a.name)
+        for a in plan.select(("start",), "container"):
+            pool.submit(run, a.name, virsh, "start", a.name)
+        switches_up = [configs[a.name] for a in plan.select(("start", "restart"), "nexus9000v")]
+        if switches_up:
+            try:
+                for row in manager.create_fabric(switches_up, workers=workers):
+                    if row["status"] == "FAILED":
+                        results[row["name"]].update(status="FAILED", error=row.get("error"))
+            except (RuntimeError, ValueError) as e:
+                for config in switches_up:
+                    results[config.name].update(status="FAILED", error=str(e))
+    phases["start"] = time.monotonic() - start - phases["stop"] - phases["rewire"]
+    print(", ".join(f"{phase} {seconds:.1f}s" for phase, seconds in phases.items()) + f"; total {time.monotonic() - start:.1f}s")
+    return list(results.values())
+
+
+def main() -> int:
+    """CLI entry point. apply exits 1 if any action failed."""
+    from nexus9000v import ConfigLoader, OVSPortManager, SwitchVMManager  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Diff the running lab against its YAML and apply the minimal change")
+    parser.add_argument("command", choices=["plan", "apply"])
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
+    parser.add_argument("--site", type=int, action="append", help="Only switches of this site (repeatable; default: all)")
+    parser.add_argument("--router", type=Path, action="append", default=[], help="8000v router YAML (repeatable)")
+    parser.add_argument("--containers", type=Path, action="append", default=[], help="Container config YAML (repeatable)")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel starts/stops (default: 4)")
+    parser.add_argument("--shutdown-deadline", type=float, default=20, help="Seconds to wait for ACPI shutdown before forcing (default: 20)")
+    parser.add_argument("--json", action="store_true", help="Print the plan (and results) as JSON")
+    args = parser.parse_args()
+
+    manager = SwitchVMManager(ConfigLoader.load_global_config(args.global_config))
+    configs = ConfigLoader.load_fabric_configs(Path.cwd(), args.site)
+    issues = manager.validate_fabric(configs)
+    if issues:
+        print("Fabric validation failed:\n  " + "\n  ".join(issues))
+        return 1
+
+    entries = {e["name"]: e for e in manager.registry.entries()}
+    port_map = OVSPortManager.port_bridges() if any(e.get("kind") == "nexus9000v" for e in entries.values()) else {}
+    parts = [plan_switches(manager, configs, entries, port_map, args.site), plan_routers(args.router, entries), plan_containers(args.containers)]
+    plan = Plan([a for p in parts for a in p.actions], [name for p in parts for name in p.unchanged])
+
+    if args.command == "plan":
+        print(json.dumps({"actions": [asdict(a) for a in plan.actions], "unchanged": plan.unchanged}, indent=2) if args.json else plan.format())
+        return 0
+
+    print(plan.format())
+    if not plan.actions:
+        return 0
+    routers = {(load_yaml(path) or {})["name"]: path.resolve() for path in args.router}
+    containers = {name: path.resolve() for path in args.containers for name in (load_yaml(path) or {}).get("containers") or {}}
+    results = apply(plan, manager, {c.name: c for c in configs}, routers, containers, args.shutdown_deadline, args.workers)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for row in results:
+            print(f"  {row['action']:<8} {row['name']:<10} {row['status']}  {row.get('error', '')}")
+    return 1 if any(row["status"] == "FAILED" for row in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
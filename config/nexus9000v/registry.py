@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Runtime registry of the VMs the launchers started.
+
+nexus9000v.py and 8000v.py record every VM they start in one JSON file
+(registry_file, default /run/n9kv/registry.json; /run is tmpfs, so the
+registry does not outlive a reboot). Each entry has the pid, the process start
+time, console/monitor ports, QMP socket, TAPs, disks and a hash of the VM's
+config. Listing, status and kill read that file instead of scanning the
+process table.
+
+A pid alone is not an identity: after QEMU exits the kernel may hand the same
+pid to an unrelated process. Entries therefore also record the process start
+time (field 22 of /proc/<pid>/stat). An entry whose pid is gone or now has a
+different start time is stale: reads skip it, and drop it from the file when
+the caller may write the registry and nobody else holds the lock
+(self-healing). Listing and status therefore work unprivileged.
+Kills open a pidfd first and re-check the start time through it, so the signal
+can only reach the process that was registered.
+
+Stopping a VM on purpose (kill here, nexus9000v.py --teardown-all) first
+writes a stop record, stopping/<pid>-<start_time> next to the registry, which
+tells supervisor.py not to restart it. The record is kept apart from the
+entries because teardown removes the entry and reads prune it as soon as the
+VM is gone, usually before the supervisor looks.
+
+Writers take an exclusive flock on <registry_file>.lock and replace the file
+atomically; readers never see a partial file.
+
+Usage:
+    python3 registry.py list [--json]
+    python3 registry.py status S1_LE1
+    sudo python3 registry.py kill S1_LE1 S1_LE2     # SIGTERM
+    sudo python3 registry.py kill --all -9 [-n]     # SIGKILL everything, or just show what would be killed
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import signal
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_REGISTRY = "/run/n9kv/registry.json"
+STOP_RECORD_TTL = 86400  # seconds; records nobody consumed (no supervisor) are dropped after this
+
+
+def qemu_processes(proc_root: Path = Path("/proc")) -> Dict[int, List[str]]:
+    """PID -> argv of every running QEMU process, from one scan of /proc/*/cmdline.
+
+    Covers VMs the registry does not know (started before it existed, or by
+    hand); capacity.py, ksm.py and teardown use it for that.
+    """
+    procs = {}
+    for proc in proc_root.glob("[0-9]*"):
+        try:
+            argv = [arg.decode(errors="replace") for arg in (proc / "cmdline").read_bytes().split(b"\0")]
+        except OSError:
+            continue
+        if argv and "qemu-system" in argv[0]:
+            procs[int(proc.name)] = argv
+    return procs
+
+
+def qemu_name(argv: List[str]) -> Optional[str]:
+    """The VM name from a QEMU argv (-name NAME[,...] or -name guest=NAME,...), or None."""
+    if "-name" not in argv[:-1]:
+        return None
+    return argv[argv.index("-name") + 1].split(",")[0].removeprefix("guest=")
+
+
+def qemu_vms(proc_root: Path = Path("/proc")) -> Dict[int, str]:
+    """PID -> -name of every running QEMU process that has one."""
+    return {pid: name for pid, name in ((pid, qemu_name(argv)) for pid, argv in qemu_processes(proc_root).items()) if name}
+
+
+def process_start_time(pid: int) -> Optional[int]:
+    """Start time of pid in clock ticks since boot, or None if there is no such process."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    return int(stat.rsplit(")", 1)[1].split()[19])  # field 22; comm (field 2) may contain spaces
+
+
+class VMRegistry:
+    """The launched-VM registry: name -> entry."""
+
+    def __init__(self, path: str = DEFAULT_REGISTRY):
+        self.path = Path(path)
+
+    @contextmanager
+    def _locked(self, blocking: bool = True) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """Read-modify-write under the registry lock; the yielded dict is written back.
+
+        With blocking=False, raises BlockingIOError if another process holds the lock.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "w", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            entries = self._read()
+            yield entries
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(entries, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def is_alive(entry: Dict[str, Any]) -> bool:
+        """True if the entry's process is still the one that was registered."""
+        return process_start_time(entry["pid"]) == entry["start_time"]
+
+    def record(self, name: str, pid: int, **fields: Any) -> Dict[str, Any]:
+        """Register a just-started VM (replacing any previous entry of that name)."""
+        start_time = process_start_time(pid)
+        if start_time is None:
+            raise RuntimeError(f"{name}: process {pid} exited before it could be registered")
+        entry = {"name": name, "pid": pid, "start_time": start_time, "registered_at": time.time(), **fields}
+        with self._locked() as entries:
+            entries[name] = entry
+        return entry
+
+    def remove(self, name: str) -> None:
+        """Forget name (no-op if it is not registered)."""
+        if name in self._read():
+            with self._locked() as entries:
+                entries.pop(name, None)
+
+    def update(self, name: str, **fields: Any) -> None:
+        """Change fields of name's entry (no-op if it is not registered)."""
+        with self._locked() as entries:
+            if name in entries:
+                entries[name].update(fields)
+
+    @property
+    def stop_dir(self) -> Path:
+        """Directory of the stop records."""
+        return self.path.parent / "stopping"
+
+    def mark_stopping(self, name: str) -> None:
+        """Record that name's VM is stopped on purpose, so supervisor.py does not restart it."""
+        entry = self._read().get(name)
+        if entry is None:
+            return
+        self.stop_dir.mkdir(parents=True, exist_ok=True)
+        for record in self.stop_dir.iterdir():
+            if record.stat().st_mtime < time.time() - STOP_RECORD_TTL:
+                record.unlink(missing_ok=True)
+        (self.stop_dir / f"{entry['pid']}-{entry['start_time']}").write_text(f"{name}\n", encoding="utf-8")
+
+    def consume_stop(self, pid: int, start_time: int) -> bool:
+        """True if the process (pid, start_time) was stopped on purpose; the record is removed."""
+        try:
+            (self.stop_dir / f"{pid}-{start_time}").unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def last_entry(self, name: str) -> Optional[Dict[str, Any]]:
+        """name's entry even if its VM has exited (until a read prunes it)."""
+        return self._read().get(name)
+
+    def _prune(self, stale: List[str]) -> None:
+        """Drop stale entries from the file if we can; readers without write access or racing a writer skip it."""
+        try:
+            with self._locked(blocking=False) as entries:
+                for name in stale:
+                    if name in entries and not self.is_alive(entries[name]):
+                        del entries[name]
+        except (BlockingIOError, PermissionError):
+            pass
+
+    def entries(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Live entries by name; stale ones are skipped (and pruned from the file when possible)."""
+        current = self._read()
+        stale = [name for name, entry in current.items() if not self.is_alive(entry)]
+        if stale:
+            self._prune(stale)
+        return [entry for name, entry in sorted(current.items()) if name not in stale and (kind is None or entry.get("kind") == kind)]
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """name's entry if its VM is still running."""
+        entry = self._read().get(name)
+        if entry is None:
+            return None
+        if not self.is_alive(entry):
+            self._prune([name])
+            return None
+        return entry
+
+    def kill(self, name: str, sig: int = signal.SIGTERM) -> bool:
+        """Signal name's QEMU process. False if it was not running (its entry is dropped)."""
+        entry = self.get(name)
+        if entry is None:
+            return False
+        try:
+            pidfd = os.pidfd_open(entry["pid"])
+        except ProcessLookupError:
+            self.remove(name)
+            return False
+        try:
+            # The pidfd pins the process; if the start time still matches, it is ours.
+            if process_start_time(entry["pid"]) != entry["start_time"]:
+                self.remove(name)
+                return False
+            self.mark_stopping(name)
+            signal.pidfd_send_signal(pidfd, sig)
+        finally:
+            os.close(pidfd)
+        return True
+
+
+def main() -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="List, inspect and stop VMs from the launcher registry")
+    parser.add_argument("--registry", default=DEFAULT_REGISTRY, help=f"Registry file (default: {DEFAULT_REGISTRY})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_parser = sub.add_parser("list", help="Running VMs")
+    list_parser.add_argument("--kind", help="Only this kind (nexus9000v, c8000v)")
+    list_parser.add_argument("--json", action="store_true", help="Print JSON")
+    status_parser = sub.add_parser("status", help="One VM's entry; exit 1 if not running")
+    status_parser.add_argument("name")
+    kill_parser = sub.add_parser("kill", help="Signal VMs")
+    kill_parser.add_argument("names", nargs="*")
+    kill_parser.add_argument("--all", action="store_true", help="Every registered VM")
+    kill_parser.add_argument("--kind", help="With --all: only this kind")
+    kill_parser.add_argument("-9", "--force", action="store_true", help="SIGKILL instead of SIGTERM")
+    kill_parser.add_argument("-n", "--dry-run", action="store_true", help="Only show what would be killed")
+    args = parser.parse_args()
+
+    registry = VMRegistry(args.registry)
+
+    if args.command == "list":
+        entries = registry.entries(args.kind)
+        if args.json:
+            print(json.dumps(entries, indent=2))
+            return 0
+        print(f"{'NAME':<12} {'KIND':<11} {'PID':>8} {'TELNET':>7}  {'UP':>8}  TAPS")
+        for e in entries:
+            seconds = int(time.time() - e["registered_at"])
+            up = f"{seconds // 86400}d {seconds % 86400 // 3600:02d}:{seconds % 3600 // 60:02d}"
+            print(f"{e['name']:<12} {e.get('kind', '?'):<11} {e['pid']:>8} {e.get('telnet_port', '-'):>7}  {up:>8}  {','.join(e.get('taps', []))}")
+        return 0
+
+    if args.command == "status":
+        entry = registry.get(args.name)
+        if entry is None:
+            print(f"{args.name} is not running")
+            return 1
+        print(json.dumps(entry, indent=2))
+        return 0
+
+    if not args.names and not args.all:
+        parser.error("kill needs VM names or --all")
+    names = [e["name"] for e in registry.entries(args.kind)] if args.all else args.names
+    sig = signal.SIGKILL if args.force else signal.SIGTERM
+    if not names:
+        print("No registered VMs running.")
+    for name in names:
+        if args.dry_run:
+            print(f"Would kill {name} (SIG{sig.name[3:]})" if registry.get(name) else f"{name} is not running")
+        elif registry.kill(name, sig):
+            print(f"Killing {name} (SIG{sig.name[3:]})")
+        else:
+            print(f"{name} is not running")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
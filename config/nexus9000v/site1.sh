@@ -1,7 +1,2 @@
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S1_BG1.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S1_LE1.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S1_LE2.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S1_LE3.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S1_LE4.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S1_TOR1.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S1_SP1.yaml
+# Bring up every SITE1 switch concurrently (S1_*.yaml); exits non-zero if any switch fails.
+sudo python3 nexus9000v.py --debug --global-config global_config.yaml --fabric --site 1
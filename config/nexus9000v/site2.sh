@@ -1,3 +1,2 @@
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S2_BG1.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S2_LE1.yaml
-sudo python3 nexus9000v.py --debug --global-config global_config.yaml --config S2_SP1.yaml
+# Bring up every SITE2 switch concurrently (S2_*.yaml); exits non-zero if any switch fails.
+sudo python3 nexus9000v.py --debug --global-config global_config.yaml --fabric --site 2
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Warm-start snapshots: save a booted switch, resume it later in seconds.
+
+A snapshot is one directory per switch, <snapshot_path>/<name>/:
+
+- state: QEMU's migration stream (guest RAM + device state), written over QMP
+  with the vCPUs stopped (migrate to "exec:cat > state")
+- the switch's disks (boot qcow2, external storage), copied with
+  cp --reflink=auto --sparse=always after the migration flushed them, plus the
+  overlay's .backing.json sidecar
+- meta.json: when it was taken and the compatibility key
+
+Each switch boots its own day-0 ISO and has its own MACs, so snapshots are
+never shared between switches. The key (image + base image fingerprint, RAM,
+vCPUs, NIC models/MACs/queues, disk bus, day-0 ISO fingerprint, QEMU version)
+is computed by SwitchVMManager.snapshot_key(); a restore whose key differs is
+refused, since QEMU would fail or the guest would see different hardware. The
+key does not cover an overlay's backing file (the golden image, when the cache
+is on), so a restore also checks each saved overlay against its sidecar before
+any disk is copied back.
+
+Restoring copies the disks back, starts QEMU with "-incoming defer", feeds the
+state file with migrate-incoming and waits for the VM to run. The guest's
+clock resumes where it was saved; NX-OS resyncs it via NTP.
+
+Usage:
+    sudo python3 snapshot.py save S1_LE1.yaml --wait-ready     # after login, snapshot, keep running
+    sudo python3 snapshot.py save S1_LE1.yaml S1_LE2.yaml --stop
+    python3 snapshot.py list
+    sudo python3 snapshot.py delete S1_LE1
+    sudo python3 nexus9000v.py --config S1_LE1.yaml --restore
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from qmp import QMPClient, QMPError
+
+MAX_BANDWIDTH = 1 << 40  # bytes/s; the VM is paused, so never throttle the stream
+
+
+class SnapshotStore:
+    """Per-switch snapshots under one root directory."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path(self, name: str) -> Path:
+        """Snapshot directory of switch name."""
+        return self.root / name
+
+    def meta(self, name: str) -> Optional[Dict[str, Any]]:
+        """meta.json of name's snapshot, or None if there is none."""
+        try:
+            return json.loads((self.path(name) / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def list_entries(self) -> List[Dict[str, Any]]:
+        """Every complete snapshot's metadata, by name."""
+        return [meta for meta in (self.meta(d.name) for d in sorted(self.root.glob("*")) if d.is_dir()) if meta]
+
+    def delete(self, name: str) -> None:
+        """Remove name's snapshot."""
+        shutil.rmtree(self.path(name))
+
+    def mismatches(self, name: str, key: Dict[str, Any]) -> List[str]:
+        """Why name's snapshot cannot be restored under key (empty if it can)."""
+        meta = self.meta(name)
+        if meta is None:
+            return [f"no snapshot of {name} in {self.root}"]
+        saved = meta["key"]
+        return [f"{field}: snapshot {saved.get(field)!r}, now {key.get(field)!r}" for field in sorted(set(saved) | set(key)) if saved.get(field) != key.get(field)]
+
+    def save(self, name: str, qmp_socket: str, disks: List[Path], key: Dict[str, Any], resume: bool = True) -> Dict[str, Any]:
+        """Snapshot a running VM. It is left paused unless resume; returns the new meta.json.
+
+        Written to <name>.partial and renamed, so an interrupted save never
+        replaces a good snapshot. If the save fails, the partial directory is
+        removed and (with resume) the VM is unpaused before the error propagates.
+        """
+        partial = self.root / f"{name}.partial"
+        shutil.rmtree(partial, ignore_errors=True)
+        partial.mkdir(parents=True)
+        start = time.monotonic()
+        try:
+            asyncio.run(self._migrate_out(qmp_socket, partial / "state"))
+            for disk in disks:
+                subprocess.run(["cp", "--reflink=auto", "--sparse=always", str(disk), str(partial / disk.name)], check=True)
+                sidecar = disk.with_name(disk.name + ".backing.json")
+                if sidecar.exists():
+                    shutil.copy2(sidecar, partial / sidecar.name)
+            meta = {
+                "name": name,
+                "created": time.time(),
+                "save_seconds": round(time.monotonic() - start, 1),
+                "state_bytes": (partial / "state").stat().st_size,
+                "disks": [disk.name for disk in disks],
+                "key": key,
+            }
+            (partial / "meta.json").write_text(json.dumps(meta, indent=2, sort_keys=True), encoding="utf-8")
+        except BaseException:  # includes Ctrl-C during a long migration
+            shutil.rmtree(partial, ignore_errors=True)
+            if resume:
+                with contextlib.suppress(OSError, QMPError):  # keep the original error
+                    asyncio.run(self._abort_migration(qmp_socket))
+            raise
+        if resume:
+            asyncio.run(self._execute(qmp_socket, "cont"))
+        shutil.rmtree(self.path(name), ignore_errors=True)
+        partial.rename(self.path(name))
+        return meta
+
+    def disks(self, name: str) -> List[Path]:
+        """The disk copies in name's snapshot (their .backing.json sidecars sit next to them)."""
+        meta = self.meta(name)
+        return [self.path(name) / disk for disk in meta["disks"]] if meta else []
+
+    def restore_disks(self, name: str, dest_dir: Path) -> None:
+        """Copy name's snapshot disks (and overlay sidecars) back over the VM's disks."""
+        meta = self.meta(name)
+        if meta is None:
+            raise RuntimeError(f"no snapshot of {name} in {self.root}")
+        for disk in meta["disks"]:
+            for file in (self.path(name) / disk, self.path(name) / f"{disk}.backing.json"):
+                if file.exists():
+                    subprocess.run(["cp", "--reflink=auto", "--sparse=always", str(file), str(dest_dir / file.name)], check=True)
+
+    def load_state(self, name: str, qmp_socket: str, timeout: float = 300.0) -> float:
+        """Feed the state file to a QEMU started with -incoming defer; returns seconds until it runs."""
+        return asyncio.run(self._migrate_in(qmp_socket, self.path(name) / "state", timeout))
+
+    @staticmethod
+    async def _execute(qmp_socket: str, command: str) -> Any:
+        async with QMPClient(qmp_socket) as client:
+            return await client.execute(command)
+
+    @staticmethod
+    async def _wait_migration(client: QMPClient, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            info = await client.execute("query-migrate")
+            if info.get("status") == "completed":
+                return
+            if info.get("status") in ("failed", "cancelled"):
+                raise QMPError(f"{client.path}: migration {info['status']}: {info.get('error-desc', '')}")
+            await asyncio.sleep(0.2)
+        raise QMPError(f"{client.path}: migration did not finish within {timeout:.0f}s")
+
+    async def _migrate_out(self, qmp_socket: str, state: Path, timeout: float = 1800.0) -> None:
+        async with QMPClient(qmp_socket) as client:
+            await client.execute("stop")
+            await client.execute("migrate-set-parameters", {"max-bandwidth": MAX_BANDWIDTH})
+            await client.execute("migrate", {"uri": f"exec:cat > {shlex.quote(str(state))}"})
+            await self._wait_migration(client, timeout)
+
+    @staticmethod
+    async def _abort_migration(qmp_socket: str) -> None:
+        """Cancel an unfinished outgoing migration and unpause the VM."""
+        async with QMPClient(qmp_socket) as client:
+            with contextlib.suppress(QMPError):  # nothing to cancel
+                await client.execute("migrate_cancel")
+            await client.execute("cont")
+
+    async def _migrate_in(self, qmp_socket: str, state: Path, timeout: float) -> float:
+        start = time.monotonic()
+        while True:  # QEMU creates the socket shortly after exec
+            try:
+                client = await QMPClient(qmp_socket).connect()
+                break
+            except QMPError:
+                if time.monotonic() - start > 30:
+                    raise
+                await asyncio.sleep(0.1)
+        try:
+            await client.execute("migrate-incoming", {"uri": f"exec:cat {shlex.quote(str(state))}"})
+            while time.monotonic() - start < timeout:
+                status = (await client.query_status()).get("status")
+                if status == "running":
+                    return time.monotonic() - start
+                if status in ("inmigrate", "paused", "prelaunch", "restore-vm"):
+                    await asyncio.sleep(0.2)
+                    continue
+                raise QMPError(f"{qmp_socket}: VM is {status!r} after incoming migration")
+            raise QMPError(f"{qmp_socket}: VM not running {timeout:.0f}s after restore")
+        finally:
+            await client.close()
+
+
+async def quit_vm(qmp_socket: str) -> None:
+    """Stop QEMU (after a snapshot with --stop)."""
+    async with QMPClient(qmp_socket) as client:
+        await client.quit()
+
+
+def main() -> int:
+    """CLI entry point."""
+    from nexus9000v import ConfigLoader, SwitchVMManager  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Save, list and delete warm-start switch snapshots")
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Global configuration file (default: global_config.yaml)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    save_parser = sub.add_parser("save", help="Snapshot running switches")
+    save_parser.add_argument("configs", nargs="+", type=Path, help="Switch YAML files")
+    save_parser.add_argument("--wait-ready", action="store_true", help="First wait on the console for the login prompt")
+    save_parser.add_argument("--boot-timeout", type=float, default=1800, help="With --wait-ready: seconds to wait (default: 1800)")
+    save_parser.add_argument("--stop", action="store_true", help="Quit each VM after its snapshot instead of resuming it")
+    sub.add_parser("list", help="Show saved snapshots")
+    delete_parser = sub.add_parser("delete", help="Remove snapshots")
+    delete_parser.add_argument("names", nargs="+")
+    args = parser.parse_args()
+
+    global_config = ConfigLoader.load_global_config(args.global_config)
+    manager = SwitchVMManager(global_config)
+    store = manager.snapshot_store
+
+    if args.command == "list":
+        print(f"{'SWITCH':<10} {'CREATED':<17} {'STATE MB':>9} {'SAVE S':>7}  IMAGE")
+        for meta in store.list_entries():
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(meta["created"]))
+            print(f"{meta['name']:<10} {created:<17} {meta['state_bytes'] >> 20:>9} {meta['save_seconds']:>7}  {meta['key'].get('image')}")
+        return 0
+
+    if args.command == "delete":
+        for name in args.names:
+            store.delete(name)
+        return 0
+
+    configs = [ConfigLoader.load_switch_config(path) for path in args.configs]
+    if args.wait_ready:
+        from boot_watcher import BootTarget, wait_for_ready  # pylint: disable=import-outside-toplevel
+
+        targets = [BootTarget(c.name, c.telnet_port, c.role, c.image_name or global_config.default_image) for c in configs]
+        not_ready = [r.name for r in wait_for_ready(targets, timeout=args.boot_timeout) if not r.ready]
+        if not_ready:
+            print(f"Not at login, not snapshotted: {', '.join(not_ready)}")
+            configs = [c for c in configs if c.name not in not_ready]
+    failed = False
+    for config in configs:
+        try:
+            meta = manager.save_snapshot(config, resume=not args.stop)
+            print(f"{config.name}: {meta['state_bytes'] >> 20} MB state saved in {meta['save_seconds']}s")
+            if args.stop:
+                asyncio.run(quit_vm(global_config.qmp_socket(config.name)))
+        except (QMPError, OSError, subprocess.CalledProcessError) as e:
+            print(f"{config.name}: snapshot failed: {e}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
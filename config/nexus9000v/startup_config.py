@@ -19,9 +19,10 @@ import sys
 import tempfile
 from pathlib import Path
 
-import yaml
 from jinja2 import Environment, FileSystemLoader, StrictUndefined
 
+from fabric import fabric_paths, load_yaml
+
 HERE = Path(__file__).resolve().parent
 GLOBAL_CONFIG = HERE / "global_config.yaml"
 TEMPLATE = "nxos_startup_config.j2"
@@ -30,14 +31,12 @@ DEFAULT_PASSWORD = "SuperSecretPassword"
 
 def load_global(path: Path = GLOBAL_CONFIG) -> dict:
     """Load global_config.yaml."""
-    with open(path, encoding="utf-8") as handle:
-        return yaml.safe_load(handle) or {}
+    return load_yaml(path) or {}
 
 
 def load_switch(path: Path) -> dict:
     """Load one per-switch YAML."""
-    with open(path, encoding="utf-8") as handle:
-        return yaml.safe_load(handle) or {}
+    return load_yaml(path) or {}
 
 
 def derive_interfaces(switch: dict) -> list:
@@ -112,8 +111,7 @@ def main() -> int:
     env = _env()
 
     if args.all:
-        targets = sorted(HERE.glob("S*.yaml"))
-        targets = [t for t in targets if not t.name.endswith(".netplan.yaml")]
+        targets = fabric_paths(HERE)
     elif args.yaml:
         targets = [Path(args.yaml) if Path(args.yaml).is_absolute() else HERE / args.yaml]
     else:
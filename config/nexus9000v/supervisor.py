@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""Keep the lab's switch and router VMs running: one supervisor for all of them.
+
+supervisor.py starts each configured VM through its normal launcher
+(nexus9000v.py --config S1_LE1.yaml, ../8000v/8000v.py --config WAN1.yaml), so
+admission, disks, TAPs and registration are exactly those of a manual launch.
+It is a child subreaper (PR_SET_CHILD_SUBREAPER): when a launcher exits, its
+QEMU process is reparented to the supervisor, which reaps it and reads its exit
+status. VMs already running when the supervisor starts are adopted from the
+registry and watched as well, but their exit status cannot be read.
+
+Nothing is polled. Every VM (and every launcher still running) is a pidfd in a
+single poll() set, next to a self-pipe for signals; the only timeout is the
+next scheduled restart.
+
+When a VM exits:
+
+- on purpose, i.e. exit status 0 (guest poweroff, QMP quit, SIGTERM) or there
+  is a registry stop record for its pid and start time (registry.py kill,
+  --teardown-all): it is left "stopped"
+- otherwise it crashed: the exit status and the tails of its console, QEMU and
+  launcher logs are kept, and it is restarted after backoff_base * 2^(n-1)
+  seconds (at most backoff_max), n being its consecutive crashes. A VM that
+  stayed up stable_seconds starts counting from 1 again.
+- more than max_restarts crashes within crash_window seconds is a crash loop:
+  no more restarts until SIGHUP (systemctl reload n9kv-supervisor), which also
+  starts stopped VMs again
+
+Console and QEMU logs need console_log_dir in the launchers' global config.
+State is written atomically to supervisor.json next to the registry on every
+change; the cockpit monitor shows it. SIGTERM stops the supervisor and leaves
+the VMs running (KillMode=process in n9kv-supervisor.service); the next
+supervisor adopts them.
+
+Usage:
+    sudo python3 supervisor.py run --site 1 --site 2 --router ../8000v/WAN1.yaml
+    python3 supervisor.py status [--json]
+"""
+
+import argparse
+import ctypes
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from fabric import load_yaml
+from registry import DEFAULT_REGISTRY, VMRegistry, process_start_time
+
+PR_SET_CHILD_SUBREAPER = 36
+TAIL_LINES = 20
+HERE = Path(__file__).resolve().parent
+
+
+@dataclass
+class Unit:  # pylint: disable=too-many-instance-attributes
+    """One supervised VM and its restart bookkeeping."""
+
+    name: str
+    kind: str
+    command: List[str]  # launcher invocation
+    cwd: Path
+    state: str = "pending"  # starting | running | backoff | stopped | crash-loop
+    pid: Optional[int] = None
+    start_time: Optional[int] = None  # of pid; identifies its stop record
+    adopted: bool = False
+    started_at: Optional[float] = None
+    next_start: Optional[float] = None
+    restarts: int = 0
+    failures: int = 0  # consecutive crashes; drives the backoff
+    crashes: Deque[float] = field(default_factory=deque)
+    last_exit: Optional[Dict[str, Any]] = None
+    launcher: Optional["subprocess.Popen[bytes]"] = None
+
+    def status(self) -> Dict[str, Any]:
+        """JSON-serialisable view for supervisor.json."""
+        fields = ("name", "kind", "state", "pid", "adopted", "started_at", "next_start", "restarts", "last_exit")
+        return {name: getattr(self, name) for name in fields}
+
+
+def switch_unit(path: Path, global_config: Path) -> Unit:
+    """Unit for a nexus9000v switch config."""
+    path = path.resolve()
+    command = [sys.executable, str(HERE / "nexus9000v.py"), "--config", str(path), "--global-config", str(global_config.resolve())]
+    return Unit(load_yaml(path)["name"], "nexus9000v", command, path.parent)
+
+
+def router_unit(path: Path) -> Unit:
+    """Unit for a c8000v router config; 8000v.py and its global_config.yaml sit next to it."""
+    path = path.resolve()
+    command = [sys.executable, str(path.parent / "8000v.py"), "--config", str(path)]
+    return Unit(load_yaml(path)["name"], "c8000v", command, path.parent)
+
+
+def tail(path: Optional[str], lines: int = TAIL_LINES) -> List[str]:
+    """Last lines of a log file (empty if there is none)."""
+    if not path:
+        return []
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - 4096))
+            return f.read().decode(errors="replace").splitlines()[-lines:]
+    except OSError:
+        return []
+
+
+def describe_exit(info: "os.waitid_result") -> Tuple[str, bool]:
+    """Human-readable exit status and whether it was a clean exit."""
+    if info.si_code == os.CLD_EXITED:
+        return f"exited with status {info.si_status}", info.si_status == 0
+    return f"killed by {signal.Signals(info.si_status).name}", False
+
+
+class Supervisor:  # pylint: disable=too-many-instance-attributes
+    """Start, watch and restart a set of VMs."""
+
+    def __init__(
+        self,
+        units: List[Unit],
+        registry: VMRegistry,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+        stable_seconds: float = 600.0,
+        max_restarts: int = 5,
+        crash_window: float = 1800.0,
+    ):
+        self.units = {unit.name: unit for unit in units}
+        self.registry = registry
+        self.state_file = registry.path.parent / "supervisor.json"
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stable_seconds = stable_seconds
+        self.max_restarts = max_restarts
+        self.crash_window = crash_window
+        self._poller = select.poll()
+        self._watched: Dict[int, Tuple[Unit, str]] = {}  # pidfd -> (unit, "launcher" | "vm")
+        self._stop = False
+        self._reset = False
+
+    def run(self) -> None:
+        """Supervise until SIGTERM/SIGINT."""
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) != 0:
+            raise OSError(ctypes.get_errno(), "prctl(PR_SET_CHILD_SUBREAPER) failed")
+        wake_r, wake_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        signal.set_wakeup_fd(wake_w)
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, self._on_signal)
+        self._poller.register(wake_r, select.POLLIN)
+
+        for unit in self.units.values():
+            entry = self.registry.get(unit.name)
+            if entry is not None:
+                self._adopt(unit, entry)
+            else:
+                self._launch(unit)
+        self._save()
+
+        while not self._stop:
+            due = [unit.next_start for unit in self.units.values() if unit.state == "backoff" and unit.next_start is not None]
+            timeout = None if not due else max(0, int((min(due) - time.time()) * 1000))
+            for fd, _ in self._poller.poll(timeout):
+                if fd == wake_r:
+                    while True:
+                        try:
+                            if not os.read(wake_r, 512):
+                                break
+                        except BlockingIOError:
+                            break
+                else:
+                    self._on_exit(fd)
+            if self._reset:
+                self._reset = False
+                self._restart_held()
+            self._reap_strays()
+            for unit in self.units.values():
+                if unit.state == "backoff" and unit.next_start is not None and unit.next_start <= time.time():
+                    unit.restarts += 1
+                    self._launch(unit)
+            self._save()
+        print("Supervisor stopping; VMs are left running", flush=True)
+        self._save(running=False)
+
+    def _on_signal(self, signum: int, _frame: Any) -> None:
+        if signum == signal.SIGHUP:
+            self._reset = True
+        elif signum != signal.SIGCHLD:
+            self._stop = True
+
+    def _watch(self, pid: int, unit: Unit, what: str) -> bool:
+        """Add pid's pidfd to the poll set; False if it is already gone."""
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return False
+        self._watched[fd] = (unit, what)
+        self._poller.register(fd, select.POLLIN)
+        return True
+
+    def _launch(self, unit: Unit) -> None:
+        """Run unit's launcher; its QEMU is picked up when the launcher exits."""
+        with open(self.state_file.parent / f"{unit.name}.launch.log", "wb") as log:
+            unit.launcher = subprocess.Popen(unit.command, cwd=unit.cwd, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+        unit.state, unit.pid, unit.next_start, unit.adopted = "starting", None, None, False
+        self._watch(unit.launcher.pid, unit, "launcher")
+        print(f"{unit.name}: starting ({' '.join(unit.command[1:])})", flush=True)
+
+    def _adopt(self, unit: Unit, entry: Dict[str, Any]) -> None:
+        """Watch a VM that was already running."""
+        if self._watch(entry["pid"], unit, "vm") and process_start_time(entry["pid"]) == entry["start_time"]:
+            unit.state, unit.pid, unit.start_time, unit.adopted = "running", entry["pid"], entry["start_time"], True
+            unit.started_at = entry.get("registered_at", time.time())
+            print(f"{unit.name}: adopted running pid {unit.pid}", flush=True)
+        else:
+            self._launch(unit)
+
+    def _on_exit(self, fd: int) -> None:
+        unit, what = self._watched.pop(fd)
+        self._poller.unregister(fd)
+        try:
+            if what == "launcher":
+                self._launcher_exited(unit)
+            else:
+                self._vm_exited(unit, fd)
+        finally:
+            os.close(fd)
+
+    def _launcher_exited(self, unit: Unit) -> None:
+        assert unit.launcher is not None
+        returncode = unit.launcher.wait()
+        unit.launcher = None
+        entry = self.registry.get(unit.name)
+        if returncode == 0 and entry is not None:
+            # The launcher is gone, so QEMU is now our child (subreaper).
+            unit.state, unit.pid, unit.start_time, unit.started_at = "running", entry["pid"], entry["start_time"], time.time()
+            if self._watch(entry["pid"], unit, "vm"):
+                print(f"{unit.name}: running, pid {unit.pid}", flush=True)
+                return
+        self._crashed(unit, f"launcher exited with status {returncode}", {"launch": tail(str(self.state_file.parent / f"{unit.name}.launch.log"))})
+
+    def _vm_exited(self, unit: Unit, fd: int) -> None:
+        entry = self.registry.last_entry(unit.name) or {}
+        try:
+            info = os.waitid(os.P_PIDFD, fd, os.WEXITED)
+            assert info is not None
+            how, clean = describe_exit(info)
+        except ChildProcessError:  # adopted, so not our child
+            how, clean = "exited (status unknown, adopted)", False
+        on_purpose = unit.pid is not None and unit.start_time is not None and self.registry.consume_stop(unit.pid, unit.start_time)
+        if clean or on_purpose:
+            unit.state, unit.pid, unit.start_time = "stopped", None, None
+            print(f"{unit.name}: stopped ({how})", flush=True)
+            return
+        logs = {log: tail(entry.get(f"{log}_log")) for log in ("console", "qemu")}
+        self._crashed(unit, how, logs)
+
+    def _crashed(self, unit: Unit, how: str, logs: Dict[str, List[str]]) -> None:
+        """Record a crash and schedule the restart, unless unit is crash-looping."""
+        now = time.time()
+        uptime = now - unit.started_at if unit.started_at and unit.state == "running" else 0.0
+        if uptime >= self.stable_seconds:
+            unit.failures = 0
+        unit.failures += 1
+        unit.crashes.append(now)
+        while unit.crashes[0] < now - self.crash_window:
+            unit.crashes.popleft()
+        unit.pid, unit.start_time = None, None
+        unit.last_exit = {"time": now, "how": how, "uptime": round(uptime), "logs": logs}
+        print(f"{unit.name}: {how} after {uptime:.0f}s", flush=True)
+        for log, lines in logs.items():
+            for line in lines:
+                print(f"  {log}| {line}", flush=True)
+        if len(unit.crashes) > self.max_restarts:
+            unit.state, unit.next_start = "crash-loop", None
+            print(f"{unit.name}: {len(unit.crashes)} crashes in {self.crash_window:.0f}s, not restarting (SIGHUP to retry)", flush=True)
+            return
+        delay = min(self.backoff_base * 2 ** (unit.failures - 1), self.backoff_max)
+        unit.state, unit.next_start = "backoff", now + delay
+        print(f"{unit.name}: restarting in {delay:.0f}s", flush=True)
+
+    def _restart_held(self) -> None:
+        """SIGHUP: start crash-looping and stopped VMs again."""
+        for unit in self.units.values():
+            if unit.state in ("crash-loop", "stopped"):
+                unit.crashes.clear()
+                unit.failures = 0
+                unit.state, unit.next_start = "backoff", time.time()
+
+    def _reap_strays(self) -> None:
+        """Reap orphans reparented to us that are not VMs (e.g. a launcher's helpers)."""
+        tracked = {unit.pid for unit in self.units.values()} | {unit.launcher.pid for unit in self.units.values() if unit.launcher}
+        while True:
+            try:
+                info = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            except ChildProcessError:
+                return
+            if info is None or info.si_pid in tracked:
+                return
+            os.waitpid(info.si_pid, 0)
+
+    def _save(self, running: bool = True) -> None:
+        state = {
+            "pid": os.getpid() if running else None,
+            "updated": time.time(),
+            "units": [unit.status() for unit in sorted(self.units.values(), key=lambda u: u.name)],
+        }
+        tmp = self.state_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp, self.state_file)
+
+
+def read_state(registry_file: str = DEFAULT_REGISTRY) -> Optional[Dict[str, Any]]:
+    """supervisor.json next to registry_file, or None if no supervisor has run."""
+    try:
+        return json.loads((Path(registry_file).parent / "supervisor.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def print_state(state: Dict[str, Any]) -> None:
+    """Human-readable supervisor state."""
+    if not state["pid"]:
+        print("Supervisor is not running (last state below)")
+    print(f"{'NAME':<12} {'KIND':<11} {'STATE':<11} {'PID':>8} {'RESTARTS':>8}  LAST EXIT")
+    for unit in state["units"]:
+        last = unit["last_exit"]
+        last_exit = f"{time.strftime('%m-%d %H:%M:%S', time.localtime(last['time']))} {last['how']}" if last else "-"
+        if unit["state"] == "backoff":
+            last_exit += f" (restart in {max(0, unit['next_start'] - time.time()):.0f}s)"
+        print(f"{unit['name']:<12} {unit['kind']:<11} {unit['state']:<11} {unit['pid'] or '-'!s:>8} {unit['restarts']:>8}  {last_exit}")
+
+
+def main() -> int:
+    """CLI entry point."""
+    from nexus9000v import ConfigLoader  # pylint: disable=import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description="Start the lab's VMs and restart them when they crash")
+    parser.add_argument("--global-config", type=Path, default=Path("global_config.yaml"), help="Switch global configuration file (default: global_config.yaml)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="Supervise VMs in the foreground (systemd: n9kv-supervisor.service)")
+    run_parser.add_argument("--config-dir", type=Path, default=Path("."), help="Directory with the S*_*.yaml switch configs (default: .)")
+    run_parser.add_argument("--site", type=int, action="append", help="Only switches of this site (repeatable; default: all)")
+    run_parser.add_argument("--no-switches", action="store_true", help="Supervise only the --router VMs")
+    run_parser.add_argument("--router", type=Path, action="append", default=[], help="Router YAML, e.g. ../8000v/WAN1.yaml (repeatable)")
+    run_parser.add_argument("--backoff-base", type=float, default=5, help="Seconds before the first restart (default: 5)")
+    run_parser.add_argument("--backoff-max", type=float, default=300, help="Longest restart delay in seconds (default: 300)")
+    run_parser.add_argument("--stable-seconds", type=float, default=600, help="Uptime after which a VM's backoff resets (default: 600)")
+    run_parser.add_argument("--max-restarts", type=int, default=5, help="Crashes within --crash-window that stop restarts (default: 5)")
+    run_parser.add_argument("--crash-window", type=float, default=1800, help="Crash-loop window in seconds (default: 1800)")
+    status_parser = sub.add_parser("status", help="Show supervised VMs")
+    status_parser.add_argument("--json", action="store_true", help="Print JSON")
+    args = parser.parse_args()
+
+    global_config = ConfigLoader.load_global_config(args.global_config)
+
+    if args.command == "status":
+        state = read_state(global_config.registry_file)
+        if state is None:
+            print("No supervisor state found")
+            return 1
+        if args.json:
+            print(json.dumps(state, indent=2))
+        else:
+            print_state(state)
+        return 0
+
+    paths = [] if args.no_switches else ConfigLoader.fabric_config_paths(args.config_dir, args.site)
+    units = [switch_unit(path, args.global_config) for path in paths] + [router_unit(path) for path in args.router]
+    if not units:
+        parser.error("nothing to supervise")
+    registry = VMRegistry(global_config.registry_file)
+    registry.path.parent.mkdir(parents=True, exist_ok=True)
+    Supervisor(units, registry, args.backoff_base, args.backoff_max, args.stable_seconds, args.max_restarts, args.crash_window).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
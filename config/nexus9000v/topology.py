@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""Indexed, validated model of the whole lab: devices, ports, bridges, links.
+
+Built once from the per-VM YAML (S*_*.yaml switches, 8000v router YAML,
+container YAML) and shared by nexus9000v.py (fabric validation),
+populate_netbox.py (devices, interfaces, cables) and the Ansible dynamic
+inventory (hostnames, management IPs, interface names).
+
+Construction is one pass over every port, filling these indexes:
+
+    devices       name -> Device
+    by_sid        sid -> Device (also console/monitor TCP port -> Device)
+    by_bridge     bridge -> [Port]
+    by_ip         address (no prefix) -> Port
+    by_mac        MAC -> Port
+    adjacency     device -> {neighbor device: [(local Port, remote Port)]}
+
+followed by one pass over the bridges. Problems found along the way are
+collected in Topology.problems rather than raised:
+
+    - duplicate device names, sids (hence console/monitor ports), IPs and MACs
+    - a switch or router whose neighbors and isl_bridges differ in length
+    - a point-to-point bridge with more than two endpoints
+    - a link whose ends do not name each other as neighbors on that bridge
+
+Management bridges (BR_ND_DATA_*, outside, and any bridge a device uses for its
+management port) are multi-access and are not links. A link whose far end is
+not loaded (a --site subset, or the routers/containers were not passed) is
+fine unless strict=True, which is for the full lab: then every point-to-point
+bridge must have exactly two endpoints and every neighbor must exist.
+
+Usage:
+    python3 topology.py --router ../8000v/WAN1.yaml --containers ../containers/container_configs_access_mode.yaml check --strict
+    python3 topology.py neighbors S1_LE1
+    python3 topology.py [--json] links
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fabric import fabric_paths, load_many
+
+HERE = Path(__file__).resolve().parent
+SHARED_BRIDGE_PREFIXES = ("BR_ND_DATA_",)
+SHARED_BRIDGES = {"outside"}
+VM_KINDS = ("nexus9000v", "c8000v")
+
+MACFunction = Callable[[int, int], str]  # (sid, port index; 0 = mgmt) -> MAC
+
+
+@dataclass(frozen=True)
+class Port:
+    """One interface of one device and the bridge it is plugged into."""
+
+    device: str
+    name: str  # interface name on the device: mgmt0, Ethernet1/2, GigabitEthernet3, eth1
+    index: int  # 0 = management, 1.. = data ports in YAML order
+    bridge: str
+    neighbor: Optional[str] = None  # as declared in the YAML
+    ip: Optional[str] = None  # address/prefix
+    mac: Optional[str] = None
+
+    @property
+    def address(self) -> Optional[str]:
+        """ip without its prefix length."""
+        return self.ip.split("/", 1)[0] if self.ip else None
+
+
+@dataclass
+class Device:
+    """A switch, router, container or static host in the lab."""
+
+    name: str
+    kind: str  # nexus9000v | c8000v | container | static
+    role: str
+    sid: Optional[int] = None
+    ports: List[Port] = field(default_factory=list)
+    problems: List[str] = field(default_factory=list)  # found while reading its YAML
+
+    @property
+    def site(self) -> Optional[int]:
+        """Site number from the S<site>_ name prefix, None for shared infrastructure."""
+        prefix = self.name.split("_", 1)[0]
+        return int(prefix[1:]) if len(prefix) > 1 and prefix[0] == "S" and prefix[1:].isdigit() else None
+
+    @property
+    def mgmt(self) -> Optional[Port]:
+        """The management port, if the device has one."""
+        return self.ports[0] if self.ports and self.ports[0].index == 0 else None
+
+    @property
+    def data_ports(self) -> List[Port]:
+        """Every port but the management port."""
+        return [port for port in self.ports if port.index > 0]
+
+    @property
+    def console_ports(self) -> List[int]:
+        """Host TCP ports of the telnet console and QEMU monitor (VMs only; derived from sid)."""
+        return [10000 + self.sid, 20000 + self.sid] if self.kind in VM_KINDS and self.sid is not None else []
+
+
+def _vm_device(doc: Dict[str, Any], kind: str, ifnames: Callable[[int], str], mac: Optional[MACFunction]) -> Device:
+    """Device for a switch or router YAML document."""
+    name, sid = doc["name"], doc.get("sid")
+    neighbors, bridges = doc.get("neighbors") or [], doc.get("isl_bridges") or []
+    device = Device(name, kind, doc.get("role", ""), sid)
+    if len(neighbors) != len(bridges):
+        device.problems.append(f"{name}: {len(neighbors)} neighbors but {len(bridges)} isl_bridges")
+
+    def mac_of(index: int) -> Optional[str]:
+        return mac(sid, index) if mac and sid is not None else None
+
+    device.ports.append(Port(name, ifnames(0), 0, doc["mgmt_bridge"], ip=doc.get("mgmt_ip"), mac=mac_of(0)))
+    for index, bridge in enumerate(bridges, 1):
+        neighbor = neighbors[index - 1] if index <= len(neighbors) else None
+        device.ports.append(Port(name, ifnames(index), index, bridge, neighbor, mac=mac_of(index)))
+    return device
+
+
+def switch_device(doc: Dict[str, Any], mac: Optional[MACFunction] = None) -> Device:
+    """Device for an S*_*.yaml switch config: mgmt0, Ethernet1/1..N."""
+    return _vm_device(doc, "nexus9000v", lambda i: f"Ethernet1/{i}" if i else "mgmt0", mac)
+
+
+def router_device(doc: Dict[str, Any], mac: Optional[MACFunction] = None) -> Device:
+    """Device for a c8000v router config: GigabitEthernet1 (mgmt), GigabitEthernet2..N+1."""
+    return _vm_device(doc, "c8000v", lambda i: f"GigabitEthernet{i + 1}", mac)
+
+
+def container_device(name: str, spec: Dict[str, Any]) -> Device:
+    """Device for one entry of a config/containers/*.yaml file."""
+    device = Device(spec.get("name", name), "container", "host")
+    for index, key in enumerate(("management_interface", "test_interface")):
+        iface = spec.get(key)
+        if iface:
+            ip = f"{iface['ip_address']}/{iface['netmask']}" if iface.get("ip_address") else None
+            device.ports.append(Port(device.name, iface["name"], index, iface["bridge"], ip=ip, mac=iface.get("mac_address")))
+    return device
+
+
+class Topology:
+    """The lab's devices with every index needed for O(1) lookups."""
+
+    def __init__(self, devices: Iterable[Device], strict: bool = False):
+        self.strict = strict
+        self.devices: Dict[str, Device] = {}
+        self.by_sid: Dict[int, Device] = {}
+        self.by_console_port: Dict[int, Device] = {}
+        self.by_bridge: Dict[str, List[Port]] = defaultdict(list)
+        self.by_port: Dict[Tuple[str, str], Port] = {}
+        self.by_ip: Dict[str, Port] = {}
+        self.by_mac: Dict[str, Port] = {}
+        self.adjacency: Dict[str, Dict[str, List[Tuple[Port, Port]]]] = defaultdict(lambda: defaultdict(list))
+        self.problems: List[str] = []
+        self.shared_bridges = set(SHARED_BRIDGES)
+
+        for device in devices:
+            self._add(device)
+        self._link()
+
+    @staticmethod
+    def _claim(index: Dict[Any, Any], key: Any, value: Any, what: str, problems: List[str]) -> None:
+        """index[key] = value, recording a problem if key is taken."""
+        owner = index.setdefault(key, value)
+        if owner is not value:
+            problems.append(f"{what} already used by {owner.name if isinstance(owner, Device) else f'{owner.device} {owner.name}'}")
+
+    def _add(self, device: Device) -> None:
+        problems = self.problems
+        if device.name in self.devices:
+            problems.append(f"duplicate device name {device.name}")
+            return
+        self.devices[device.name] = device
+        problems.extend(device.problems)
+        if device.sid is not None:
+            self._claim(self.by_sid, device.sid, device, f"{device.name}: sid {device.sid}", problems)
+        for tcp_port in device.console_ports:
+            self._claim(self.by_console_port, tcp_port, device, f"{device.name}: TCP port {tcp_port}", problems)
+        for port in device.ports:
+            self.by_port[(device.name, port.name)] = port
+            self.by_bridge[port.bridge].append(port)
+            if port.index == 0:
+                self.shared_bridges.add(port.bridge)
+            if port.address:
+                self._claim(self.by_ip, port.address, port, f"{device.name} {port.name}: IP {port.address}", problems)
+            if port.mac:
+                self._claim(self.by_mac, port.mac.lower(), port, f"{device.name} {port.name}: MAC {port.mac}", problems)
+
+    def _link(self) -> None:
+        """One pass over the point-to-point bridges: endpoint counts, neighbor symmetry, adjacency."""
+        for bridge, ends in sorted(self.by_bridge.items()):
+            if self.is_shared(bridge):
+                continue
+            if len(ends) > 2:
+                self.problems.append(f"ISL bridge {bridge} has {len(ends)} endpoints: {', '.join(p.device for p in ends)}")
+                continue
+            if len(ends) == 1:
+                port = ends[0]
+                if port.neighbor in self.devices:
+                    self.problems.append(f"{port.device} -> {port.neighbor} on {bridge} is not mirrored in {port.neighbor}'s config")
+                elif self.strict:
+                    self.problems.append(f"ISL bridge {bridge} has only one endpoint ({port.device} -> {port.neighbor or '?'})")
+                continue
+            a, b = ends
+            for local, remote in ((a, b), (b, a)):
+                if local.neighbor is not None and local.neighbor != remote.device:
+                    self.problems.append(f"{local.device} -> {local.neighbor} on {bridge}, but the other end is {remote.device}")
+                self.adjacency[local.device][remote.device].append((local, remote))
+
+    def is_shared(self, bridge: str) -> bool:
+        """True for multi-access (management) bridges, which never form links."""
+        return bridge in self.shared_bridges or bridge.startswith(SHARED_BRIDGE_PREFIXES)
+
+    def check(self) -> "Topology":
+        """self, or ValueError listing every problem."""
+        if self.problems:
+            raise ValueError("Topology validation failed:\n  " + "\n  ".join(self.problems))
+        return self
+
+    def port(self, device: str, name: str) -> Optional[Port]:
+        """device's interface name."""
+        return self.by_port.get((device, name))
+
+    def peer(self, port: Port) -> Optional[Port]:
+        """The far end of port's point-to-point link, if loaded."""
+        if self.is_shared(port.bridge):
+            return None
+        ends = self.by_bridge.get(port.bridge, [])
+        return next((end for end in ends if end is not port), None) if len(ends) == 2 else None
+
+    def neighbors(self, device: str) -> List[str]:
+        """Devices with at least one link to device."""
+        return sorted(self.adjacency.get(device, {}))
+
+    def links_between(self, a: str, b: str) -> List[Tuple[Port, Port]]:
+        """(port on a, port on b) for every link between a and b."""
+        return list(self.adjacency.get(a, {}).get(b, []))
+
+    def links(self) -> List[Tuple[Port, Port]]:
+        """Every point-to-point link with both ends loaded, once, sorted by bridge."""
+        return [
+            (ends[0], ends[1])
+            for bridge, ends in sorted(self.by_bridge.items())
+            if len(ends) == 2 and not self.is_shared(bridge)
+        ]
+
+    def of_kind(self, *kinds: str) -> List[Device]:
+        """Devices of the given kinds, sorted by name."""
+        return [device for name, device in sorted(self.devices.items()) if device.kind in kinds]
+
+
+def load_topology(
+    config_dir: Path = HERE,
+    routers: Iterable[Path] = (),
+    containers: Iterable[Path] = (),
+    sites: Optional[Iterable[int]] = None,
+    strict: bool = False,
+    extra: Iterable[Device] = (),
+) -> Topology:
+    """Topology from the switch configs in config_dir plus router and container YAML files."""
+    routers, containers = list(routers), list(containers)
+    switch_docs = load_many(fabric_paths(config_dir, sites))
+    router_docs = load_many(routers)
+    container_docs = load_many(containers)
+    devices = [switch_device(doc) for doc in switch_docs]
+    devices += [router_device(doc) for doc in router_docs]
+    devices += [container_device(name, spec) for doc in container_docs for name, spec in ((doc or {}).get("containers") or {}).items()]
+    return Topology([*devices, *extra], strict=strict)
+
+
+def main() -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Validate and query the lab topology")
+    parser.add_argument("--config-dir", type=Path, default=HERE, help="Directory with the S*_*.yaml switch configs")
+    parser.add_argument("--site", type=int, action="append", help="Only switches of this site (repeatable)")
+    parser.add_argument("--router", type=Path, action="append", default=[], help="Router YAML, e.g. ../8000v/WAN1.yaml (repeatable)")
+    parser.add_argument("--containers", type=Path, action="append", default=[], help="Container YAML (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check_parser = sub.add_parser("check", help="Validate; exit 1 on any problem")
+    check_parser.add_argument("--strict", action="store_true", help="Every ISL bridge needs two endpoints and every neighbor must exist")
+    neighbors_parser = sub.add_parser("neighbors", help="Links of one device")
+    neighbors_parser.add_argument("name")
+    sub.add_parser("links", help="Every point-to-point link")
+    args = parser.parse_args()
+
+    topology = load_topology(args.config_dir, args.router, args.containers, args.site, strict=getattr(args, "strict", False))
+
+    if args.command == "check":
+        for problem in topology.problems:
+            print(f"ERROR: {problem}")
+        if not topology.problems:
+            print(f"OK: {len(topology.devices)} devices, {len(topology.links())} links")
+        return 1 if topology.problems else 0
+
+    if args.command == "neighbors":
+        if args.name not in topology.devices:
+            print(f"{args.name}: no such device")
+            return 1
+        pairs = [pair for neighbor in topology.neighbors(args.name) for pair in topology.links_between(args.name, neighbor)]
+    else:
+        pairs = topology.links()
+    if args.json:
+        print(json.dumps([{"a": asdict(a), "b": asdict(b)} for a, b in pairs], indent=2))
+        return 0
+    for a, b in pairs:
+        print(f"{a.device + ' ' + a.name:<24} {b.device + ' ' + b.name:<24} {a.bridge}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())